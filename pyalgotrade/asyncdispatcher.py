@@ -0,0 +1,159 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+
+This module requires Python 3.
+"""
+
+import asyncio
+import threading
+
+from pyalgotrade import dispatcher
+
+
+# Time to wait for coroutines to finish after subjects are stopped, before cancelling them.
+SHUTDOWN_TIMEOUT = 1
+# Time to sleep between dispatch passes when some subjects don't support the wakeup and have to be polled.
+POLL_INTERVAL = 0.01
+
+
+class Wakeup(object):
+    """The asyncio counterpart of :class:`pyalgotrade.utils.wakeup.Wakeup`. The dispatcher waits on it from the event
+    loop, and it can be notified both from the event loop and from other threads.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__loop = None
+        self.__loopThreadId = None
+        self.__event = None
+        self.__pending = False
+
+    def bind(self, loop):
+        with self.__lock:
+            self.__loop = loop
+            self.__loopThreadId = threading.get_ident()
+            self.__event = asyncio.Event()
+            if self.__pending:
+                self.__event.set()
+                self.__pending = False
+
+    def unbind(self):
+        with self.__lock:
+            self.__loop = None
+            self.__loopThreadId = None
+            self.__event = None
+
+    def notify(self):
+        with self.__lock:
+            loop = self.__loop
+            event = self.__event
+            if loop is None:
+                self.__pending = True
+                return
+
+        if threading.get_ident() == self.__loopThreadId:
+            event.set()
+        else:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The loop was closed.
+                pass
+
+    async def wait(self, timeout):
+        """Waits until notified or until the timeout expires. Returns True if notified."""
+        try:
+            await asyncio.wait_for(self.__event.wait(), timeout)
+            ret = True
+        except asyncio.TimeoutError:
+            ret = False
+        self.__event.clear()
+        return ret
+
+
+class Dispatcher(dispatcher.Dispatcher):
+    """A :class:`pyalgotrade.dispatcher.Dispatcher` that runs in an asyncio event loop.
+
+    Subjects that return True from runsInEventLoop get the coroutine returned by runAsync scheduled in the same event
+    loop, so events get produced and dispatched without handing them over between threads.
+    Other subjects, like the ones used for backtesting, are dispatched just like :class:`pyalgotrade.dispatcher.Dispatcher`
+    does.
+    """
+
+    def __init__(self):
+        super(Dispatcher, self).__init__()
+        self.__wakeup = Wakeup()
+        self.__tasks = []
+
+    def getWakeup(self):
+        return self.__wakeup
+
+    def runsEventLoop(self):
+        return True
+
+    def run(self):
+        """Runs the dispatcher in a new event loop."""
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self.runAsync())
+        finally:
+            loop.close()
+
+    async def runAsync(self):
+        """Runs the dispatcher in the current event loop."""
+        loop = asyncio.get_event_loop()
+        self.__wakeup.bind(loop)
+        try:
+            self._startRun()
+            for subject in self.getSubjects():
+                if subject.runsInEventLoop():
+                    self.__tasks.append(loop.create_task(subject.runAsync()))
+
+            while not self._isStopped():
+                self.__checkTasks()
+                if self._dispatchOnce():
+                    if self.__tasks:
+                        # Give coroutines a chance to run.
+                        await asyncio.sleep(0)
+                elif self._canWait():
+                    await self.__wakeup.wait(dispatcher.Dispatcher.WAKEUP_TIMEOUT)
+                elif not self._isStopped():
+                    await asyncio.sleep(POLL_INTERVAL)
+        finally:
+            self._finishRun()
+            await self.__finishTasks()
+            self.__wakeup.unbind()
+
+    # Raises the exception if a coroutine failed.
+    def __checkTasks(self):
+        for task in self.__tasks:
+            if task.done() and not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+
+    async def __finishTasks(self):
+        tasks = self.__tasks
+        self.__tasks = []
+        if tasks:
+            # Subjects were stopped, so coroutines should finish on their own.
+            pending = [task for task in tasks if not task.done()]
+            if pending:
+                _, pending = await asyncio.wait(pending, timeout=SHUTDOWN_TIMEOUT)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -129,6 +129,7 @@ class BasicBar(Bar):
         '__frequency',
         '__useAdjustedValue',
         '__extra',
+        '__adjFactor',
     )
 
     def __init__(self, dateTime, open_, high, low, close, volume, adjClose, frequency, extra={}):
@@ -143,6 +144,24 @@ class BasicBar(Bar):
         elif low > close:
             raise Exception("low > close on %s" % (dateTime))
 
+        self.__setValues(dateTime, open_, high, low, close, volume, adjClose, frequency, False, extra)
+
+    @classmethod
+    def fromTrustedValues(
+        cls, dateTime, open_, high, low, close, volume, adjClose, frequency, extra={}, adjFactor=None
+    ):
+        """Builds a bar skipping the OHLC sanity checks.
+        Only use this with values that were already validated, or that are consistent by construction.
+
+        :param adjFactor: The adjustment factor (adjusted close / close), if it was already calculated.
+        """
+        ret = cls.__new__(cls)
+        ret.__setValues(dateTime, open_, high, low, close, volume, adjClose, frequency, False, extra, adjFactor)
+        return ret
+
+    def __setValues(
+        self, dateTime, open_, high, low, close, volume, adjClose, frequency, useAdjustedValue, extra, adjFactor=None
+    ):
         self.__dateTime = dateTime
         self.__open = open_
         self.__close = close
@@ -151,20 +170,24 @@ class BasicBar(Bar):
         self.__volume = volume
         self.__adjClose = adjClose
         self.__frequency = frequency
-        self.__useAdjustedValue = False
+        self.__useAdjustedValue = useAdjustedValue
         self.__extra = extra
 
+        # The adjustment factor is calculated once, if possible, so adjusted accessors only need a multiplication.
+        if adjFactor is None and adjClose is not None and close:
+            adjFactor = adjClose / float(close)
+        self.__adjFactor = adjFactor
+
+    def __getAdjusted(self, value):
+        if self.__adjClose is None:
+            raise Exception("Adjusted close is missing")
+        return self.__adjClose * value / float(self.__close)
+
     def __setstate__(self, state):
-        (self.__dateTime,
-            self.__open,
-            self.__close,
-            self.__high,
-            self.__low,
-            self.__volume,
-            self.__adjClose,
-            self.__frequency,
-            self.__useAdjustedValue,
-            self.__extra) = state
+        # The adjustment factor is not pickled.
+        self.__setValues(
+            state[0], state[1], state[3], state[4], state[2], state[5], state[6], state[7], state[8], state[9]
+        )
 
     def __getstate__(self):
         return (
@@ -193,25 +216,25 @@ class BasicBar(Bar):
 
     def getOpen(self, adjusted=False):
         if adjusted:
-            if self.__adjClose is None:
-                raise Exception("Adjusted close is missing")
-            return self.__adjClose * self.__open / float(self.__close)
+            if self.__adjFactor is None:
+                return self.__getAdjusted(self.__open)
+            return self.__open * self.__adjFactor
         else:
             return self.__open
 
     def getHigh(self, adjusted=False):
         if adjusted:
-            if self.__adjClose is None:
-                raise Exception("Adjusted close is missing")
-            return self.__adjClose * self.__high / float(self.__close)
+            if self.__adjFactor is None:
+                return self.__getAdjusted(self.__high)
+            return self.__high * self.__adjFactor
         else:
             return self.__high
 
     def getLow(self, adjusted=False):
         if adjusted:
-            if self.__adjClose is None:
-                raise Exception("Adjusted close is missing")
-            return self.__adjClose * self.__low / float(self.__close)
+            if self.__adjFactor is None:
+                return self.__getAdjusted(self.__low)
+            return self.__low * self.__adjFactor
         else:
             return self.__low
 
@@ -274,6 +297,26 @@ class Bars(object):
 
         self.__barDict = barDict
         self.__dateTime = firstDateTime
+        self.__instruments = None
+        self.__items = None
+
+    @classmethod
+    def fromTrustedBars(cls, barDict, dateTime):
+        """Builds a group of bars skipping the datetime checks.
+        Only use this if all bars are known to have the given datetime.
+
+        :param barDict: A map of instrument to :class:`Bar` objects.
+        :type barDict: map.
+        :param dateTime: The datetime for all the bars.
+        :type dateTime: :class:`datetime.datetime`.
+        """
+        assert len(barDict), "No bars supplied"
+        ret = cls.__new__(cls)
+        ret.__barDict = barDict
+        ret.__dateTime = dateTime
+        ret.__instruments = None
+        ret.__items = None
+        return ret
 
     def __getitem__(self, instrument):
         """Returns the :class:`pyalgotrade.bar.Bar` for the given instrument.
@@ -285,14 +328,19 @@ class Bars(object):
         return instrument in self.__barDict
 
     def items(self):
-        return list(self.__barDict.items())
+        """Returns a tuple of (instrument, :class:`Bar`) pairs."""
+        if self.__items is None:
+            self.__items = tuple(self.__barDict.items())
+        return self.__items
 
     def keys(self):
-        return list(self.__barDict.keys())
+        return self.getInstruments()
 
     def getInstruments(self):
-        """Returns the instrument symbols."""
-        return list(self.__barDict.keys())
+        """Returns a tuple with the instrument symbols."""
+        if self.__instruments is None:
+            self.__instruments = tuple(self.__barDict.keys())
+        return self.__instruments
 
     def getDateTime(self):
         """Returns the :class:`datetime.datetime` for this set of bars."""
@@ -63,7 +63,14 @@ class BaseBarFeed(feed.BaseFeed):
         self.__useAdjustedValues = useAdjusted
         # Update existing dataseries
         for instrument in self.getRegisteredInstruments():
-            self[instrument].setUseAdjustedValues(useAdjusted)
+            if self.hasDataSeries(instrument):
+                self[instrument].setUseAdjustedValues(useAdjusted)
+        # Update the last bars, since they are used to value positions.
+        for bar_ in self.__lastBars.values():
+            bar_.setUseAdjustedValue(useAdjusted)
+
+    def getUseAdjustedValues(self):
+        return self.__useAdjustedValues
 
     # Return the datetime for the current bars.
     @abc.abstractmethod
@@ -105,10 +112,15 @@ class BaseBarFeed(feed.BaseFeed):
                     )
                 )
 
+            # In on demand mode there may be no dataseries to set the adjusted flag, and bars are also used by the
+            # broker through getLastBar.
+            if self.getOnDemandDataSeries():
+                for instrument, bar_ in bars.items():
+                    bar_.setUseAdjustedValue(self.__useAdjustedValues)
+
             # Update self.__currentBars and self.__lastBars
             self.__currentBars = bars
-            for instrument in bars.getInstruments():
-                self.__lastBars[instrument] = bars[instrument]
+            self.__lastBars.update(bars.items())
         return (dateTime, bars)
 
     def getFrequency(self):
@@ -18,17 +18,43 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import collections
 import datetime
+import gzip
+import heapq
+import itertools
+import multiprocessing
 
 import pytz
 import six
 
 from pyalgotrade.utils import dt
+from pyalgotrade.utils import dtparser
 from pyalgotrade.utils import csvutils
 from pyalgotrade.barfeed import membf
+from pyalgotrade import barfeed
 from pyalgotrade import bar
 
 
+# Number of bars to read ahead from each file when streaming.
+READ_AHEAD_SIZE = 256
+
+# Maximum number of files to keep open at the same time when streaming.
+MAX_OPEN_FILES = 128
+
+
+def open_file(path):
+    """Opens a CSV file for reading. Files that end with .gz are decompressed on the fly."""
+    if path.endswith(".gz"):
+        if six.PY2:
+            ret = gzip.open(path, "rb")
+        else:
+            ret = gzip.open(path, "rt")
+    else:
+        ret = open(path, "r")
+    return ret
+
+
 # Interface for csv row parsers.
 class RowParser(object):
     def parseBar(self, csvRowDict):
@@ -115,33 +141,333 @@ class BarFeed(membf.BarFeed):
         self.__barFilter = barFilter
 
     def addBarsFromCSV(self, instrument, path, rowParser, skipMalformedBars=False):
-        def parse_bar_skip_malformed(row):
-            ret = None
-            try:
-                ret = rowParser.parseBar(row)
-            except Exception:
-                pass
-            return ret
-
-        if skipMalformedBars:
-            parse_bar = parse_bar_skip_malformed
-        else:
-            parse_bar = rowParser.parseBar
+        loadedBars, _ = load_bars(path, rowParser, self.__barFilter, skipMalformedBars)
+        self.addBarsFromSequence(instrument, loadedBars)
+
+    def addBarsFromCSVFiles(self, files, skipMalformedBars=False, maxWorkers=1):
+        """Loads bars from multiple CSV files, optionally parsing them concurrently using a pool of processes.
+
+        :param files: A list of (instrument, path, rowParser) tuples.
+        :type files: list.
+        :param skipMalformedBars: True to skip errors while parsing bars.
+        :type skipMalformedBars: boolean.
+        :param maxWorkers: The number of processes to use. If 1, files are loaded in this process. If None, the number
+            of CPUs is used.
+        :type maxWorkers: int.
+        :rtype: A list with the row parser used for each file, since files get parsed in other processes.
+        """
+
+        jobs = [(path, rowParser, self.__barFilter, skipMalformedBars) for _, path, rowParser in files]
+        ret = []
+        for (instrument, _, _), (loadedBars, rowParser) in zip(files, load_bars_from_files(jobs, maxWorkers)):
+            self.addBarsFromSequence(instrument, loadedBars)
+            ret.append(rowParser)
+        return ret
+
+
+def load_bars(path, rowParser, barFilter=None, skipMalformedBars=False):
+    """Loads bars from a CSV file.
+
+    :rtype: A tuple with the list of bars and the row parser, since row parsers may keep state while parsing.
+    """
+
+    def parse_bar_skip_malformed(row):
+        ret = None
+        try:
+            ret = rowParser.parseBar(row)
+        except Exception:
+            pass
+        return ret
 
-        # Load the csv file
-        loadedBars = []
-        reader = csvutils.FastDictReader(open(path, "r"), fieldnames=rowParser.getFieldNames(), delimiter=rowParser.getDelimiter())
+    if skipMalformedBars:
+        parse_bar = parse_bar_skip_malformed
+    else:
+        parse_bar = rowParser.parseBar
+
+    # Load the csv file
+    bars = []
+    with open(path, "r") as f:
+        reader = csvutils.FastDictReader(f, fieldnames=rowParser.getFieldNames(), delimiter=rowParser.getDelimiter())
         for row in reader:
             bar_ = parse_bar(row)
+            if bar_ is not None and (barFilter is None or barFilter.includeBar(bar_)):
+                bars.append(bar_)
+    return bars, rowParser
+
+
+def _load_bars_job(job):
+    return load_bars(*job)
+
+
+def load_bars_from_files(jobs, maxWorkers=1):
+    """Loads bars from multiple CSV files, optionally using a pool of processes.
+
+    :param jobs: A list of (path, rowParser, barFilter, skipMalformedBars) tuples. Row parsers and bar filters must be
+        picklable.
+    :type jobs: list.
+    :param maxWorkers: The number of processes to use. If 1, files are loaded in this process. If None, the number of
+        CPUs is used.
+    :type maxWorkers: int.
+    :rtype: A generator that yields the result of :func:`load_bars` for each job, in the same order.
+    """
+
+    if maxWorkers is None:
+        maxWorkers = multiprocessing.cpu_count()
+    maxWorkers = min(maxWorkers, len(jobs))
+
+    if maxWorkers <= 1:
+        for job in jobs:
+            yield _load_bars_job(job)
+    else:
+        pool = multiprocessing.Pool(maxWorkers)
+        try:
+            # One file per task, since file sizes may vary a lot.
+            for result in pool.imap(_load_bars_job, jobs, chunksize=1):
+                yield result
+        finally:
+            pool.terminate()
+            pool.join()
+
+
+# Keeps track of the readers that have a file open, and suspends the least recently used ones so that no more than
+# maxOpenFiles files are open at the same time.
+class OpenReaders(object):
+    def __init__(self, maxOpenFiles):
+        assert maxOpenFiles > 0, "Invalid maximum number of open files"
+
+        self.__readers = collections.OrderedDict()
+        self.__maxOpenFiles = maxOpenFiles
+
+    # Call before opening a file, or before reading from one that is already open.
+    def add(self, reader):
+        self.__readers.pop(reader, None)
+        while len(self.__readers) >= self.__maxOpenFiles:
+            leastRecentlyUsed, _ = self.__readers.popitem(last=False)
+            leastRecentlyUsed.suspend()
+        self.__readers[reader] = None
+
+    def remove(self, reader):
+        self.__readers.pop(reader, None)
+
+
+# Reads bars from a CSV file, a chunk at a time, so only a bounded number of bars is held in memory.
+# Files are kept open between chunks since seeking within compressed files means decompressing them from the start.
+# If too many files are open, the least recently used ones get closed and then reopened at the saved offset.
+class BarReader(object):
+    def __init__(self, instrument, path, rowParser, barFilter, skipMalformedBars, readAheadSize, openReaders):
+        self.__instrument = instrument
+        self.__path = path
+        self.__rowParser = rowParser
+        self.__barFilter = barFilter
+        self.__skipMalformedBars = skipMalformedBars
+        self.__readAheadSize = readAheadSize
+        self.__openReaders = openReaders
+        self.__fieldNames = None
+        self.__file = None
+        # The offset to reopen the file at, or None if there is nothing else to read.
+        self.__offset = None
+        self.__buffer = collections.deque()
+        self.__lastDateTime = None
+
+    def __parseBars(self, reader):
+        for row in reader:
+            if self.__skipMalformedBars:
+                try:
+                    bar_ = self.__rowParser.parseBar(row)
+                except Exception:
+                    continue
+            else:
+                bar_ = self.__rowParser.parseBar(row)
+
             if bar_ is not None and (self.__barFilter is None or self.__barFilter.includeBar(bar_)):
-                loadedBars.append(bar_)
+                if self.__lastDateTime is not None and bar_.getDateTime() <= self.__lastDateTime:
+                    raise Exception(
+                        "Bars in %s are not in ascending order. Previous datetime was %s and current datetime is %s" % (
+                            self.__path, self.__lastDateTime, bar_.getDateTime()
+                        )
+                    )
+                self.__lastDateTime = bar_.getDateTime()
+                yield bar_
+
+    def __fillBuffer(self):
+        if self.__buffer or self.__offset is None:
+            return
+
+        self.__openReaders.add(self)
+        if self.__file is None:
+            self.__file = open_file(self.__path)
+            if self.__offset:
+                self.__file.seek(self.__offset)
+        # Lines are read using readline instead of iterating over the file, so tell can be used if the reader gets
+        # suspended.
+        reader = csvutils.FastDictReader(
+            iter(self.__file.readline, ""), fieldnames=self.__fieldNames, delimiter=self.__rowParser.getDelimiter()
+        )
+        self.__fieldNames = reader.getFieldNames()
+        self.__buffer.extend(itertools.islice(self.__parseBars(reader), self.__readAheadSize))
+        # Close the file as soon as all the bars were read.
+        if len(self.__buffer) < self.__readAheadSize:
+            self.close()
+
+    def __closeFile(self):
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+    def getInstrument(self):
+        return self.__instrument
+
+    def open(self):
+        self.close()
+        self.__buffer.clear()
+        self.__lastDateTime = None
+        self.__fieldNames = self.__rowParser.getFieldNames()
+        self.__offset = 0
+        self.__fillBuffer()
+
+    # Closes the file, saving the offset so it can be reopened to read the next chunk.
+    def suspend(self):
+        if self.__file is not None:
+            self.__offset = self.__file.tell()
+            self.__closeFile()
+
+    def close(self):
+        self.__closeFile()
+        self.__offset = None
+        self.__openReaders.remove(self)
+
+    # Returns the datetime for the next bar, or None if there are no more bars.
+    def peekDateTime(self):
+        ret = None
+        if self.__buffer:
+            ret = self.__buffer[0].getDateTime()
+        return ret
+
+    def popBar(self):
+        ret = self.__buffer.popleft()
+        self.__fillBuffer()
+        return ret
 
-        self.addBarsFromSequence(instrument, loadedBars)
+
+class StreamingBarFeed(barfeed.BaseBarFeed):
+    """Base class for CSV file based :class:`pyalgotrade.barfeed.BarFeed` that read files lazily.
+
+    Files are read as bars get consumed, and bars for the different instruments are merged on the fly, so bars are
+    available right away and memory usage doesn't depend on the size of the files.
+
+    :param frequency: The frequency of the bars. Check :class:`pyalgotrade.bar.Frequency`.
+    :param maxLen: The maximum number of values that the :class:`pyalgotrade.dataseries.bards.BarDataSeries` will hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    :param readAheadSize: The number of bars to read ahead from each file.
+    :type readAheadSize: int.
+    :param maxOpenFiles: The maximum number of files to keep open at the same time.
+    :type maxOpenFiles: int.
+
+    .. note::
+        * This is a base class and should not be used directly.
+        * Bars in each file **must** be sorted by datetime in ascending order.
+        * If more than maxOpenFiles files are added, the least recently used ones get closed and then reopened where
+          reading stopped. Reopening a compressed file means decompressing it from the start.
+    """
+
+    def __init__(self, frequency, maxLen=None, readAheadSize=READ_AHEAD_SIZE, maxOpenFiles=MAX_OPEN_FILES):
+        super(StreamingBarFeed, self).__init__(frequency, maxLen)
+
+        self.__readAheadSize = readAheadSize
+        self.__openReaders = OpenReaders(maxOpenFiles)
+        self.__barFilter = None
+        self.__dailyTime = datetime.time(0, 0, 0)
+        self.__readers = []
+        # A heap with the datetime for the next bar, the index and the reader.
+        self.__heap = []
+        self.__started = False
+        self.__currDateTime = None
+
+    def __pushReader(self, index, reader):
+        dateTime = reader.peekDateTime()
+        if dateTime is not None:
+            heapq.heappush(self.__heap, (dateTime, index, reader))
+
+    def reset(self):
+        self.__heap = []
+        for index, reader in enumerate(self.__readers):
+            reader.open()
+            self.__pushReader(index, reader)
+        self.__currDateTime = None
+        super(StreamingBarFeed, self).reset()
+
+    def getCurrentDateTime(self):
+        return self.__currDateTime
+
+    def getDailyBarTime(self):
+        return self.__dailyTime
+
+    def setDailyBarTime(self, time):
+        self.__dailyTime = time
+
+    def getBarFilter(self):
+        return self.__barFilter
+
+    def setBarFilter(self, barFilter):
+        self.__barFilter = barFilter
+
+    def start(self):
+        super(StreamingBarFeed, self).start()
+        self.__started = True
+
+    def stop(self):
+        for reader in self.__readers:
+            reader.close()
+
+    def join(self):
+        pass
+
+    def addBarsFromCSV(self, instrument, path, rowParser, skipMalformedBars=False):
+        if self.__started:
+            raise Exception("Can't add more bars once you started consuming bars")
+
+        reader = BarReader(
+            instrument, path, rowParser, self.__barFilter, skipMalformedBars, self.__readAheadSize, self.__openReaders
+        )
+        # Read the first chunk right away so errors show up early, and row parsers know if there is an adj close.
+        reader.open()
+        self.__readers.append(reader)
+        self.__pushReader(len(self.__readers) - 1, reader)
+
+        self.registerInstrument(instrument)
+
+    def eof(self):
+        return len(self.__heap) == 0
+
+    def peekDateTime(self):
+        ret = None
+        if self.__heap:
+            ret = self.__heap[0][0]
+        return ret
+
+    def getNextBars(self):
+        if not self.__heap:
+            return None
+
+        # Pick all the bars with the smallest datetime.
+        smallestDateTime = self.__heap[0][0]
+        ret = {}
+        while self.__heap and self.__heap[0][0] == smallestDateTime:
+            _, index, reader = heapq.heappop(self.__heap)
+            if reader.getInstrument() in ret:
+                raise Exception("Duplicate bars found for %s on %s" % (reader.getInstrument(), smallestDateTime))
+            ret[reader.getInstrument()] = reader.popBar()
+            self.__pushReader(index, reader)
+
+        self.__currDateTime = smallestDateTime
+        return bar.Bars.fromTrustedBars(ret, smallestDateTime)
 
 
 class GenericRowParser(RowParser):
     def __init__(self, columnNames, dateTimeFormat, dailyBarTime, frequency, timezone, barClass=bar.BasicBar):
-        self.__dateTimeFormat = dateTimeFormat
+        self.__dateTimeParser = dtparser.get_parser(dateTimeFormat)
         self.__dailyBarTime = dailyBarTime
         self.__frequency = frequency
         self.__timezone = timezone
@@ -158,7 +484,7 @@ class GenericRowParser(RowParser):
         self.__columnNames = columnNames
 
     def _parseDate(self, dateString):
-        ret = datetime.datetime.strptime(dateString, self.__dateTimeFormat)
+        ret = self.__dateTimeParser.parse(dateString)
 
         if self.__dailyBarTime is not None:
             ret = datetime.datetime.combine(ret, self.__dailyBarTime)
@@ -283,6 +609,121 @@ class GenericBarFeed(BarFeed):
         :type skipMalformedBars: boolean.
         """
 
+        rowParser = self.__buildRowParser(timezone)
+        super(GenericBarFeed, self).addBarsFromCSV(instrument, path, rowParser, skipMalformedBars=skipMalformedBars)
+        self.__checkAdjClose(rowParser)
+
+    def addBarsFromCSVFiles(self, files, timezone=None, skipMalformedBars=False, maxWorkers=1):
+        """Loads bars from multiple CSV formatted files, optionally parsing them concurrently using a pool of processes.
+        The instruments get registered in the bar feed.
+
+        :param files: A list of (instrument, path) tuples.
+        :type files: list.
+        :param timezone: The timezone to use to localize bars. Check :mod:`pyalgotrade.marketsession`.
+        :type timezone: A pytz timezone.
+        :param skipMalformedBars: True to skip errors while parsing bars.
+        :type skipMalformedBars: boolean.
+        :param maxWorkers: The number of processes to use. If 1, files are loaded in this process. If None, the number
+            of CPUs is used.
+        :type maxWorkers: int.
+        """
+
+        files = [(instrument, path, self.__buildRowParser(timezone)) for instrument, path in files]
+        rowParsers = super(GenericBarFeed, self).addBarsFromCSVFiles(
+            files, skipMalformedBars=skipMalformedBars, maxWorkers=maxWorkers
+        )
+        for rowParser in rowParsers:
+            self.__checkAdjClose(rowParser)
+
+    def __buildRowParser(self, timezone):
+        if timezone is None:
+            timezone = self.__timezone
+        return GenericRowParser(
+            self.__columnNames, self.__dateTimeFormat, self.getDailyBarTime(), self.getFrequency(),
+            timezone, self.__barClass
+        )
+
+    def __checkAdjClose(self, rowParser):
+        if rowParser.barsHaveAdjClose():
+            self.__haveAdjClose = True
+        elif self.__haveAdjClose:
+            raise Exception("Previous bars had adjusted close and these ones don't have.")
+
+
+class StreamingGenericBarFeed(StreamingBarFeed):
+    """A :class:`StreamingBarFeed` that loads bars from CSV files, optionally gzip compressed, that have the format
+    supported by :class:`GenericBarFeed`.
+
+    :param frequency: The frequency of the bars. Check :class:`pyalgotrade.bar.Frequency`.
+    :param timezone: The default timezone to use to localize bars. Check :mod:`pyalgotrade.marketsession`.
+    :type timezone: A pytz timezone.
+    :param maxLen: The maximum number of values that the :class:`pyalgotrade.dataseries.bards.BarDataSeries` will hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    :param readAheadSize: The number of bars to read ahead from each file.
+    :type readAheadSize: int.
+    :param maxOpenFiles: The maximum number of files to keep open at the same time.
+    :type maxOpenFiles: int.
+
+    .. note::
+        * The CSV file **must** have the column names in the first row.
+        * Bars in each file **must** be sorted by datetime in ascending order.
+        * It is ok if the **Adj Close** column is empty.
+    """
+
+    def __init__(self, frequency, timezone=None, maxLen=None, readAheadSize=READ_AHEAD_SIZE,
+                 maxOpenFiles=MAX_OPEN_FILES):
+        super(StreamingGenericBarFeed, self).__init__(frequency, maxLen, readAheadSize, maxOpenFiles)
+
+        self.__timezone = timezone
+        self.__haveAdjClose = False
+        self.__barClass = bar.BasicBar
+        self.__dateTimeFormat = "%Y-%m-%d %H:%M:%S"
+        self.__columnNames = {
+            "datetime": "Date Time",
+            "open": "Open",
+            "high": "High",
+            "low": "Low",
+            "close": "Close",
+            "volume": "Volume",
+            "adj_close": "Adj Close",
+        }
+        self.setDailyBarTime(None)
+
+    def barsHaveAdjClose(self):
+        return self.__haveAdjClose
+
+    def setNoAdjClose(self):
+        self.__columnNames["adj_close"] = None
+        self.__haveAdjClose = False
+
+    def setColumnName(self, col, name):
+        self.__columnNames[col] = name
+
+    def setDateTimeFormat(self, dateTimeFormat):
+        """
+        Set the format string to use with strptime to parse datetime column.
+        """
+        self.__dateTimeFormat = dateTimeFormat
+
+    def setBarClass(self, barClass):
+        self.__barClass = barClass
+
+    def addBarsFromCSV(self, instrument, path, timezone=None, skipMalformedBars=False):
+        """Registers a CSV formatted file to load bars from for a given instrument.
+        The instrument gets registered in the bar feed.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param path: The path to the CSV file. If it ends with .gz it will be decompressed on the fly.
+        :type path: string.
+        :param timezone: The timezone to use to localize bars. Check :mod:`pyalgotrade.marketsession`.
+        :type timezone: A pytz timezone.
+        :param skipMalformedBars: True to skip errors while parsing bars.
+        :type skipMalformedBars: boolean.
+        """
+
         if timezone is None:
             timezone = self.__timezone
 
@@ -291,8 +732,11 @@ class GenericBarFeed(BarFeed):
             timezone, self.__barClass
         )
 
-        super(GenericBarFeed, self).addBarsFromCSV(instrument, path, rowParser, skipMalformedBars=skipMalformedBars)
+        super(StreamingGenericBarFeed, self).addBarsFromCSV(
+            instrument, path, rowParser, skipMalformedBars=skipMalformedBars
+        )
 
+        # Only the first chunk of bars was parsed at this point.
         if rowParser.barsHaveAdjClose():
             self.__haveAdjClose = True
         elif self.__haveAdjClose:
@@ -74,6 +74,10 @@ class BarFeed(barfeed.BaseBarFeed):
 
         self.registerInstrument(instrument)
 
+    def getValueHistory(self, key):
+        bars = self.__bars.get(key, [])[:self.__nextPos.get(key, 0)]
+        return [(bar_.getDateTime(), bar_) for bar_ in bars]
+
     def eof(self):
         ret = True
         # Check if there is at least one more bar to return.
@@ -112,7 +116,8 @@ class BarFeed(barfeed.BaseBarFeed):
             raise Exception("Duplicate bars found for %s on %s" % (list(ret.keys()), smallestDateTime))
 
         self.__currDateTime = smallestDateTime
-        return bar.Bars(ret)
+        # All bars were picked because they have the smallest datetime, so there is no need to check them again.
+        return bar.Bars.fromTrustedBars(ret, smallestDateTime)
 
     def loadAll(self):
         for dateTime, bars in self:
@@ -22,6 +22,7 @@ import pyalgotrade.barfeed
 from pyalgotrade.barfeed import csvfeed
 from pyalgotrade import bar
 from pyalgotrade.utils import dt
+from pyalgotrade.utils import dtparser
 
 import pytz
 
@@ -42,15 +43,7 @@ import datetime
 
 def parse_datetime(dateTime):
     # Sample: 20081231 230600
-    # This custom parsing works faster than:
-    # datetime.datetime.strptime(dateTime, "%Y%m%d %H%M%S")
-    year = int(dateTime[0:4])
-    month = int(dateTime[4:6])
-    day = int(dateTime[6:8])
-    hour = int(dateTime[9:11])
-    minute = int(dateTime[11:13])
-    sec = int(dateTime[13:15])
-    return datetime.datetime(year, month, day, hour, minute, sec)
+    return dtparser.parse(dateTime, "%Y%m%d %H%M%S")
 
 
 class Frequency(object):
@@ -69,7 +62,7 @@ class RowParser(csvfeed.RowParser):
         if self.__frequency == pyalgotrade.bar.Frequency.MINUTE:
             ret = parse_datetime(dateTime)
         elif self.__frequency == pyalgotrade.bar.Frequency.DAY:
-            ret = datetime.datetime.strptime(dateTime, "%Y%m%d")
+            ret = dtparser.parse(dateTime, "%Y%m%d")
             # Time on CSV files is empty. If told to set one, do it.
             if self.__dailyBarTime is not None:
                 ret = datetime.datetime.combine(ret, self.__dailyBarTime)
@@ -46,7 +46,8 @@ class BarsGrouper(resamplebase.Grouper):
         bar_dict = {}
         for instrument, grouper in self.__barGroupers.items():
             bar_dict[instrument] = grouper.getGrouped()
-        return bar.Bars(bar_dict)
+        # All groupers share the group datetime.
+        return bar.Bars.fromTrustedBars(bar_dict, self.getDateTime())
 
 
 class ResampledBarFeed(barfeed.BaseBarFeed):
@@ -57,30 +58,24 @@ class ResampledBarFeed(barfeed.BaseBarFeed):
         if not isinstance(barFeed, barfeed.BaseBarFeed):
             raise Exception("barFeed must be a barfeed.BaseBarFeed instance")
 
-        if not resamplebase.is_valid_frequency(frequency):
-            raise Exception("Unsupported frequency")
-
         # Register the same instruments as in the underlying barfeed.
         for instrument in barFeed.getRegisteredInstruments():
             self.registerInstrument(instrument)
 
         self.__values = []
         self.__barFeed = barFeed
-        self.__grouper = None
-        self.__range = None
+        self.__resampler = resamplebase.Resampler(frequency, self.__buildGrouper, self.__onGrouped)
 
         barFeed.getNewValuesEvent().subscribe(self.__onNewValues)
 
+    def __buildGrouper(self, groupDateTime, value):
+        return BarsGrouper(groupDateTime, value, self.getFrequency())
+
+    def __onGrouped(self, dateTime, value):
+        self.__values.append(value)
+
     def __onNewValues(self, dateTime, value):
-        if self.__range is None:
-            self.__range = resamplebase.build_range(dateTime, self.getFrequency())
-            self.__grouper = BarsGrouper(self.__range.getBeginning(), value, self.getFrequency())
-        elif self.__range.belongs(dateTime):
-            self.__grouper.addValue(value)
-        else:
-            self.__values.append(self.__grouper.getGrouped())
-            self.__range = resamplebase.build_range(dateTime, self.getFrequency())
-            self.__grouper = BarsGrouper(self.__range.getBeginning(), value, self.getFrequency())
+        self.__resampler.addValue(dateTime, value)
 
     def getCurrentDateTime(self):
         return self.__barFeed.getCurrentDateTime()
@@ -112,7 +107,4 @@ class ResampledBarFeed(barfeed.BaseBarFeed):
         pass
 
     def checkNow(self, dateTime):
-        if self.__range is not None and not self.__range.belongs(dateTime):
-            self.__values.append(self.__grouper.getGrouped())
-            self.__grouper = None
-            self.__range = None
+        self.__resampler.checkNow(dateTime)
@@ -18,15 +18,35 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+from pyalgotrade import barfeed
 from pyalgotrade.barfeed import dbfeed
 from pyalgotrade.barfeed import membf
 from pyalgotrade import bar
 from pyalgotrade.utils import dt
 
+import contextlib
 import sqlite3
 import os
 
 
+# Number of rows to buffer before writing them when adding bars from a feed.
+BULK_INSERT_BATCH_SIZE = 10000
+# Number of rows to fetch at once when streaming bars.
+FETCH_BATCH_SIZE = 5000
+
+if sqlite3.sqlite_version_info >= (3, 24, 0):
+    UPSERT_BAR_SQL = "insert into bar (instrument_id, frequency, timestamp, open, high, low, close, volume, adj_close)" \
+        " values (?, ?, ?, ?, ?, ?, ?, ?, ?)" \
+        " on conflict (instrument_id, frequency, timestamp) do update set open = excluded.open" \
+        ", high = excluded.high, low = excluded.low, close = excluded.close, volume = excluded.volume" \
+        ", adj_close = excluded.adj_close"
+else:
+    # Every column gets set, so replacing the row has the same effect.
+    UPSERT_BAR_SQL = "insert or replace into bar" \
+        " (instrument_id, frequency, timestamp, open, high, low, close, volume, adj_close)" \
+        " values (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
 def normalize_instrument(instrument):
     return instrument.upper()
 
@@ -43,9 +63,37 @@ class Database(dbfeed.Database):
             initialize = True
         self.__connection = sqlite3.connect(dbFilePath)
         self.__connection.isolation_level = None  # To do auto-commit
+        self.__walEnabled = False
         if initialize:
             self.createSchema()
 
+    def __enableWAL(self):
+        # Write-ahead logging is enabled when writing, since it is persisted in the database file.
+        # With WAL, synchronous = normal is still safe and requires less fsyncs per transaction.
+        if not self.__walEnabled:
+            self.__connection.execute("pragma journal_mode = wal")
+            self.__connection.execute("pragma synchronous = normal")
+            self.__walEnabled = True
+
+    @contextlib.contextmanager
+    def __transaction(self):
+        self.__enableWAL()
+        self.__connection.execute("begin")
+        try:
+            yield
+        except Exception:
+            self.__connection.execute("rollback")
+            # Instruments added during the transaction are gone.
+            self.__instrumentIds = {}
+            raise
+        self.__connection.execute("commit")
+
+    def __getRow(self, instrumentId, bar, frequency):
+        return (
+            instrumentId, frequency, dt.datetime_to_timestamp(bar.getDateTime()), bar.getOpen(), bar.getHigh(),
+            bar.getLow(), bar.getClose(), bar.getVolume(), bar.getAdjClose()
+        )
+
     def __findInstrumentId(self, instrument):
         cursor = self.__connection.cursor()
         sql = "select instrument_id from instrument where name = ?"
@@ -92,21 +140,66 @@ class Database(dbfeed.Database):
             ", volume real not null"
             ", adj_close real"
             ", primary key (instrument_id, frequency, timestamp))")
+        self.createIndexes()
+
+    def createIndexes(self):
+        """Creates the indexes used to stream bars for multiple instruments ordered by time.
+        This is done when creating new databases, and it should be called once for databases created with older
+        versions.
+
+        .. note::
+            The index covers all the columns so bars can be read without looking up the table, at the expense of
+            extra storage.
+        """
+        self.__connection.execute(
+            "create index if not exists bar_by_time on bar ("
+            "frequency, timestamp, instrument_id, open, high, low, close, volume, adj_close)")
 
     def addBar(self, instrument, bar, frequency):
-        instrument = normalize_instrument(instrument)
-        instrumentId = self.__getOrCreateInstrument(instrument)
-        timeStamp = dt.datetime_to_timestamp(bar.getDateTime())
+        instrumentId = self.__getOrCreateInstrument(normalize_instrument(instrument))
+        self.__enableWAL()
+        self.__connection.execute(UPSERT_BAR_SQL, self.__getRow(instrumentId, bar, frequency))
 
-        try:
-            sql = "insert into bar (instrument_id, frequency, timestamp, open, high, low, close, volume, adj_close) values (?, ?, ?, ?, ?, ?, ?, ?, ?)"
-            params = [instrumentId, frequency, timeStamp, bar.getOpen(), bar.getHigh(), bar.getLow(), bar.getClose(), bar.getVolume(), bar.getAdjClose()]
-            self.__connection.execute(sql, params)
-        except sqlite3.IntegrityError:
-            sql = "update bar set open = ?, high = ?, low = ?, close = ?, volume = ?, adj_close = ?" \
-                " where instrument_id = ? and frequency = ? and timestamp = ?"
-            params = [bar.getOpen(), bar.getHigh(), bar.getLow(), bar.getClose(), bar.getVolume(), bar.getAdjClose(), instrumentId, frequency, timeStamp]
-            self.__connection.execute(sql, params)
+    def addBars(self, bars, frequency):
+        with self.__transaction():
+            rows = []
+            for instrument, bar_ in bars.items():
+                instrumentId = self.__getOrCreateInstrument(normalize_instrument(instrument))
+                rows.append(self.__getRow(instrumentId, bar_, frequency))
+            self.__connection.executemany(UPSERT_BAR_SQL, rows)
+
+    def addBarsFromSequence(self, instrument, bars, frequency):
+        """Adds or updates bars for an instrument using a single transaction.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param bars: The bars to add.
+        :type bars: A sequence of :class:`pyalgotrade.bar.Bar`.
+        :param frequency: The bars frequency. Check :class:`pyalgotrade.bar.Frequency`.
+        """
+        with self.__transaction():
+            instrumentId = self.__getOrCreateInstrument(normalize_instrument(instrument))
+            self.__connection.executemany(
+                UPSERT_BAR_SQL, (self.__getRow(instrumentId, bar_, frequency) for bar_ in bars)
+            )
+
+    def addBarsFromFeed(self, feed):
+        """Adds or updates all the bars in a feed using a single transaction.
+
+        :param feed: The feed to load bars from, like a :class:`pyalgotrade.barfeed.csvfeed.BarFeed`.
+        :type feed: :class:`pyalgotrade.barfeed.BaseBarFeed`.
+        """
+        frequency = feed.getFrequency()
+        with self.__transaction():
+            rows = []
+            for dateTime, bars in feed:
+                for instrument, bar_ in bars.items():
+                    instrumentId = self.__getOrCreateInstrument(normalize_instrument(instrument))
+                    rows.append(self.__getRow(instrumentId, bar_, frequency))
+                if len(rows) >= BULK_INSERT_BATCH_SIZE:
+                    self.__connection.executemany(UPSERT_BAR_SQL, rows)
+                    rows = []
+            self.__connection.executemany(UPSERT_BAR_SQL, rows)
 
     def getBars(self, instrument, frequency, timezone=None, fromDateTime=None, toDateTime=None):
         instrument = normalize_instrument(instrument)
@@ -134,6 +227,55 @@ class Database(dbfeed.Database):
         cursor.close()
         return ret
 
+    def getBarRows(self, instruments, frequency, fromDateTime=None, toDateTime=None, batchSize=FETCH_BATCH_SIZE):
+        """Returns a generator of (timestamp, instrument, open, high, low, close, volume, adjClose) tuples for
+        multiple instruments, ordered by timestamp and instrument. Rows are fetched in batches using a single query.
+
+        :param instruments: Instrument identifiers. Instruments that are not in the database are ignored.
+        :type instruments: list.
+        :param frequency: The bars frequency. Check :class:`pyalgotrade.bar.Frequency`.
+        :param fromDateTime: If set, bars before this datetime are skipped.
+        :type fromDateTime: :class:`datetime.datetime`.
+        :param toDateTime: If set, bars after this datetime are skipped.
+        :type toDateTime: :class:`datetime.datetime`.
+        :param batchSize: The number of rows to fetch from the database at a time.
+        :type batchSize: int.
+        """
+        instrumentNames = {}
+        for instrument in instruments:
+            instrument = normalize_instrument(instrument)
+            instrumentId = self.__findInstrumentId(instrument)
+            if instrumentId is not None:
+                instrumentNames[instrumentId] = instrument
+        if not instrumentNames:
+            return
+
+        # Instrument ids are integers taken from the database, so it is safe to put them in the query. This avoids
+        # hitting the limit in the number of parameters.
+        sql = "select timestamp, instrument_id, open, high, low, close, volume, adj_close from bar" \
+            " where frequency = ? and instrument_id in (%s)" % ", ".join(
+                str(int(instrumentId)) for instrumentId in instrumentNames
+            )
+        args = [frequency]
+        if fromDateTime is not None:
+            sql += " and timestamp >= ?"
+            args.append(dt.datetime_to_timestamp(fromDateTime))
+        if toDateTime is not None:
+            sql += " and timestamp <= ?"
+            args.append(dt.datetime_to_timestamp(toDateTime))
+        sql += " order by timestamp asc, instrument_id asc"
+
+        cursor = self.__connection.cursor()
+        try:
+            cursor.execute(sql, args)
+            rows = cursor.fetchmany(batchSize)
+            while rows:
+                for row in rows:
+                    yield (row[0], instrumentNames[row[1]]) + row[2:]
+                rows = cursor.fetchmany(batchSize)
+        finally:
+            cursor.close()
+
     def disconnect(self):
         self.__connection.close()
         self.__connection = None
@@ -154,3 +296,129 @@ class Feed(membf.BarFeed):
     def loadBars(self, instrument, timezone=None, fromDateTime=None, toDateTime=None):
         bars = self.__db.getBars(instrument, self.getFrequency(), timezone, fromDateTime, toDateTime)
         self.addBarsFromSequence(instrument, bars)
+
+
+class StreamingFeed(barfeed.BaseBarFeed):
+    """A :class:`pyalgotrade.barfeed.BaseBarFeed` that streams bars for multiple instruments from a SQLite database
+    while they are being dispatched, instead of loading them into memory upfront.
+
+    :param dbFilePath: The path to the SQLite database.
+    :type dbFilePath: string.
+    :param frequency: The bars frequency. Valid values defined in :class:`pyalgotrade.bar.Frequency`.
+    :param instruments: Instrument identifiers.
+    :type instruments: list.
+    :param timezone: The timezone to use to localize bars. Check :mod:`pyalgotrade.marketsession`.
+        If None, bars are in UTC.
+    :type timezone: A pytz timezone.
+    :param fromDateTime: If set, bars before this datetime are skipped.
+    :type fromDateTime: :class:`datetime.datetime`.
+    :param toDateTime: If set, bars after this datetime are skipped.
+    :type toDateTime: :class:`datetime.datetime`.
+    :param maxLen: The maximum number of values that the :class:`pyalgotrade.dataseries.bards.BarDataSeries` will hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from
+        the opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        Bars are read using a single query ordered by time. Check :meth:`Database.createIndexes` for databases created
+        with older versions.
+    """
+
+    def __init__(self, dbFilePath, frequency, instruments, timezone=None, fromDateTime=None, toDateTime=None,
+                 maxLen=None):
+        super(StreamingFeed, self).__init__(frequency, maxLen)
+
+        self.__db = Database(dbFilePath)
+        self.__timezone = timezone
+        self.__fromDateTime = fromDateTime
+        self.__toDateTime = toDateTime
+        # Bars are keyed using the instrument identifiers supplied, not the normalized ones.
+        self.__instruments = {}
+        for instrument in instruments:
+            normalizedInstrument = normalize_instrument(instrument)
+            if normalizedInstrument in self.__instruments:
+                raise Exception("%s and %s refer to the same instrument" % (
+                    self.__instruments[normalizedInstrument], instrument
+                ))
+            self.__instruments[normalizedInstrument] = instrument
+            self.registerInstrument(instrument)
+        self.__rows = None
+        self.__nextRow = None
+        self.__currDateTime = None
+        # Every instrument shares the same bar datetimes, so the last one is cached.
+        self.__lastTimestamp = None
+        self.__lastDateTime = None
+
+    def getDatabase(self):
+        return self.__db
+
+    def barsHaveAdjClose(self):
+        return True
+
+    def getCurrentDateTime(self):
+        return self.__currDateTime
+
+    def __fetchNextRow(self):
+        self.__nextRow = next(self.__rows, None)
+
+    def __getDateTime(self, timestamp):
+        if timestamp != self.__lastTimestamp:
+            dateTime = dt.timestamp_to_datetime(timestamp)
+            if self.__timezone:
+                dateTime = dt.localize(dateTime, self.__timezone)
+            self.__lastTimestamp = timestamp
+            self.__lastDateTime = dateTime
+        return self.__lastDateTime
+
+    def reset(self):
+        self.__closeRows()
+        self.__currDateTime = None
+        super(StreamingFeed, self).reset()
+
+    def __closeRows(self):
+        if self.__rows is not None:
+            self.__rows.close()
+            self.__rows = None
+            self.__nextRow = None
+
+    def start(self):
+        super(StreamingFeed, self).start()
+        if self.__rows is None:
+            self.__rows = self.__db.getBarRows(
+                list(self.__instruments.keys()), self.getFrequency(), self.__fromDateTime, self.__toDateTime
+            )
+            self.__fetchNextRow()
+
+    def stop(self):
+        self.__closeRows()
+
+    def join(self):
+        pass
+
+    def eof(self):
+        return self.__nextRow is None
+
+    def peekDateTime(self):
+        ret = None
+        if self.__nextRow is not None:
+            ret = self.__getDateTime(self.__nextRow[0])
+        return ret
+
+    def getNextBars(self):
+        if self.__nextRow is None:
+            return None
+
+        timestamp = self.__nextRow[0]
+        dateTime = self.__getDateTime(timestamp)
+        frequency = self.getFrequency()
+        bars = {}
+        while self.__nextRow is not None and self.__nextRow[0] == timestamp:
+            row = self.__nextRow
+            # These bars were validated before being stored.
+            bars[self.__instruments[row[1]]] = bar.BasicBar.fromTrustedValues(
+                dateTime, row[2], row[3], row[4], row[5], row[6], row[7], frequency
+            )
+            self.__fetchNextRow()
+        self.__currDateTime = dateTime
+        # Rows are unique per instrument and timestamp, and all of these bars share the same datetime.
+        return bar.Bars.fromTrustedBars(bars, dateTime)
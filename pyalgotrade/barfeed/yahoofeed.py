@@ -21,6 +21,7 @@
 from pyalgotrade.barfeed import csvfeed
 from pyalgotrade.barfeed import common
 from pyalgotrade.utils import dt
+from pyalgotrade.utils import dtparser
 from pyalgotrade import bar
 
 import datetime
@@ -37,13 +38,7 @@ import datetime
 
 def parse_date(date):
     # Sample: 2005-12-30
-    # This custom parsing works faster than:
-    # datetime.datetime.strptime(date, "%Y-%m-%d")
-    year = int(date[0:4])
-    month = int(date[5:7])
-    day = int(date[8:10])
-    ret = datetime.datetime(year, month, day)
-    return ret
+    return dtparser.parse(date, "%Y-%m-%d")
 
 
 class RowParser(csvfeed.RowParser):
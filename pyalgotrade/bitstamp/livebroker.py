@@ -26,6 +26,7 @@ from six.moves import queue
 from pyalgotrade import broker
 from pyalgotrade.bitstamp import httpclient
 from pyalgotrade.bitstamp import common
+from pyalgotrade.utils import wakeup
 
 
 def build_order_from_open_order(openOrder, instrumentTraits):
@@ -52,7 +53,7 @@ class TradeMonitor(threading.Thread):
         super(TradeMonitor, self).__init__()
         self.__lastTradeId = -1
         self.__httpClient = httpClient
-        self.__queue = queue.Queue()
+        self.__queue = wakeup.Queue()
         self.__stop = False
 
     def _getNewTrades(self):
@@ -129,6 +130,8 @@ class LiveBroker(broker.Broker):
         self.__cash = 0
         self.__shares = {}
         self.__activeOrders = {}
+        self.__wakeup = None
+        self.__queueNotifies = False
 
     def _registerOrder(self, order):
         assert(order.getId() not in self.__activeOrders)
@@ -225,28 +228,42 @@ class LiveBroker(broker.Broker):
         return self.__stop
 
     def dispatch(self):
+        ret = False
         # Switch orders from SUBMITTED to ACCEPTED.
         ordersToProcess = list(self.__activeOrders.values())
         for order in ordersToProcess:
             if order.isSubmitted():
+                ret = True
                 order.switchState(broker.Order.State.ACCEPTED)
                 self.notifyOrderEvent(broker.OrderEvent(order, broker.OrderEvent.Type.ACCEPTED, None))
 
         # Dispatch events from the trade monitor.
         try:
-            eventType, eventData = self.__tradeMonitor.getQueue().get(True, LiveBroker.QUEUE_TIMEOUT)
+            eventType, eventData = self.__tradeMonitor.getQueue().get(
+                not self.__queueNotifies, LiveBroker.QUEUE_TIMEOUT
+            )
 
             if eventType == TradeMonitor.ON_USER_TRADE:
+                ret = True
                 self._onUserTrades(eventData)
             else:
                 common.logger.error("Invalid event received to dispatch: %s - %s" % (eventType, eventData))
         except queue.Empty:
             pass
+        return ret
 
     def peekDateTime(self):
         # Return None since this is a realtime subject.
         return None
 
+    def onDispatcherRegistered(self, dispatcher):
+        super(LiveBroker, self).onDispatcherRegistered(dispatcher)
+        self.__wakeup = dispatcher.getWakeup()
+        self.__queueNotifies = wakeup.set_queue_wakeup(self.__tradeMonitor.getQueue(), self.__wakeup)
+
+    def supportsWakeup(self):
+        return self.__queueNotifies
+
     # END observer.Subject interface
 
     # BEGIN broker.Broker interface
@@ -283,6 +300,9 @@ class LiveBroker(broker.Broker):
             # IMPORTANT: Do not emit an event for this switch because when using the position interface
             # the order is not yet mapped to the position and Position.onOrderUpdated will get called.
             order.switchState(broker.Order.State.SUBMITTED)
+            # Wake up the dispatcher so the order gets accepted right away.
+            if self.__wakeup is not None:
+                self.__wakeup.notify()
         else:
             raise Exception("The order was already processed")
 
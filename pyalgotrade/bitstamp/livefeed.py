@@ -18,16 +18,25 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import collections
 import datetime
 import time
 
+import six
 from six.moves import queue
+from six.moves import xrange
 
 from pyalgotrade import bar
 from pyalgotrade import barfeed
 from pyalgotrade import observer
+from pyalgotrade import resamplebase
+from pyalgotrade.dataseries import resampled
 from pyalgotrade.bitstamp import common
+from pyalgotrade.bitstamp import orderbook
 from pyalgotrade.bitstamp import wsclient
+from pyalgotrade.utils import wakeup
+if six.PY3:
+    from pyalgotrade.websocket import asyncclient
 
 
 class TradeBar(bar.Bar):
@@ -102,28 +111,75 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded
         from the opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param useAsyncio: True to run the websocket client as a coroutine in the dispatcher's asyncio event loop,
+        instead of running it in a dedicated thread. Requires Python 3 and a
+        :class:`pyalgotrade.asyncdispatcher.Dispatcher`.
+    :type useAsyncio: boolean.
+    :param frequency: The frequency of the bars. If bar.Frequency.TRADE is used, a bar will be created for every trade.
+        Otherwise trades will be grouped into bars of that frequency, like
+        :class:`pyalgotrade.barfeed.resampled.ResampledBarFeed` does.
+    :param volumeBarSize: If not None, trades will be grouped into bars that hold at least this volume.
+        Can't be used along with a frequency other than bar.Frequency.TRADE.
+    :type volumeBarSize: float.
+    :param maxPendingBars: If not None, the maximum number of bars waiting to be dispatched. Queued events are processed
+        in batches, and if the strategy can't keep up with the bars being built, the pending bars are coalesced into a
+        single one.
+    :type maxPendingBars: int.
 
     .. note::
-        Note that a Bar will be created for every trade, so open, high, low and close values will all be the same.
+        * If bar.Frequency.TRADE is used and trades are not grouped, open, high, low and close values will all be the
+          same.
+        * Time bars are completed once a trade for the next bar is received, or once the time for the bar is over
+          while the feed is idle.
+        * A trade is never split across volume bars, so a bar may hold more than volumeBarSize.
     """
 
     QUEUE_TIMEOUT = 0.01
-
-    def __init__(self, maxLen=None):
-        super(LiveTradeFeed, self).__init__(bar.Frequency.TRADE, maxLen)
-        self.__barDicts = []
+    RECONNECT_DELAY = 5
+
+    def __init__(self, maxLen=None, useAsyncio=False, frequency=bar.Frequency.TRADE, volumeBarSize=None,
+                 maxPendingBars=None):
+        if useAsyncio and not six.PY3:
+            raise Exception("asyncio requires Python 3")
+        if volumeBarSize is not None and frequency != bar.Frequency.TRADE:
+            raise Exception("Volume bars require bar.Frequency.TRADE")
+        if volumeBarSize is not None and volumeBarSize <= 0:
+            raise Exception("volumeBarSize must be greater than 0")
+        if maxPendingBars is not None and maxPendingBars < 1:
+            raise Exception("maxPendingBars must be greater than 0")
+        super(LiveTradeFeed, self).__init__(frequency, maxLen)
+        self.__pendingBars = collections.deque()
+        self.__maxPendingBars = maxPendingBars
+        self.__resampler = None
+        if frequency != bar.Frequency.TRADE:
+            self.__resampler = resamplebase.Resampler(frequency, self.__buildGrouper, self.__onGrouped)
+        self.__volumeBarSize = volumeBarSize
+        self.__volumeGrouper = None
+        self.__volumeGrouperVolume = 0
         self.registerInstrument(common.btc_symbol)
         self.__prevTradeDateTime = None
         self.__thread = None
+        self.__queue = None
+        self.__useAsyncio = useAsyncio
+        self.__asyncClient = None
         self.__wsClientConnected = False
         self.__enableReconnection = True
         self.__stopped = False
         self.__orderBookUpdateEvent = observer.Event()
+        self.__orderBookChangeEvent = observer.Event()
+        self.__orderBook = orderbook.OrderBook()
+        self.__wakeup = None
+        # True if the queue notifies the dispatcher's wakeup, so there is no need to block while dispatching.
+        self.__queueNotifies = False
 
     # Factory method for testing purposes.
     def buildWebSocketClientThread(self):
         return wsclient.WebSocketClientThread()
 
+    # Factory method for testing purposes.
+    def buildAsyncWebSocketClient(self, queue):
+        return wsclient.AsyncWebSocketClient(queue)
+
     def getCurrentDateTime(self):
         return wsclient.get_current_datetime()
 
@@ -137,13 +193,15 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
         try:
             # Start the thread that runs the client.
             self.__thread = self.buildWebSocketClientThread()
+            self.__queue = self.__thread.getQueue()
+            self.__queueNotifies = wakeup.set_queue_wakeup(self.__queue, self.__wakeup)
             self.__thread.start()
         except Exception as e:
             common.logger.exception("Error connecting : %s" % str(e))
 
         # Wait for initialization to complete.
         while not self.__wsClientConnected and self.__thread.is_alive():
-            self.__dispatchImpl([wsclient.WebSocketClient.Event.CONNECTED])
+            self.__dispatchImpl([wsclient.WebSocketClient.Event.CONNECTED], True)
 
         if self.__wsClientConnected:
             common.logger.info("Initialization ok.")
@@ -157,7 +215,11 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
     def __onDisconnected(self):
         self.__wsClientConnected = False
 
-        if self.__enableReconnection:
+        if self.__useAsyncio:
+            # Reconnection is handled by the coroutine that runs the client.
+            if not self.__enableReconnection:
+                self.__stopped = True
+        elif self.__enableReconnection:
             initialized = False
             while not self.__stopped and not initialized:
                 common.logger.info("Reconnecting")
@@ -167,10 +229,14 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
         else:
             self.__stopped = True
 
-    def __dispatchImpl(self, eventFilter):
+        # No more trades are coming, so the last bar is complete.
+        if self.__stopped:
+            self.__pushLastBar()
+
+    def __dispatchImpl(self, eventFilter, block):
         ret = False
         try:
-            eventType, eventData = self.__thread.getQueue().get(True, LiveTradeFeed.QUEUE_TIMEOUT)
+            eventType, eventData = self.__queue.get(block, LiveTradeFeed.QUEUE_TIMEOUT)
             if eventFilter is not None and eventType not in eventFilter:
                 return False
 
@@ -178,7 +244,7 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
             if eventType == wsclient.WebSocketClient.Event.TRADE:
                 self.__onTrade(eventData)
             elif eventType == wsclient.WebSocketClient.Event.ORDER_BOOK_UPDATE:
-                self.__orderBookUpdateEvent.emit(eventData)
+                self.__onOrderBookUpdate(eventData)
             elif eventType == wsclient.WebSocketClient.Event.CONNECTED:
                 self.__onConnected()
             elif eventType == wsclient.WebSocketClient.Event.DISCONNECTED:
@@ -190,6 +256,12 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
             pass
         return ret
 
+    def __onOrderBookUpdate(self, orderBookUpdate):
+        change = self.__orderBook.update(orderBookUpdate)
+        self.__orderBookUpdateEvent.emit(orderBookUpdate)
+        if change is not None:
+            self.__orderBookChangeEvent.emit(change)
+
     # Bar datetimes should not duplicate. In case trade object datetimes conflict, we just move one slightly forward.
     def __getTradeDateTime(self, trade):
         ret = trade.getDateTime()
@@ -199,30 +271,97 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
         return ret
 
     def __onTrade(self, trade):
-        # Build a bar for each trade.
-        barDict = {
-            common.btc_symbol: TradeBar(self.__getTradeDateTime(trade), trade)
-            }
-        self.__barDicts.append(barDict)
+        tradeBar = TradeBar(self.__getTradeDateTime(trade), trade)
+        if self.__resampler is not None:
+            self.__resampler.addValue(tradeBar.getDateTime(), tradeBar)
+        elif self.__volumeBarSize is not None:
+            self.__addToVolumeBar(tradeBar)
+        else:
+            # Build a bar for each trade.
+            self.__pendingBars.append(tradeBar)
+
+    def __buildGrouper(self, groupDateTime, tradeBar):
+        return resampled.BarGrouper(groupDateTime, tradeBar, self.getFrequency())
+
+    def __onGrouped(self, dateTime, bar_):
+        self.__pendingBars.append(bar_)
+
+    def __addToVolumeBar(self, tradeBar):
+        # Volume bars are dated using the first trade, and trade datetimes don't duplicate.
+        if self.__volumeGrouper is None:
+            self.__volumeGrouper = self.__buildGrouper(tradeBar.getDateTime(), tradeBar)
+            self.__volumeGrouperVolume = tradeBar.getVolume()
+        else:
+            self.__volumeGrouper.addValue(tradeBar)
+            self.__volumeGrouperVolume += tradeBar.getVolume()
+
+        if self.__volumeGrouperVolume >= self.__volumeBarSize:
+            self.__pendingBars.append(self.__volumeGrouper.getGrouped())
+            self.__volumeGrouper = None
+
+    def __pushLastBar(self):
+        if self.__resampler is not None:
+            self.__resampler.pushLast()
+        elif self.__volumeGrouper is not None:
+            self.__pendingBars.append(self.__volumeGrouper.getGrouped())
+            self.__volumeGrouper = None
+
+    # Merges all the pending bars into one, using the datetime from the last one so bar datetimes remain in order.
+    def __coalescePendingBars(self):
+        lastBar = self.__pendingBars[-1]
+        grouper = self.__buildGrouper(lastBar.getDateTime(), self.__pendingBars.popleft())
+        while self.__pendingBars:
+            grouper.addValue(self.__pendingBars.popleft())
+        return grouper.getGrouped()
 
     def barsHaveAdjClose(self):
         return False
 
     def getNextBars(self):
         ret = None
-        if len(self.__barDicts):
-            ret = bar.Bars(self.__barDicts.pop(0))
+        if self.__maxPendingBars is not None and len(self.__pendingBars) > self.__maxPendingBars:
+            common.logger.warning("Coalescing %d pending bars." % (len(self.__pendingBars)))
+            bar_ = self.__coalescePendingBars()
+        elif self.__pendingBars:
+            bar_ = self.__pendingBars.popleft()
+        else:
+            bar_ = None
+
+        if bar_ is not None:
+            ret = bar.Bars.fromTrustedBars({common.btc_symbol: bar_}, bar_.getDateTime())
         return ret
 
+    def getPendingBarsCount(self):
+        """Returns the number of bars waiting to be dispatched."""
+        return len(self.__pendingBars)
+
     def peekDateTime(self):
         # Return None since this is a realtime subject.
         return None
 
+    def __buildAsyncClient(self):
+        common.logger.info("Initializing websocket client.")
+        self.__asyncClient = self.buildAsyncWebSocketClient(self.__queue)
+        return self.__asyncClient
+
+    def __shouldReconnect(self):
+        return self.__enableReconnection and not self.__stopped
+
+    def runsInEventLoop(self):
+        return self.__useAsyncio
+
+    def runAsync(self):
+        return asyncclient.run_client(self.__buildAsyncClient, self.__shouldReconnect, LiveTradeFeed.RECONNECT_DELAY)
+
     # This may raise.
     def start(self):
         super(LiveTradeFeed, self).start()
-        if self.__thread is not None:
+        if self.__thread is not None or self.__queue is not None:
             raise Exception("Already running")
+        elif self.__useAsyncio:
+            # The client will be connected once the dispatcher runs the coroutine.
+            self.__queue = wakeup.Queue()
+            self.__queueNotifies = wakeup.set_queue_wakeup(self.__queue, self.__wakeup)
         elif not self.__initializeClient():
             self.__stopped = True
             raise Exception("Initialization failed")
@@ -231,8 +370,16 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
         # Note that we may return True even if we didn't dispatch any Bar
         # event.
         ret = False
-        if self.__dispatchImpl(None):
+        if self.__dispatchImpl(None, not self.__queueNotifies):
             ret = True
+            if self.__maxPendingBars is not None:
+                # Process the events that are already queued, so pending bars can be coalesced if the strategy is
+                # falling behind.
+                for i in xrange(self.__queue.qsize()):
+                    self.__dispatchImpl(None, False)
+        elif self.__resampler is not None and not self.__stopped:
+            # Complete the current bar if its time is over.
+            self.__resampler.checkNow(self.getCurrentDateTime())
         if super(LiveTradeFeed, self).dispatch():
             ret = True
         return ret
@@ -241,7 +388,10 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
     def stop(self):
         try:
             self.__stopped = True
-            if self.__thread is not None and self.__thread.is_alive():
+            if self.__asyncClient is not None:
+                common.logger.info("Shutting down websocket client.")
+                self.__asyncClient.stopClient()
+            elif self.__thread is not None and self.__thread.is_alive():
                 common.logger.info("Shutting down websocket client.")
                 self.__thread.stop()
         except Exception as e:
@@ -253,7 +403,14 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
             self.__thread.join()
 
     def eof(self):
-        return self.__stopped
+        return self.__stopped and len(self.__pendingBars) == 0
+
+    def onDispatcherRegistered(self, dispatcher):
+        super(LiveTradeFeed, self).onDispatcherRegistered(dispatcher)
+        self.__wakeup = dispatcher.getWakeup()
+
+    def supportsWakeup(self):
+        return self.__queueNotifies
 
     def getOrderBookUpdateEvent(self):
         """
@@ -265,3 +422,23 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
         :rtype: :class:`pyalgotrade.observer.Event`.
         """
         return self.__orderBookUpdateEvent
+
+    def getOrderBookChangeEvent(self):
+        """
+        Returns the event that will be emitted when price levels in the order book change.
+        Updates that don't change any level won't emit this event.
+
+        Event handlers should receive one parameter:
+         1. A :class:`pyalgotrade.bitstamp.orderbook.OrderBookChange` instance.
+
+        :rtype: :class:`pyalgotrade.observer.Event`.
+        """
+        return self.__orderBookChangeEvent
+
+    def getOrderBook(self):
+        """
+        Returns the order book, that is kept up to date with every order book update.
+
+        :rtype: :class:`pyalgotrade.bitstamp.orderbook.OrderBook`.
+        """
+        return self.__orderBook
@@ -0,0 +1,271 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import bisect
+
+from six.moves import xrange
+
+
+class BookSide(object):
+    """One side of an :class:`OrderBook`, with price levels sorted from best to worst.
+
+    .. note::
+        This class should not be instantiated directly.
+    """
+
+    def __init__(self, isBid):
+        # Bids are sorted by descending price, so keys are negated prices. That way keys are always sorted in
+        # ascending order and the best level is always the first one.
+        self.__sign = -1 if isBid else 1
+        self.__keys = []
+        self.__volumes = {}
+        # Cumulative volumes from the best level, recalculated lazily after updates.
+        self.__cumVolumes = None
+
+    def __len__(self):
+        return len(self.__keys)
+
+    # Updates the levels using a full snapshot. Returns a list of (price, volume) tuples with the levels that changed.
+    # Removed levels have a volume of 0.
+    def update(self, prices, volumes):
+        changes = []
+        newVolumes = {}
+        for price, volume in zip(prices, volumes):
+            if volume > 0:
+                newVolumes[price] = volume
+
+        for price in list(self.__volumes.keys()):
+            if price not in newVolumes:
+                self.__remove(price)
+                changes.append((price, 0))
+
+        for price, volume in newVolumes.items():
+            prevVolume = self.__volumes.get(price)
+            if prevVolume != volume:
+                if prevVolume is None:
+                    bisect.insort(self.__keys, price * self.__sign)
+                self.__volumes[price] = volume
+                changes.append((price, volume))
+
+        if changes:
+            self.__cumVolumes = None
+        return changes
+
+    def __remove(self, price):
+        key = price * self.__sign
+        pos = bisect.bisect_left(self.__keys, key)
+        assert self.__keys[pos] == key
+        del self.__keys[pos]
+        del self.__volumes[price]
+
+    def __getCumVolumes(self):
+        if self.__cumVolumes is None:
+            self.__cumVolumes = []
+            total = 0
+            for key in self.__keys:
+                total += self.__volumes[key * self.__sign]
+                self.__cumVolumes.append(total)
+        return self.__cumVolumes
+
+    def getBestPrice(self):
+        """Returns the best price, or None if there are no levels."""
+        if self.__keys:
+            return self.__keys[0] * self.__sign
+        return None
+
+    def getBestVolume(self):
+        """Returns the volume at the best price, or 0 if there are no levels."""
+        if self.__keys:
+            return self.__volumes[self.__keys[0] * self.__sign]
+        return 0
+
+    def getVolume(self, price):
+        """Returns the volume at a given price, or 0 if there is no such level."""
+        return self.__volumes.get(price, 0)
+
+    def getTotalVolume(self):
+        """Returns the volume for all the levels."""
+        cumVolumes = self.__getCumVolumes()
+        if cumVolumes:
+            return cumVolumes[-1]
+        return 0
+
+    def getCumulativeVolume(self, price):
+        """Returns the volume for all the levels at the given price or better."""
+        pos = bisect.bisect_right(self.__keys, price * self.__sign)
+        if pos:
+            return self.__getCumVolumes()[pos - 1]
+        return 0
+
+    def getPriceForVolume(self, volume):
+        """Returns the worst price that has to be reached to fill a given volume, or None if there is not enough
+        volume."""
+        cumVolumes = self.__getCumVolumes()
+        pos = bisect.bisect_left(cumVolumes, volume)
+        if pos < len(cumVolumes):
+            return self.__keys[pos] * self.__sign
+        return None
+
+    def getLevels(self, depth=None):
+        """Returns a list of (price, volume) tuples sorted from best to worst.
+
+        :param depth: The maximum number of levels to return, or None to return all of them.
+        :type depth: int.
+        """
+        count = len(self.__keys) if depth is None else min(depth, len(self.__keys))
+        ret = []
+        for i in xrange(count):
+            price = self.__keys[i] * self.__sign
+            ret.append((price, self.__volumes[price]))
+        return ret
+
+
+class OrderBookChange(object):
+    """Describes the levels that changed in an :class:`OrderBook`.
+
+    .. note::
+        This class should not be instantiated directly.
+    """
+
+    def __init__(self, orderBook, dateTime, bidChanges, askChanges):
+        self.__orderBook = orderBook
+        self.__dateTime = dateTime
+        self.__bidChanges = bidChanges
+        self.__askChanges = askChanges
+
+    def getOrderBook(self):
+        """Returns the :class:`OrderBook` that changed."""
+        return self.__orderBook
+
+    def getDateTime(self):
+        """Returns the :class:`datetime.datetime` when the update was received."""
+        return self.__dateTime
+
+    def getBidChanges(self):
+        """Returns a list of (price, volume) tuples for the bid levels that changed. Removed levels have a volume
+        of 0."""
+        return self.__bidChanges
+
+    def getAskChanges(self):
+        """Returns a list of (price, volume) tuples for the ask levels that changed. Removed levels have a volume
+        of 0."""
+        return self.__askChanges
+
+    def topOfBookChanged(self):
+        """Returns True if the best bid or ask price or volume changed."""
+        return self.__orderBook.topOfBookChanged()
+
+
+class OrderBook(object):
+    """An order book that is kept up to date by applying the differences between consecutive snapshots.
+
+    .. note::
+        This class should not be instantiated directly.
+    """
+
+    def __init__(self):
+        self.__bids = BookSide(True)
+        self.__asks = BookSide(False)
+        self.__dateTime = None
+        self.__topOfBook = None
+        self.__topOfBookChanged = False
+        self.__midPrice = None
+        self.__spread = None
+        self.__imbalance = None
+
+    def update(self, orderBookUpdate):
+        """Applies a :class:`pyalgotrade.bitstamp.wsclient.OrderBookUpdate` snapshot.
+
+        :rtype: An :class:`OrderBookChange`, or None if no level changed.
+        """
+        self.__dateTime = orderBookUpdate.getDateTime()
+        bidChanges = self.__bids.update(orderBookUpdate.getBidPrices(), orderBookUpdate.getBidVolumes())
+        askChanges = self.__asks.update(orderBookUpdate.getAskPrices(), orderBookUpdate.getAskVolumes())
+        if not bidChanges and not askChanges:
+            self.__topOfBookChanged = False
+            return None
+
+        self.__updateTopOfBook()
+        return OrderBookChange(self, self.__dateTime, bidChanges, askChanges)
+
+    def __updateTopOfBook(self):
+        bid = self.__bids.getBestPrice()
+        ask = self.__asks.getBestPrice()
+        bidVolume = self.__bids.getBestVolume()
+        askVolume = self.__asks.getBestVolume()
+        topOfBook = (bid, bidVolume, ask, askVolume)
+        self.__topOfBookChanged = topOfBook != self.__topOfBook
+        if not self.__topOfBookChanged:
+            return
+
+        self.__topOfBook = topOfBook
+        if bid is not None and ask is not None:
+            self.__midPrice = (bid + ask) / 2.0
+            self.__spread = ask - bid
+        else:
+            self.__midPrice = None
+            self.__spread = None
+        if bidVolume + askVolume > 0:
+            self.__imbalance = (bidVolume - askVolume) / float(bidVolume + askVolume)
+        else:
+            self.__imbalance = None
+
+    def topOfBookChanged(self):
+        """Returns True if the best bid or ask price or volume changed with the last update."""
+        return self.__topOfBookChanged
+
+    def getDateTime(self):
+        """Returns the :class:`datetime.datetime` for the last update, or None if there were no updates."""
+        return self.__dateTime
+
+    def getBids(self):
+        """Returns the bid side of the book.
+
+        :rtype: :class:`BookSide`.
+        """
+        return self.__bids
+
+    def getAsks(self):
+        """Returns the ask side of the book.
+
+        :rtype: :class:`BookSide`.
+        """
+        return self.__asks
+
+    def getBestBid(self):
+        """Returns the best bid price, or None if there are no bids."""
+        return self.__bids.getBestPrice()
+
+    def getBestAsk(self):
+        """Returns the best ask price, or None if there are no asks."""
+        return self.__asks.getBestPrice()
+
+    def getMidPrice(self):
+        """Returns the price between the best bid and the best ask, or None if any of them is missing."""
+        return self.__midPrice
+
+    def getSpread(self):
+        """Returns the difference between the best ask and the best bid, or None if any of them is missing."""
+        return self.__spread
+
+    def getImbalance(self):
+        """Returns the volume imbalance at the top of the book, between -1 (only asks) and 1 (only bids), or None if
+        the book is empty."""
+        return self.__imbalance
@@ -20,11 +20,12 @@
 
 import datetime
 
-from six.moves import queue
+import six
 
 from pyalgotrade.websocket import pusher
 from pyalgotrade.websocket import client
 from pyalgotrade.bitstamp import common
+from pyalgotrade.utils import wakeup
 
 
 def get_current_datetime():
@@ -93,12 +94,8 @@ class OrderBookUpdate(pusher.Event):
         return [float(ask[1]) for ask in self.getData()["asks"]]
 
 
-class WebSocketClient(pusher.WebSocketClient):
-    """
-    This websocket client class is designed to be running in a separate thread and for that reason
-    events are pushed into a queue.
-    """
-
+# Bitstamp specific handling of Pusher events, shared by the websocket clients. Events are pushed into a queue.
+class BitstampProtocol(object):
     PUSHER_APP_KEY = "de504dc5763aeef9ff52"
 
     class Event:
@@ -107,8 +104,7 @@ class WebSocketClient(pusher.WebSocketClient):
         CONNECTED = 3
         DISCONNECTED = 4
 
-    def __init__(self, queue):
-        super(WebSocketClient, self).__init__(WebSocketClient.PUSHER_APP_KEY, 5)
+    def setQueue(self, queue):
         self.__queue = queue
 
     def onMessage(self, msg):
@@ -119,14 +115,14 @@ class WebSocketClient(pusher.WebSocketClient):
         elif event == "data" and msg.get("channel") == "order_book":
             self.onOrderBookUpdate(OrderBookUpdate(get_current_datetime(), msg))
         else:
-            super(WebSocketClient, self).onMessage(msg)
+            super(BitstampProtocol, self).onMessage(msg)
 
     ######################################################################
     # WebSocketClientBase events.
 
     def onClosed(self, code, reason):
         common.logger.info("Closed. Code: %s. Reason: %s." % (code, reason))
-        self.__queue.put((WebSocketClient.Event.DISCONNECTED, None))
+        self.__queue.put((BitstampProtocol.Event.DISCONNECTED, None))
 
     def onDisconnectionDetected(self):
         common.logger.warning("Disconnection detected.")
@@ -134,14 +130,14 @@ class WebSocketClient(pusher.WebSocketClient):
             self.stopClient()
         except Exception as e:
             common.logger.error("Error stopping websocket client: %s." % (str(e)))
-        self.__queue.put((WebSocketClient.Event.DISCONNECTED, None))
+        self.__queue.put((BitstampProtocol.Event.DISCONNECTED, None))
 
     ######################################################################
     # Pusher specific events.
 
     def onConnectionEstablished(self, event):
         common.logger.info("Connection established.")
-        self.__queue.put((WebSocketClient.Event.CONNECTED, None))
+        self.__queue.put((BitstampProtocol.Event.CONNECTED, None))
 
         channels = ["live_trades", "order_book"]
         common.logger.info("Subscribing to channels %s." % channels)
@@ -158,10 +154,33 @@ class WebSocketClient(pusher.WebSocketClient):
     # Bitstamp specific
 
     def onTrade(self, trade):
-        self.__queue.put((WebSocketClient.Event.TRADE, trade))
+        self.__queue.put((BitstampProtocol.Event.TRADE, trade))
 
     def onOrderBookUpdate(self, orderBookUpdate):
-        self.__queue.put((WebSocketClient.Event.ORDER_BOOK_UPDATE, orderBookUpdate))
+        self.__queue.put((BitstampProtocol.Event.ORDER_BOOK_UPDATE, orderBookUpdate))
+
+
+class WebSocketClient(BitstampProtocol, pusher.WebSocketClient):
+    """
+    This websocket client class is designed to be running in a separate thread and for that reason
+    events are pushed into a queue.
+    """
+
+    def __init__(self, queue):
+        super(WebSocketClient, self).__init__(BitstampProtocol.PUSHER_APP_KEY, 5)
+        self.setQueue(queue)
+
+
+if six.PY3:
+    class AsyncWebSocketClient(BitstampProtocol, pusher.AsyncWebSocketClient):
+        """
+        This websocket client class runs in an asyncio event loop. Events are pushed into a queue, but there is no
+        need to hand them over to a different thread.
+        """
+
+        def __init__(self, queue):
+            super(AsyncWebSocketClient, self).__init__(BitstampProtocol.PUSHER_APP_KEY, 5)
+            self.setQueue(queue)
 
 
 class WebSocketClientThread(client.WebSocketClientThreadBase):
@@ -171,7 +190,7 @@ class WebSocketClientThread(client.WebSocketClientThreadBase):
 
     def __init__(self):
         super(WebSocketClientThread, self).__init__()
-        self.__queue = queue.Queue()
+        self.__queue = wakeup.Queue()
         self.__wsClient = None
 
     def getQueue(self):
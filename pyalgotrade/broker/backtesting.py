@@ -19,6 +19,7 @@
 """
 
 import abc
+import bisect
 
 import six
 
@@ -165,6 +166,85 @@ class StopLimitOrder(broker.StopLimitOrder, BacktestingOrder):
         return broker_.getFillStrategy().fillStopLimitOrder(broker_, self, bar_)
 
 
+# Returns the price that needs to be penetrated for a resting order to be filled, and whether it gets penetrated by
+# going down to it, or None if the order has to be processed on every bar.
+def _get_resting_price(order):
+    if order.isSubmitted() or not order.getGoodTillCanceled():
+        return None
+
+    orderType = order.getType()
+    if orderType == broker.Order.Type.LIMIT or (orderType == broker.Order.Type.STOP_LIMIT and order.getStopHit()):
+        return (order.getLimitPrice(), order.isBuy())
+    elif orderType in (broker.Order.Type.STOP, broker.Order.Type.STOP_LIMIT) and not order.getStopHit():
+        return (order.getStopPrice(), not order.isBuy())
+    return None
+
+
+class _InstrumentOrders(object):
+    # Active orders for an instrument. Resting orders are also kept sorted by price so that the ones that can get filled
+    # with a given bar can be found using binary search.
+
+    def __init__(self):
+        self.__orders = {}
+        self.__pending = {}  # Orders that have to be processed on every bar.
+        self.__lowSide = []  # (price, order id) for resting orders triggered if the price goes down to them.
+        self.__highSide = []  # (price, order id) for resting orders triggered if the price goes up to them.
+        self.__restingKeys = {}
+
+    def __len__(self):
+        return len(self.__orders)
+
+    def get(self, orderId):
+        return self.__orders.get(orderId)
+
+    def getOrders(self):
+        return list(self.__orders.values())
+
+    def add(self, order):
+        self.__orders[order.getId()] = order
+        self.__pending[order.getId()] = order
+
+    def remove(self, order):
+        del self.__orders[order.getId()]
+        self.__removeFromIndex(order)
+
+    def update(self, order):
+        self.__removeFromIndex(order)
+        restingPrice = _get_resting_price(order)
+        if restingPrice is None:
+            self.__pending[order.getId()] = order
+        else:
+            price, lowSide = restingPrice
+            key = (price, order.getId())
+            side = self.__lowSide if lowSide else self.__highSide
+            bisect.insort(side, key)
+            self.__restingKeys[order.getId()] = (side, key)
+
+    def __removeFromIndex(self, order):
+        restingKey = self.__restingKeys.pop(order.getId(), None)
+        if restingKey is None:
+            del self.__pending[order.getId()]
+        else:
+            side, key = restingKey
+            pos = bisect.bisect_left(side, key)
+            assert side[pos] == key
+            del side[pos]
+
+    # Returns the orders that have to be processed given a (low, high) trigger range, or all of them if None.
+    def getOrdersToProcess(self, triggerRange):
+        if triggerRange is None or len(self.__restingKeys) == 0:
+            return list(self.__orders.values())
+
+        low, high = triggerRange
+        ret = list(self.__pending.values())
+        ret.extend(self.__orders[orderId] for _, orderId in self.__lowSide[bisect.bisect_left(self.__lowSide, (low,)):])
+        ret.extend(
+            self.__orders[orderId] for _, orderId in
+            self.__highSide[:bisect.bisect_right(self.__highSide, (high, float("inf")))]
+        )
+        return ret
+
+
 ######################################################################
 # Broker
 
@@ -192,6 +272,16 @@ class Broker(broker.Broker):
             self.__commission = commission
         self.__shares = {}
         self.__instrumentPrice = {}  # Used by setShares
+        # Mark-to-market state. Positions are revalued only when a bar for the instrument is available, and totals are
+        # recalculated from scratch, at most once per bar, to avoid accumulating rounding errors.
+        self.__positionValues = {}
+        self.__positionsValue = 0
+        self.__shortPositionsValue = 0
+        self.__totalsValid = True
+        self.__missingPrices = set()
+        self.__markedBars = None
+        self.__markedUseAdjustedValues = None
+        # Active orders indexed by instrument and then by order id.
         self.__activeOrders = {}
         self.__useAdjustedValues = False
         self.__fillStrategy = fillstrategy.DefaultStrategy()
@@ -215,15 +305,28 @@ class Broker(broker.Broker):
             ret = self.__barFeed.getLastBar(instrument)
         return ret
 
+    def __getActiveOrder(self, order):
+        instrumentOrders = self.__activeOrders.get(order.getInstrument())
+        if instrumentOrders is None:
+            return None
+        return instrumentOrders.get(order.getId())
+
     def _registerOrder(self, order):
-        assert(order.getId() not in self.__activeOrders)
+        assert(self.__getActiveOrder(order) is None)
         assert(order.getId() is not None)
-        self.__activeOrders[order.getId()] = order
+        instrumentOrders = self.__activeOrders.get(order.getInstrument())
+        if instrumentOrders is None:
+            instrumentOrders = _InstrumentOrders()
+            self.__activeOrders[order.getInstrument()] = instrumentOrders
+        instrumentOrders.add(order)
 
     def _unregisterOrder(self, order):
-        assert(order.getId() in self.__activeOrders)
+        assert(self.__getActiveOrder(order) is not None)
         assert(order.getId() is not None)
-        del self.__activeOrders[order.getId()]
+        instrumentOrders = self.__activeOrders[order.getInstrument()]
+        instrumentOrders.remove(order)
+        if len(instrumentOrders) == 0:
+            del self.__activeOrders[order.getInstrument()]
 
     def getLogger(self):
         return self.__logger
@@ -234,11 +337,9 @@ class Broker(broker.Broker):
     def getCash(self, includeShort=True):
         ret = self.__cash
         if not includeShort and self.__barFeed.getCurrentBars() is not None:
-            bars = self.__barFeed.getCurrentBars()
-            for instrument, shares in six.iteritems(self.__shares):
-                if shares < 0:
-                    instrumentPrice = self._getBar(bars, instrument).getPrice()
-                    ret += instrumentPrice * shares
+            self.__updatePositionValues()
+            self.__checkPrices()
+            ret += self.__shortPositionsValue
         return ret
 
     def setCash(self, cash):
@@ -279,9 +380,14 @@ class Broker(broker.Broker):
 
     def getActiveOrders(self, instrument=None):
         if instrument is None:
-            ret = list(self.__activeOrders.values())
+            ret = []
+            for instrumentOrders in six.itervalues(self.__activeOrders):
+                ret.extend(instrumentOrders.getOrders())
+            # Orders ids are assigned in submission order.
+            ret.sort(key=lambda order: order.getId())
         else:
-            ret = [order for order in self.__activeOrders.values() if order.getInstrument() == instrument]
+            instrumentOrders = self.__activeOrders.get(instrument)
+            ret = [] if instrumentOrders is None else instrumentOrders.getOrders()
         return ret
 
     def _getCurrentDateTime(self):
@@ -305,6 +411,7 @@ class Broker(broker.Broker):
         assert not self.__started, "Can't setShares once the strategy started executing"
         self.__shares[instrument] = quantity
         self.__instrumentPrice[instrument] = price
+        self.__revaluePosition(instrument, self._getPriceForInstrument(instrument))
 
     def getPositions(self):
         return self.__shares
@@ -325,15 +432,62 @@ class Broker(broker.Broker):
 
         return ret
 
+    def __revaluePosition(self, instrument, price):
+        self.__missingPrices.discard(instrument)
+        shares = self.__shares.get(instrument, 0)
+        if shares == 0:
+            self.__positionValues.pop(instrument, None)
+        elif price is None:
+            self.__positionValues.pop(instrument, None)
+            self.__missingPrices.add(instrument)
+        else:
+            self.__positionValues[instrument] = price * shares
+        self.__totalsValid = False
+
+    def __recalculateTotals(self):
+        self.__positionsValue = 0
+        self.__shortPositionsValue = 0
+        for instrument in self.__shares:
+            value = self.__positionValues.get(instrument, 0)
+            self.__positionsValue += value
+            if value < 0:
+                self.__shortPositionsValue += value
+        self.__totalsValid = True
+
+    def __checkPrices(self):
+        assert not self.__missingPrices, "Price for %s is missing" % list(self.__missingPrices)
+
+    # Revalues the positions for the instruments in the current bars, and recalculates the totals, unless that was
+    # already done.
+    def __updatePositionValues(self):
+        # Bar prices depend on the adjusted flag, so values have to be recalculated from scratch if it changes.
+        useAdjustedValues = self.__barFeed.getUseAdjustedValues()
+        if useAdjustedValues != self.__markedUseAdjustedValues:
+            self.__markedUseAdjustedValues = useAdjustedValues
+            for instrument in list(self.__shares.keys()):
+                self.__revaluePosition(instrument, self._getPriceForInstrument(instrument))
+
+        bars = self.__barFeed.getCurrentBars()
+        if bars is not self.__markedBars:
+            self.__markedBars = bars
+            if bars is not None:
+                barInstruments = bars.getInstruments()
+                if len(self.__shares) <= len(barInstruments):
+                    instruments = [instrument for instrument in self.__shares if instrument in bars]
+                else:
+                    instruments = [instrument for instrument in barInstruments if instrument in self.__shares]
+                for instrument in instruments:
+                    self.__revaluePosition(instrument, bars[instrument].getPrice())
+
+        if not self.__totalsValid:
+            self.__recalculateTotals()
+
     def getEquity(self):
         """Returns the portfolio value (cash + shares * price)."""
 
-        ret = self.getCash()
-        for instrument, shares in six.iteritems(self.__shares):
-            instrumentPrice = self._getPriceForInstrument(instrument)
-            assert instrumentPrice is not None, "Price for %s is missing" % instrument
-            ret += instrumentPrice * shares
-        return ret
+        self.__updatePositionValues()
+        self.__checkPrices()
+        return self.getCash() + self.__positionsValue
 
     # Tries to commit an order execution.
     def commitOrderExecution(self, order, dateTime, fillInfo):
@@ -372,6 +526,7 @@ class Broker(broker.Broker):
                 del self.__shares[order.getInstrument()]
             else:
                 self.__shares[order.getInstrument()] = updatedShares
+            self.__revaluePosition(order.getInstrument(), self._getPriceForInstrument(order.getInstrument()))
 
             # Let the strategy know that the order was filled.
             self.__fillStrategy.onOrderFilled(self, order)
@@ -460,19 +615,36 @@ class Broker(broker.Broker):
             if order.isActive():
                 # This may trigger orders to be added/removed from __activeOrders.
                 self.__processOrder(order, bar_)
+                # Check if the order is resting now, or if it has to be processed on every bar.
+                if order.isActive():
+                    self.__activeOrders[order.getInstrument()].update(order)
             else:
                 # If an order is not active it should be because it was canceled in this same loop and it should
                 # have been removed.
                 assert(order.isCanceled())
-                assert(order not in self.__activeOrders)
+                assert(self.__getActiveOrder(order) is None)
 
     def onBars(self, dateTime, bars):
+        self.__updatePositionValues()
+
         # Let the fill strategy know that new bars are being processed.
         self.__fillStrategy.onBars(self, bars)
 
         # This is to froze the orders that will be processed in this event, to avoid new getting orders introduced
         # and processed on this very same event.
-        ordersToProcess = list(self.__activeOrders.values())
+        # Only orders for instruments that have a bar need to be processed. Look them up from the smaller side.
+        barInstruments = bars.getInstruments()
+        if len(self.__activeOrders) <= len(barInstruments):
+            instruments = [instrument for instrument in self.__activeOrders if instrument in bars]
+        else:
+            instruments = [instrument for instrument in barInstruments if instrument in self.__activeOrders]
+        # Resting orders that can't get filled with the current bar are skipped.
+        ordersToProcess = []
+        for instrument in instruments:
+            triggerRange = self.__fillStrategy.getTriggerRange(self, bars[instrument])
+            ordersToProcess.extend(self.__activeOrders[instrument].getOrdersToProcess(triggerRange))
+        # Process orders in submission order, just like if they were not indexed by instrument.
+        ordersToProcess.sort(key=lambda order: order.getId())
 
         for order in ordersToProcess:
             # This may trigger orders to be added/removed from __activeOrders.
@@ -497,6 +669,10 @@ class Broker(broker.Broker):
         # All events were already emitted while handling barfeed events.
         pass
 
+    def supportsWakeup(self):
+        # There is no need to poll since events are emitted while handling barfeed events.
+        return True
+
     def peekDateTime(self):
         return None
 
@@ -520,7 +696,7 @@ class Broker(broker.Broker):
         return StopLimitOrder(action, instrument, stopPrice, limitPrice, quantity, self.getInstrumentTraits(instrument))
 
     def cancelOrder(self, order):
-        activeOrder = self.__activeOrders.get(order.getId())
+        activeOrder = self.__getActiveOrder(order)
         if activeOrder is None:
             raise Exception("The order is not active anymore")
         if activeOrder.isFilled():
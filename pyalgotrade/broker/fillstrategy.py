@@ -130,6 +130,29 @@ class FillStrategy(object):
         """
         pass
 
+    def getTriggerRange(self, broker_, bar):
+        """
+        Override (optional) to let the broker skip resting limit and stop orders that can't be filled at the given
+        time. Resting orders are accepted, good till canceled, limit, stop and stop limit orders.
+
+        :param broker_: The broker.
+        :type broker_: :class:`Broker`
+        :param bar: The current bar.
+        :type bar: :class:`pyalgotrade.bar.Bar`
+        :rtype: A (low, high) tuple, or None if every order should be processed.
+
+        .. note::
+            * If a range is returned, the following orders won't be processed, and the fill methods won't be called
+              for them:
+
+              * Buy limit orders, and sell stop orders, with a price lower than low.
+              * Sell limit orders, and buy stop orders, with a price higher than high.
+              * Stop limit orders whose stop price was not hit yet are treated like stop orders, and the ones whose
+                stop price was already hit are treated like limit orders.
+            * The default implementation returns None.
+        """
+        return None
+
     @abc.abstractmethod
     def fillMarketOrder(self, broker_, order, bar):
         """Override to return the fill price and quantity for a market order or None if the order can't be filled
@@ -239,8 +262,8 @@ class DefaultStrategy(FillStrategy):
     def onBars(self, broker_, bars):
         volumeLeft = {}
 
-        for instrument in bars.getInstruments():
-            bar = bars[instrument]
+        # Bars.items() returns a cached tuple, so there is no need to look up each bar by instrument.
+        for instrument, bar in bars.items():
             # Reset the volume available for each instrument.
             if bar.getFrequency() == pyalgotrade.bar.Frequency.TRADE:
                 volumeLeft[instrument] = bar.getVolume()
@@ -252,6 +275,11 @@ class DefaultStrategy(FillStrategy):
 
         self.__volumeLeft = volumeLeft
 
+    def getTriggerRange(self, broker_, bar):
+        # Limit and stop prices outside the bar's range don't trigger, and those orders are left untouched.
+        useAdjustedValues = broker_.getUseAdjustedValues()
+        return (bar.getLow(useAdjustedValues), bar.getHigh(useAdjustedValues))
+
     def getVolumeLeft(self):
         return self.__volumeLeft
 
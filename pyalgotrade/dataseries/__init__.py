@@ -27,6 +27,9 @@ from pyalgotrade import observer
 from pyalgotrade.utils import collections
 
 DEFAULT_MAX_LEN = 1024
+# The minimum number of values to hold for dataseries that are sized automatically. This is enough for the default
+# period used by cross.cross_above and cross.cross_below.
+DEFAULT_AUTO_MIN_LEN = 2
 
 
 def get_checked_max_len(maxLen):
@@ -37,6 +40,14 @@ def get_checked_max_len(maxLen):
     return maxLen
 
 
+# Dataseries derived from a dataseries that is sized automatically are sized automatically as well, unless a maximum
+# length was explicitly set.
+def inherit_auto_max_len(dataSeries, source, maxLen):
+    autoMinLen = source.getAutoMaxLen()
+    if maxLen is None and autoMinLen is not None:
+        dataSeries.setAutoMaxLen(autoMinLen)
+
+
 # It is important to inherit object to get __getitem__ to work properly.
 # Check http://code.activestate.com/lists/python-list/621258/
 @six.add_metaclass(abc.ABCMeta)
@@ -76,6 +87,19 @@ class DataSeries(object):
         """Returns a list of :class:`datetime.datetime` associated with each value."""
         raise NotImplementedError()
 
+    def requireLen(self, length):
+        """Declares that the last length values will be accessed, for example by an indicator.
+        Dataseries that are sized automatically will hold at least that many values.
+
+        :param length: The number of values required.
+        :type length: int.
+        """
+        pass
+
+    def getAutoMaxLen(self):
+        """Returns the minimum number of values to hold if the dataseries is sized automatically, or None."""
+        return None
+
 
 class SequenceDataSeries(DataSeries):
     """A DataSeries that holds values in a sequence in memory.
@@ -93,6 +117,8 @@ class SequenceDataSeries(DataSeries):
         self.__newValueEvent = observer.Event()
         self.__values = collections.ListDeque(maxLen)
         self.__dateTimes = collections.ListDeque(maxLen)
+        self.__requiredLen = 0
+        self.__autoMinLen = None
 
     def __len__(self):
         return len(self.__values)
@@ -109,6 +135,34 @@ class SequenceDataSeries(DataSeries):
         """Returns the maximum number of values to hold."""
         return self.__values.getMaxLen()
 
+    def setAutoMaxLen(self, minLen=DEFAULT_AUTO_MIN_LEN):
+        """Sizes the dataseries automatically. It will hold minLen values, or the number of values required using
+        :meth:`requireLen`, whichever is bigger.
+
+        :param minLen: The minimum number of values to hold. Use a bigger value if you access values further back.
+        :type minLen: int.
+
+        .. note::
+            Values that were already discarded can't be recovered, so this should be used before values are added.
+        """
+        if not minLen > 0:
+            raise Exception("Invalid minimum length")
+        self.__autoMinLen = minLen
+        self.setMaxLen(max(minLen, self.__requiredLen))
+
+    def getAutoMaxLen(self):
+        return self.__autoMinLen
+
+    def requireLen(self, length):
+        if length > self.__requiredLen:
+            self.__requiredLen = length
+            if self.__autoMinLen is not None and length > self.getMaxLen():
+                self.setMaxLen(length)
+
+    def getRequiredLen(self):
+        """Returns the biggest number of values required using :meth:`requireLen`."""
+        return self.__requiredLen
+
     # Event handler receives:
     # 1: Dataseries generating the event
     # 2: The datetime for the new value
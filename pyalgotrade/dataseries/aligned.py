@@ -18,7 +18,14 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import heapq
+
 from pyalgotrade import dataseries
+from pyalgotrade import observer
+
+
+# Placeholder for values not yet available, since None is a valid value.
+_MISSING = object()
 
 
 def datetime_aligned(ds1, ds2, maxLen=None):
@@ -34,62 +41,106 @@ def datetime_aligned(ds1, ds2, maxLen=None):
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
     """
-    aligned1 = dataseries.SequenceDataSeries(maxLen)
-    aligned2 = dataseries.SequenceDataSeries(maxLen)
-    Syncer(ds1, ds2, aligned1, aligned2)
-    return (aligned1, aligned2)
+    return tuple(datetime_aligned_n([ds1, ds2], maxLen))
 
 
-# This class is responsible for filling 2 dataseries when 2 other dataseries get new values.
-class Syncer(object):
-    def __init__(self, sourceDS1, sourceDS2, destDS1, destDS2):
-        self.__values1 = []  # (datetime, value)
-        self.__values2 = []  # (datetime, value)
-        self.__destDS1 = destDS1
-        self.__destDS2 = destDS2
-        sourceDS1.getNewValueEvent().subscribe(self.__onNewValue1)
-        sourceDS2.getNewValueEvent().subscribe(self.__onNewValue2)
+def datetime_aligned_n(dataSeries, maxLen=None, maxPending=None):
+    """
+    Returns a list of dataseries that exhibit only those values whose datetimes are in all the dataseries.
+
+    :param dataSeries: A list of DataSeries instances.
+    :type dataSeries: list.
+    :param maxLen: The maximum number of values to hold for the returned :class:`DataSeries`.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    :param maxPending: The maximum number of datetimes to buffer while waiting for values from all the dataseries.
+        Once full, the oldest ones are discarded. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxPending: int.
+    """
+    ret = [dataseries.SequenceDataSeries(maxLen) for ds in dataSeries]
+    for source, ds in zip(dataSeries, ret):
+        dataseries.inherit_auto_max_len(ds, source, maxLen)
+    MultiSyncer(dataSeries, ret, maxPending)
+    return ret
+
+
+# This class is responsible for filling N dataseries when N other dataseries get new values for the same datetime.
+class MultiSyncer(object):
+    def __init__(self, sourceDSs, destDSs, maxPending=None):
+        assert len(sourceDSs) == len(destDSs), "The number of source and destination dataseries must match"
+        assert len(sourceDSs) > 1, "At least two dataseries are required"
+
+        self.__destDSs = destDSs
+        self.__maxPending = dataseries.get_checked_max_len(maxPending)
+        # Since source dataseries may not hold all the values we need, we need to buffer manually.
+        # Maps datetimes to [values, number of values missing].
+        self.__slots = {}
+        # Buffered datetimes, used to evict those slots that will never get completed.
+        self.__pendingDateTimes = []
+        self.__lastDateTimes = [None] * len(sourceDSs)
+        self.__newRowEvent = observer.Event()
+        for pos, sourceDS in enumerate(sourceDSs):
+            self.__subscribe(sourceDS, pos)
         # Source dataseries will keep a reference to self and that will prevent from getting this destroyed.
 
-    # Scan backwards for the position of dateTime in ds.
-    def __findPosForDateTime(self, values, dateTime):
-        ret = None
-        i = len(values) - 1
-        while i >= 0:
-            if values[i][0] == dateTime:
-                ret = i
-                break
-            elif values[i][0] < dateTime:
-                break
-            i -= 1
-        return ret
-
-    def __onNewValue1(self, dataSeries, dateTime, value):
-        pos2 = self.__findPosForDateTime(self.__values2, dateTime)
-        # If a value for dateTime was added to first dataseries, and a value for that same datetime is also in the second one
-        # then append to both destination dataseries.
-        if pos2 is not None:
-            self.__append(dateTime, value, self.__values2[pos2][1])
-            # Reset buffers.
-            self.__values1 = []
-            self.__values2 = self.__values2[pos2+1:]
-        else:
-            # Since source dataseries may not hold all the values we need, we need to buffer manually.
-            self.__values1.append((dateTime, value))
-
-    def __onNewValue2(self, dataSeries, dateTime, value):
-        pos1 = self.__findPosForDateTime(self.__values1, dateTime)
-        # If a value for dateTime was added to second dataseries, and a value for that same datetime is also in the first one
-        # then append to both destination dataseries.
-        if pos1 is not None:
-            self.__append(dateTime, self.__values1[pos1][1], value)
-            # Reset buffers.
-            self.__values1 = self.__values1[pos1+1:]
-            self.__values2 = []
+    def __subscribe(self, sourceDS, pos):
+        sourceDS.getNewValueEvent().subscribe(lambda dataSeries, dateTime, value: self.__onNewValue(pos, dateTime, value))
+
+    # Event handler receives:
+    # 1: The datetime for the aligned values
+    # 2: A list with the values, in the same order as the source dataseries
+    def getNewRowEvent(self):
+        return self.__newRowEvent
+
+    # Returns the number of datetimes buffered while waiting for values from all the dataseries.
+    def getPendingCount(self):
+        return len(self.__slots)
+
+    def __isStale(self, dateTime):
+        # A slot will never get completed if a dataseries that didn't supply a value is already past its datetime.
+        values = self.__slots[dateTime][0]
+        for pos, lastDateTime in enumerate(self.__lastDateTimes):
+            if values[pos] is _MISSING and lastDateTime is not None and lastDateTime >= dateTime:
+                return True
+        return False
+
+    def __evict(self, dateTime):
+        # Discard the oldest slots up to, and including, dateTime.
+        while self.__pendingDateTimes and self.__pendingDateTimes[0] <= dateTime:
+            del self.__slots[heapq.heappop(self.__pendingDateTimes)]
+
+    def __onNewValue(self, pos, dateTime, value):
+        self.__lastDateTimes[pos] = dateTime
+
+        slot = self.__slots.get(dateTime)
+        if slot is None:
+            values = [_MISSING] * len(self.__destDSs)
+            slot = [values, len(values)]
+            self.__slots[dateTime] = slot
+            heapq.heappush(self.__pendingDateTimes, dateTime)
+        values = slot[0]
+        if values[pos] is _MISSING:
+            slot[1] -= 1
+        values[pos] = value
+
+        if slot[1] == 0:
+            # All dataseries reached dateTime so older slots will never get completed.
+            self.__evict(dateTime)
+            self.__append(dateTime, values)
         else:
-            # Since source dataseries may not hold all the values we need, we need to buffer manually.
-            self.__values2.append((dateTime, value))
+            while self.__pendingDateTimes and self.__isStale(self.__pendingDateTimes[0]):
+                self.__evict(self.__pendingDateTimes[0])
+            if len(self.__pendingDateTimes) > self.__maxPending:
+                self.__evict(self.__pendingDateTimes[0])
 
-    def __append(self, dateTime, value1, value2):
-        self.__destDS1.appendWithDateTime(dateTime, value1)
-        self.__destDS2.appendWithDateTime(dateTime, value2)
+    def __append(self, dateTime, values):
+        for destDS, value in zip(self.__destDSs, values):
+            destDS.appendWithDateTime(dateTime, value)
+        self.__newRowEvent.emit(dateTime, values)
+
+
+# This class is responsible for filling 2 dataseries when 2 other dataseries get new values.
+class Syncer(MultiSyncer):
+    def __init__(self, sourceDS1, sourceDS2, destDS1, destDS2, maxPending=None):
+        super(Syncer, self).__init__([sourceDS1, sourceDS2], [destDS1, destDS2], maxPending)
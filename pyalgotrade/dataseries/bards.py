@@ -23,6 +23,13 @@ from pyalgotrade import dataseries
 import six
 
 
+# Returns an adjusted value, or None if the bar has no adjusted close.
+def get_adjusted(bar, getter):
+    if bar.getAdjClose() is None:
+        return None
+    return getter(True)
+
+
 class BarDataSeries(dataseries.SequenceDataSeries):
     """A DataSeries of :class:`pyalgotrade.bar.Bar` instances.
 
@@ -41,15 +48,31 @@ class BarDataSeries(dataseries.SequenceDataSeries):
         self.__volumeDS = dataseries.SequenceDataSeries(maxLen)
         self.__adjCloseDS = dataseries.SequenceDataSeries(maxLen)
         self.__extraDS = {}
+        # Adjusted open, high and low data series are built on demand.
+        self.__adjustedDS = {}
         self.__useAdjustedValues = False
 
     def __getOrCreateExtraDS(self, name):
         ret = self.__extraDS.get(name)
         if ret is None:
             ret = dataseries.SequenceDataSeries(self.getMaxLen())
+            dataseries.inherit_auto_max_len(ret, self, None)
             self.__extraDS[name] = ret
         return ret
 
+    def setAutoMaxLen(self, minLen=dataseries.DEFAULT_AUTO_MIN_LEN):
+        """Sizes this dataseries and the ones for each bar attribute automatically.
+        Check :meth:`pyalgotrade.dataseries.SequenceDataSeries.setAutoMaxLen`.
+        """
+        super(BarDataSeries, self).setAutoMaxLen(minLen)
+        childDS = [
+            self.__openDS, self.__closeDS, self.__highDS, self.__lowDS, self.__volumeDS, self.__adjCloseDS
+        ]
+        childDS.extend(six.itervalues(self.__extraDS))
+        childDS.extend(ds for getter, ds in six.itervalues(self.__adjustedDS))
+        for ds in childDS:
+            ds.setAutoMaxLen(minLen)
+
     def setUseAdjustedValues(self, useAdjusted):
         self.__useAdjustedValues = useAdjusted
 
@@ -69,12 +92,31 @@ class BarDataSeries(dataseries.SequenceDataSeries):
         self.__lowDS.appendWithDateTime(dateTime, bar.getLow())
         self.__volumeDS.appendWithDateTime(dateTime, bar.getVolume())
         self.__adjCloseDS.appendWithDateTime(dateTime, bar.getAdjClose())
+        if self.__adjustedDS:
+            self.__appendAdjusted(dateTime, bar)
 
         # Process extra columns.
         for name, value in six.iteritems(bar.getExtraColumns()):
             extraDS = self.__getOrCreateExtraDS(name)
             extraDS.appendWithDateTime(dateTime, value)
 
+    def __appendAdjusted(self, dateTime, bar):
+        for getter, ds in six.itervalues(self.__adjustedDS):
+            ds.appendWithDateTime(dateTime, getter(bar))
+
+    def __getOrCreateAdjustedDS(self, name, getter):
+        ret = self.__adjustedDS.get(name)
+        if ret is None:
+            ds = dataseries.SequenceDataSeries(self.getMaxLen())
+            dataseries.inherit_auto_max_len(ds, self, None)
+            # Backfill using the bars that we already have.
+            dateTimes = self.getDateTimes()
+            for i in range(len(dateTimes)):
+                ds.appendWithDateTime(dateTimes[i], getter(self[i]))
+            ret = (getter, ds)
+            self.__adjustedDS[name] = ret
+        return ret[1]
+
     def getOpenDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the open prices."""
         return self.__openDS
@@ -99,6 +141,18 @@ class BarDataSeries(dataseries.SequenceDataSeries):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the adjusted close prices."""
         return self.__adjCloseDS
 
+    def getAdjOpenDataSeries(self):
+        """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the adjusted open prices."""
+        return self.__getOrCreateAdjustedDS("open", lambda bar: get_adjusted(bar, bar.getOpen))
+
+    def getAdjHighDataSeries(self):
+        """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the adjusted high prices."""
+        return self.__getOrCreateAdjustedDS("high", lambda bar: get_adjusted(bar, bar.getHigh))
+
+    def getAdjLowDataSeries(self):
+        """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the adjusted low prices."""
+        return self.__getOrCreateAdjustedDS("low", lambda bar: get_adjusted(bar, bar.getLow))
+
     def getPriceDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the close or adjusted close prices."""
         if self.__useAdjustedValues:
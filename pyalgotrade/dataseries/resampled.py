@@ -58,7 +58,8 @@ class BarGrouper(resamplebase.Grouper):
 
     def getGrouped(self):
         """Return the grouped value."""
-        ret = bar.BasicBar(
+        # High and low are the max and min from valid bars, so the grouped bar is valid as well.
+        ret = bar.BasicBar.fromTrustedValues(
             self.getDateTime(),
             self.__open, self.__high, self.__low, self.__close, self.__volume, self.__adjClose,
             self.__frequency
@@ -71,41 +72,26 @@ class BarGrouper(resamplebase.Grouper):
 class DSResampler(object):
 
     def initDSResampler(self, dataSeries, frequency):
-        if not resamplebase.is_valid_frequency(frequency):
-            raise Exception("Unsupported frequency")
-
         self.__frequency = frequency
-        self.__grouper = None
-        self.__range = None
+        self.__resampler = resamplebase.Resampler(frequency, self.__buildGrouper, self.appendWithDateTime)
 
         dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
 
     @abc.abstractmethod
-    def buildGrouper(self, range_, value, frequency):
+    def buildGrouper(self, groupDateTime, value, frequency):
         raise NotImplementedError()
 
+    def __buildGrouper(self, groupDateTime, value):
+        return self.buildGrouper(groupDateTime, value, self.__frequency)
+
     def __onNewValue(self, dataSeries, dateTime, value):
-        if self.__range is None:
-            self.__range = resamplebase.build_range(dateTime, self.__frequency)
-            self.__grouper = self.buildGrouper(self.__range, value, self.__frequency)
-        elif self.__range.belongs(dateTime):
-            self.__grouper.addValue(value)
-        else:
-            self.appendWithDateTime(self.__grouper.getDateTime(), self.__grouper.getGrouped())
-            self.__range = resamplebase.build_range(dateTime, self.__frequency)
-            self.__grouper = self.buildGrouper(self.__range, value, self.__frequency)
+        self.__resampler.addValue(dateTime, value)
 
     def pushLast(self):
-        if self.__grouper is not None:
-            self.appendWithDateTime(self.__grouper.getDateTime(), self.__grouper.getGrouped())
-            self.__grouper = None
-            self.__range = None
+        self.__resampler.pushLast()
 
     def checkNow(self, dateTime):
-        if self.__range is not None and not self.__range.belongs(dateTime):
-            self.appendWithDateTime(self.__grouper.getDateTime(), self.__grouper.getGrouped())
-            self.__grouper = None
-            self.__range = None
+        self.__resampler.checkNow(dateTime)
 
 
 class ResampledBarDataSeries(bards.BarDataSeries, DSResampler):
@@ -132,6 +118,7 @@ class ResampledBarDataSeries(bards.BarDataSeries, DSResampler):
             raise Exception("dataSeries must be a dataseries.bards.BarDataSeries instance")
 
         super(ResampledBarDataSeries, self).__init__(maxLen)
+        dataseries.inherit_auto_max_len(self, dataSeries, maxLen)
         self.initDSResampler(dataSeries, frequency)
 
     def checkNow(self, dateTime):
@@ -144,15 +131,16 @@ class ResampledBarDataSeries(bards.BarDataSeries, DSResampler):
 
         return super(ResampledBarDataSeries, self).checkNow(dateTime)
 
-    def buildGrouper(self, range_, value, frequency):
-        return BarGrouper(range_.getBeginning(), value, frequency)
+    def buildGrouper(self, groupDateTime, value, frequency):
+        return BarGrouper(groupDateTime, value, frequency)
 
 
 class ResampledDataSeries(dataseries.SequenceDataSeries, DSResampler):
     def __init__(self, dataSeries, frequency, aggfun, maxLen=None):
         super(ResampledDataSeries, self).__init__(maxLen)
+        dataseries.inherit_auto_max_len(self, dataSeries, maxLen)
         self.initDSResampler(dataSeries, frequency)
         self.__aggfun = aggfun
 
-    def buildGrouper(self, range_, value, frequency):
-        return AggFunGrouper(range_.getBeginning(), value, self.__aggfun)
+    def buildGrouper(self, groupDateTime, value, frequency):
+        return AggFunGrouper(groupDateTime, value, self.__aggfun)
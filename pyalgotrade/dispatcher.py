@@ -21,16 +21,23 @@
 from pyalgotrade import utils
 from pyalgotrade import observer
 from pyalgotrade import dispatchprio
+from pyalgotrade import profiler
+from pyalgotrade.utils import wakeup
 
 
 # This class is responsible for dispatching events from multiple subjects, synchronizing them if necessary.
 class Dispatcher(object):
+    # Maximum time to block waiting for events, so changes that don't notify the wakeup are eventually picked up.
+    WAKEUP_TIMEOUT = 0.5
+
     def __init__(self):
         self.__subjects = []
         self.__stop = False
         self.__startEvent = observer.Event()
         self.__idleEvent = observer.Event()
         self.__currDateTime = None
+        self.__profiler = None
+        self.__wakeup = wakeup.Wakeup()
 
     # Returns the current event datetime. It may be None for events from realtime subjects.
     def getCurrentDateTime(self):
@@ -42,8 +49,17 @@ class Dispatcher(object):
     def getIdleEvent(self):
         return self.__idleEvent
 
+    # Returns the pyalgotrade.utils.wakeup.Wakeup that realtime subjects should notify when there are new events.
+    def getWakeup(self):
+        return self.__wakeup
+
+    # Returns True if subjects that run coroutines in an asyncio event loop are supported.
+    def runsEventLoop(self):
+        return False
+
     def stop(self):
         self.__stop = True
+        self.getWakeup().notify()
 
     def getSubjects(self):
         return self.__subjects
@@ -65,6 +81,9 @@ class Dispatcher(object):
                 pos += 1
             self.__subjects.insert(pos, subject)
 
+        if subject.runsInEventLoop() and not self.runsEventLoop():
+            raise Exception("%s has to be used with pyalgotrade.asyncdispatcher.Dispatcher" % type(subject).__name__)
+
         subject.onDispatcherRegistered(self)
 
     # Return True if events were dispatched.
@@ -72,7 +91,10 @@ class Dispatcher(object):
         ret = False
         # Dispatch if the datetime is currEventDateTime of if its a realtime subject.
         if not subject.eof() and subject.peekDateTime() in (None, currEventDateTime):
-            ret = subject.dispatch() is True
+            if self.__profiler is None:
+                ret = subject.dispatch() is True
+            else:
+                ret = self.__profiler.dispatchSubject(subject)
         return ret
 
     # Returns a tuple with booleans
@@ -98,24 +120,56 @@ class Dispatcher(object):
                     eventsDispatched = True
         return eof, eventsDispatched
 
-    def run(self):
-        try:
-            for subject in self.__subjects:
-                subject.start()
+    # Returns True if it is ok to block until a subject notifies the wakeup.
+    def _canWait(self):
+        if self.__stop:
+            return False
+        for subject in self.__subjects:
+            if not subject.eof() and not subject.supportsWakeup():
+                return False
+        return True
+
+    def _isStopped(self):
+        return self.__stop
+
+    # Starts the subjects. Subclasses that override run should call this first, and _finishRun once done.
+    def _startRun(self):
+        # Profiling has to be enabled before running.
+        self.__profiler = profiler.active
+        if self.__profiler is not None:
+            self.__profiler.start()
+
+        for subject in self.__subjects:
+            subject.start()
 
-            self.__startEvent.emit()
+        self.__startEvent.emit()
 
+    # Dispatches events once. Returns True if events were dispatched.
+    def _dispatchOnce(self):
+        eof, eventsDispatched = self.__dispatch()
+        if eof:
+            self.__stop = True
+        elif not eventsDispatched:
+            self.__idleEvent.emit()
+        return eventsDispatched
+
+    def _finishRun(self):
+        # There are no more events.
+        self.__currDateTime = None
+
+        for subject in self.__subjects:
+            subject.stop()
+        for subject in self.__subjects:
+            subject.join()
+
+        if self.__profiler is not None:
+            self.__profiler.stop()
+
+    def run(self):
+        try:
+            self._startRun()
             while not self.__stop:
-                eof, eventsDispatched = self.__dispatch()
-                if eof:
-                    self.__stop = True
-                elif not eventsDispatched:
-                    self.__idleEvent.emit()
+                if not self._dispatchOnce() and self._canWait():
+                    self.getWakeup().wait(Dispatcher.WAKEUP_TIMEOUT)
         finally:
-            # There are no more events.
-            self.__currDateTime = None
-
-            for subject in self.__subjects:
-                subject.stop()
-            for subject in self.__subjects:
-                subject.join()
+            self._finishRun()
@@ -19,6 +19,7 @@
 """
 
 import abc
+import collections
 
 from pyalgotrade import observer
 from pyalgotrade import dataseries
@@ -52,14 +53,62 @@ class BaseFeed(observer.Subject):
         maxLen = dataseries.get_checked_max_len(maxLen)
 
         self.__ds = {}
+        self.__dsItems = ()
+        # Used as an ordered set, so keys are returned in the order they were registered.
+        self.__keys = collections.OrderedDict()
+        self.__onDemand = False
+        self.__autoMinLen = None
         self.__event = observer.Event()
         self.__maxLen = maxLen
 
     def reset(self):
         keys = list(self.__ds.keys())
         self.__ds = {}
+        self.__dsItems = ()
         for key in keys:
-            self.registerDataSeries(key)
+            self.__createDataSeries(key)
+
+    def setOnDemandDataSeries(self, onDemand):
+        """Controls which :class:`pyalgotrade.dataseries.DataSeries` get updated when new values are available.
+
+        :param onDemand: If True, only the dataseries that were requested using **feed[key]** are updated, and the
+            rest of the values are skipped. Dataseries get created and backfilled the first time they are requested.
+            If False, which is the default, dataseries are updated for every key.
+        :type onDemand: boolean.
+
+        .. note::
+            Dataseries that were created and have no values yet are discarded when switching to on demand mode,
+            so this should be called before requesting dataseries to build indicators.
+        """
+        if onDemand:
+            for key, ds in self.__dsItems:
+                if len(ds) == 0:
+                    del self.__ds[key]
+            self.__dsItems = tuple(self.__ds.items())
+        elif self.__onDemand:
+            # Create and backfill the dataseries that were not requested.
+            for key in list(self.__keys):
+                self[key]
+        self.__onDemand = onDemand
+
+    def getOnDemandDataSeries(self):
+        return self.__onDemand
+
+    def setAutoMaxLen(self, minLen=dataseries.DEFAULT_AUTO_MIN_LEN):
+        """Sizes dataseries automatically instead of using the maxLen supplied in the constructor.
+        Each dataseries will hold minLen values, or the number of values required by the indicators built on top of it,
+        whichever is bigger. Indicators built on top of these dataseries get sized automatically as well.
+
+        :param minLen: The minimum number of values to hold. Use a bigger value if the strategy accesses values
+            further back.
+        :type minLen: int.
+
+        .. note::
+            This should be called before building indicators and before values are added.
+        """
+        self.__autoMinLen = minLen
+        for key, ds in self.__dsItems:
+            ds.setAutoMaxLen(minLen)
 
     # Subclasses should implement this and return the appropriate dataseries for the given key.
     @abc.abstractmethod
@@ -73,21 +122,48 @@ class BaseFeed(observer.Subject):
     def getNextValues(self):
         raise NotImplementedError()
 
+    # Subclasses can override this and return a sequence of (datetime, value) tuples with the values already
+    # returned for the given key. It is used to backfill dataseries that get created on demand.
+    def getValueHistory(self, key):
+        return []
+
+    def __createDataSeries(self, key):
+        ret = self.createDataSeries(key, self.__maxLen)
+        if self.__autoMinLen is not None:
+            ret.setAutoMaxLen(self.__autoMinLen)
+        self.__ds[key] = ret
+        self.__dsItems = tuple(self.__ds.items())
+        self.__keys[key] = None
+        return ret
+
     def registerDataSeries(self, key):
         if key not in self.__ds:
-            self.__ds[key] = self.createDataSeries(key, self.__maxLen)
+            if self.__onDemand:
+                self.__keys[key] = None
+            else:
+                self.__createDataSeries(key)
 
     def getNextValuesAndUpdateDS(self):
         dateTime, values = self.getNextValues()
         if dateTime is not None:
-            for key, value in values.items():
-                # Get or create the datseries for each key.
-                try:
-                    ds = self.__ds[key]
-                except KeyError:
-                    ds = self.createDataSeries(key, self.__maxLen)
-                    self.__ds[key] = ds
-                ds.appendWithDateTime(dateTime, value)
+            if self.__onDemand:
+                # Keep track of keys that were not registered, so their dataseries can be requested later.
+                keys = self.__keys
+                for key in values.keys():
+                    if key not in keys:
+                        keys[key] = None
+                # Only update the dataseries that were requested.
+                for key, ds in self.__dsItems:
+                    if key in values:
+                        ds.appendWithDateTime(dateTime, values[key])
+            else:
+                for key, value in values.items():
+                    # Get or create the datseries for each key.
+                    try:
+                        ds = self.__ds[key]
+                    except KeyError:
+                        ds = self.__createDataSeries(key)
+                    ds.appendWithDateTime(dateTime, value)
         return (dateTime, values)
 
     def __iter__(self):
@@ -109,12 +185,24 @@ class BaseFeed(observer.Subject):
         return dateTime is not None
 
     def getKeys(self):
-        return list(self.__ds.keys())
+        return list(self.__keys)
+
+    def hasDataSeries(self, key):
+        """Returns True if the :class:`pyalgotrade.dataseries.DataSeries` for the given key was already created."""
+        return key in self.__ds
 
     def __getitem__(self, key):
         """Returns the :class:`pyalgotrade.dataseries.DataSeries` for a given key."""
-        return self.__ds[key]
+        try:
+            ret = self.__ds[key]
+        except KeyError:
+            if not self.__onDemand or key not in self.__keys:
+                raise
+            ret = self.__createDataSeries(key)
+            for dateTime, value in self.getValueHistory(key)[-self.__maxLen:]:
+                ret.appendWithDateTime(dateTime, value)
+        return ret
 
     def __contains__(self, key):
         """Returns True if a :class:`pyalgotrade.dataseries.DataSeries` for the given key is available."""
-        return key in self.__ds
+        return key in self.__ds or (self.__onDemand and key in self.__keys)
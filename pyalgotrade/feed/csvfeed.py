@@ -19,11 +19,11 @@
 """
 
 import abc
-import datetime
 
 import six
 
 from pyalgotrade.utils import dt
+from pyalgotrade.utils import dtparser
 from pyalgotrade.utils import csvutils
 from pyalgotrade.feed import memfeed
 
@@ -98,14 +98,14 @@ class BaseFeed(memfeed.MemFeed):
 class BasicRowParser(RowParser):
     def __init__(self, dateTimeColumn, dateTimeFormat, converter, delimiter=",", timezone=None):
         self.__dateTimeColumn = dateTimeColumn
-        self.__dateTimeFormat = dateTimeFormat
+        self.__dateTimeParser = dtparser.get_parser(dateTimeFormat)
         self.__converter = converter
         self.__delimiter = delimiter
         self.__timezone = timezone
         self.__timeDelta = None
 
     def parseRow(self, csvRowDict):
-        dateTime = datetime.datetime.strptime(csvRowDict[self.__dateTimeColumn], self.__dateTimeFormat)
+        dateTime = self.__dateTimeParser.parse(csvRowDict[self.__dateTimeColumn])
         # Localize the datetime if a timezone was given.
         if self.__timezone is not None:
             if self.__timeDelta is not None:
@@ -137,7 +137,7 @@ class Feed(BaseFeed):
 
     :param dateTimeColumn: The name of the column that has the datetime information.
     :type dateTimeColumn: string.
-    :param dateTimeFormat: The datetime format. datetime.datetime.strptime will be used to parse the column.
+    :param dateTimeFormat: The datetime format, as supported by datetime.datetime.strptime.
     :type dateTimeFormat: string.
     :param converter: A function with two parameters (column name and value) used to convert the string
         value to something else. The default coverter will try to convert the value to a float. If that fails
@@ -25,20 +25,33 @@ import six
 from pyalgotrade import dispatchprio
 
 
+# The profiler used to time event handlers. Set by pyalgotrade.profiler.
+_profiler = None
+
+
+def set_profiler(profiler):
+    global _profiler
+    _profiler = profiler
+
+
 class Event(object):
     def __init__(self):
-        self.__handlers = []
+        # Handlers are kept in a tuple that gets replaced when subscribing/unsubscribing so it can be iterated while
+        # emitting without making a copy.
+        self.__handlers = ()
         self.__deferred = []
         self.__emitting = 0
 
     def __subscribeImpl(self, handler):
         assert not self.__emitting
         if handler not in self.__handlers:
-            self.__handlers.append(handler)
+            self.__handlers = self.__handlers + (handler,)
 
     def __unsubscribeImpl(self, handler):
         assert not self.__emitting
-        self.__handlers.remove(handler)
+        handlers = list(self.__handlers)
+        handlers.remove(handler)
+        self.__handlers = tuple(handlers)
 
     def __applyChanges(self):
         assert not self.__emitting
@@ -59,13 +72,24 @@ class Event(object):
             self.__unsubscribeImpl(handler)
 
     def emit(self, *args, **kwargs):
+        handlers = self.__handlers
+        # Nothing to do if there are no handlers, and changes can't be deferred since no handler will run.
+        if not handlers:
+            return
+
+        self.__emitting += 1
         try:
-            self.__emitting += 1
-            for handler in self.__handlers:
-                handler(*args, **kwargs)
+            if _profiler is not None:
+                for handler in handlers:
+                    _profiler.callHandler(handler, args, kwargs)
+            elif len(handlers) == 1:
+                handlers[0](*args, **kwargs)
+            else:
+                for handler in handlers:
+                    handler(*args, **kwargs)
         finally:
             self.__emitting -= 1
-            if not self.__emitting:
+            if not self.__emitting and self.__deferred:
                 self.__applyChanges()
 
 
@@ -118,3 +142,20 @@ class Subject(object):
     def onDispatcherRegistered(self, dispatcher):
         # Called when the subject is registered with a dispatcher.
         pass
+
+    def supportsWakeup(self):
+        # Return True if the dispatcher doesn't need to poll this subject, because it notifies the dispatcher's wakeup
+        # every time there are new events to dispatch, or because it only dispatches events in response to other
+        # subjects.
+        # If all subjects support this, the dispatcher will block while there are no events instead of polling.
+        return False
+
+    def runsInEventLoop(self):
+        # Return True if this subject produces events from the coroutine returned by runAsync, and has to be used with
+        # a pyalgotrade.asyncdispatcher.Dispatcher.
+        return False
+
+    def runAsync(self):
+        # Return the coroutine that produces events. It will be scheduled in the dispatcher's event loop once all
+        # subjects are started, and cancelled when the dispatcher stops.
+        raise NotImplementedError()
@@ -0,0 +1,196 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import timeit
+
+import six
+
+from pyalgotrade import observer
+
+
+# The profiler in use, or None if profiling is disabled.
+active = None
+
+
+def enable():
+    """Enables profiling and returns the :class:`Profiler` that will record the measurements.
+
+    Events emitted and subjects dispatched from now on will be timed, and strategies will log a report once they
+    finish running.
+    """
+    global active
+    active = Profiler()
+    observer.set_profiler(active)
+    return active
+
+
+def disable():
+    """Disables profiling."""
+    global active
+    active = None
+    observer.set_profiler(None)
+
+
+def get_handler_label(handler):
+    """Returns a label for an event handler, using the class name for the instance that owns a bound method."""
+    owner = getattr(handler, "__self__", None)
+    name = getattr(handler, "__name__", None)
+    if owner is not None and name is not None:
+        ret = "%s.%s" % (type(owner).__name__, name)
+    elif name is not None:
+        ret = getattr(handler, "__qualname__", name)
+    else:
+        ret = type(handler).__name__
+    return ret
+
+
+class Stats(object):
+    """Accumulated measurements for a subject or a handler."""
+
+    def __init__(self, label):
+        self.__label = label
+        self.__count = 0
+        self.__time = 0
+
+    def add(self, elapsed):
+        self.__count += 1
+        self.__time += elapsed
+
+    def merge(self, other):
+        self.__count += other.getCount()
+        self.__time += other.getTime()
+
+    def getLabel(self):
+        return self.__label
+
+    def getCount(self):
+        """Returns the number of calls."""
+        return self.__count
+
+    def getTime(self):
+        """Returns the cumulative time, in seconds."""
+        return self.__time
+
+
+def _merge_by_label(stats):
+    ret = {}
+    for item in stats:
+        merged = ret.get(item.getLabel())
+        if merged is None:
+            merged = Stats(item.getLabel())
+            ret[item.getLabel()] = merged
+        merged.merge(item)
+    return sorted(ret.values(), key=lambda item: item.getTime(), reverse=True)
+
+
+class Profiler(object):
+    """Records time spent dispatching subjects and calling event handlers.
+
+    .. note::
+        * Use :func:`enable` instead of building instances directly.
+        * Handler times are inclusive, so a handler that emits other events also accounts for the time spent in the
+          handlers for those events.
+    """
+
+    def __init__(self):
+        self.__subjects = {}
+        self.__handlers = {}
+        self.__beginning = None
+        self.__elapsed = 0
+
+    def start(self):
+        self.__beginning = timeit.default_timer()
+
+    def stop(self):
+        if self.__beginning is not None:
+            self.__elapsed += timeit.default_timer() - self.__beginning
+            self.__beginning = None
+
+    def getElapsed(self):
+        """Returns the time, in seconds, spent running dispatchers."""
+        ret = self.__elapsed
+        if self.__beginning is not None:
+            ret += timeit.default_timer() - self.__beginning
+        return ret
+
+    # Dispatches a subject and returns True if events were dispatched.
+    def dispatchSubject(self, subject):
+        beginning = timeit.default_timer()
+        ret = subject.dispatch() is True
+        elapsed = timeit.default_timer() - beginning
+
+        stats = self.__subjects.get(subject)
+        if stats is None:
+            stats = Stats(type(subject).__name__)
+            self.__subjects[subject] = stats
+        # Only count dispatches that actually dispatched events.
+        if ret:
+            stats.add(elapsed)
+        return ret
+
+    def callHandler(self, handler, args, kwargs):
+        beginning = timeit.default_timer()
+        try:
+            handler(*args, **kwargs)
+        finally:
+            elapsed = timeit.default_timer() - beginning
+            stats = self.__handlers.get(handler)
+            if stats is None:
+                stats = Stats(get_handler_label(handler))
+                self.__handlers[handler] = stats
+            stats.add(elapsed)
+
+    def getDispatchCount(self, subject):
+        """Returns the number of times that a subject dispatched events."""
+        stats = self.__subjects.get(subject)
+        return 0 if stats is None else stats.getCount()
+
+    def getSubjectStats(self):
+        """Returns a list of :class:`Stats` for subjects, grouped by class name and sorted by time (descending)."""
+        return _merge_by_label(six.itervalues(self.__subjects))
+
+    def getHandlerStats(self):
+        """Returns a list of :class:`Stats` for event handlers, grouped by label and sorted by time (descending)."""
+        return _merge_by_label(six.itervalues(self.__handlers))
+
+    def getReport(self, barFeed=None):
+        """Returns a report with the measurements as a list of strings.
+
+        :param barFeed: If set, the bars per second for this feed are included in the report.
+        :type barFeed: :class:`pyalgotrade.barfeed.BaseBarFeed`.
+        """
+        ret = []
+        elapsed = self.getElapsed()
+        if barFeed is not None:
+            bars = self.getDispatchCount(barFeed)
+            barsPerSecond = bars / elapsed if elapsed > 0 else 0
+            ret.append("%d bars in %.3f seconds (%.1f bars/sec)" % (bars, elapsed, barsPerSecond))
+
+        ret.append("%-50s %12s %12s %12s" % ("Subject", "Dispatches", "Time (s)", "Per call (us)"))
+        for stats in self.getSubjectStats():
+            ret.append(self.__formatStats(stats))
+        ret.append("%-50s %12s %12s %12s" % ("Handler", "Calls", "Time (s)", "Per call (us)"))
+        for stats in self.getHandlerStats():
+            ret.append(self.__formatStats(stats))
+        return ret
+
+    def __formatStats(self, stats):
+        perCall = stats.getTime() / stats.getCount() * 1e6 if stats.getCount() else 0
+        return "%-50s %12d %12.3f %12.1f" % (stats.getLabel(), stats.getCount(), stats.getTime(), perCall)
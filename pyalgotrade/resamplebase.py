@@ -24,89 +24,76 @@ from pyalgotrade.utils import dt
 from pyalgotrade import bar
 
 
-@six.add_metaclass(abc.ABCMeta)
 class TimeRange(object):
+    """A [beginning, ending) range of time. Boundaries are also kept as integer UTC timestamps to speed up checks."""
+
+    def __init__(self, begin, end):
+        self.__begin = begin
+        self.__end = end
+        self.__beginTs = dt.datetime_to_seconds(begin)
+        self.__endTs = dt.datetime_to_seconds(end)
 
-    @abc.abstractmethod
     def belongs(self, dateTime):
-        raise NotImplementedError()
+        return self.belongsTimestamp(dt.datetime_to_seconds(dateTime))
+
+    def belongsTimestamp(self, timestamp):
+        return timestamp >= self.__beginTs and timestamp < self.__endTs
 
-    @abc.abstractmethod
     def getBeginning(self):
-        raise NotImplementedError()
+        return self.__begin
 
     # 1 past the end
-    @abc.abstractmethod
     def getEnding(self):
-        raise NotImplementedError()
+        return self.__end
+
+    def getBeginningTimestamp(self):
+        return self.__beginTs
+
+    def getEndingTimestamp(self):
+        return self.__endTs
+
+
+def get_timezone(dateTime):
+    # Returns the tzinfo for localized datetimes, or None for naive ones.
+    ret = None
+    if not dt.datetime_is_naive(dateTime):
+        ret = dateTime.tzinfo
+    return ret
 
 
 class IntraDayRange(TimeRange):
     def __init__(self, dateTime, frequency):
-        super(IntraDayRange, self).__init__()
         assert isinstance(frequency, int)
         assert frequency > 1
         assert frequency < bar.Frequency.DAY
 
-        ts = int(dt.datetime_to_timestamp(dateTime))
-        slot = int(ts / frequency)
-        slotTs = slot * frequency
-        self.__begin = dt.timestamp_to_datetime(slotTs, not dt.datetime_is_naive(dateTime))
-        if not dt.datetime_is_naive(dateTime):
-            self.__begin = dt.localize(self.__begin, dateTime.tzinfo)
-        self.__end = self.__begin + datetime.timedelta(seconds=frequency)
-
-    def belongs(self, dateTime):
-        return dateTime >= self.__begin and dateTime < self.__end
-
-    def getBeginning(self):
-        return self.__begin
-
-    def getEnding(self):
-        return self.__end
+        ts = dt.datetime_to_seconds(dateTime)
+        begin = dt.seconds_to_datetime(ts - ts % frequency, get_timezone(dateTime))
+        super(IntraDayRange, self).__init__(begin, begin + datetime.timedelta(seconds=frequency))
 
 
 class DayRange(TimeRange):
     def __init__(self, dateTime):
-        super(DayRange, self).__init__()
-        self.__begin = datetime.datetime(dateTime.year, dateTime.month, dateTime.day)
+        begin = datetime.datetime(dateTime.year, dateTime.month, dateTime.day)
         if not dt.datetime_is_naive(dateTime):
-            self.__begin = dt.localize(self.__begin, dateTime.tzinfo)
-        self.__end = self.__begin + datetime.timedelta(days=1)
-
-    def belongs(self, dateTime):
-        return dateTime >= self.__begin and dateTime < self.__end
-
-    def getBeginning(self):
-        return self.__begin
-
-    def getEnding(self):
-        return self.__end
+            begin = dt.localize(begin, dateTime.tzinfo)
+        super(DayRange, self).__init__(begin, begin + datetime.timedelta(days=1))
 
 
 class MonthRange(TimeRange):
     def __init__(self, dateTime):
-        super(MonthRange, self).__init__()
-        self.__begin = datetime.datetime(dateTime.year, dateTime.month, 1)
+        begin = datetime.datetime(dateTime.year, dateTime.month, 1)
 
         # Calculate the ending date.
         if dateTime.month == 12:
-            self.__end = datetime.datetime(dateTime.year + 1, 1, 1)
+            end = datetime.datetime(dateTime.year + 1, 1, 1)
         else:
-            self.__end = datetime.datetime(dateTime.year, dateTime.month + 1, 1)
+            end = datetime.datetime(dateTime.year, dateTime.month + 1, 1)
 
         if not dt.datetime_is_naive(dateTime):
-            self.__begin = dt.localize(self.__begin, dateTime.tzinfo)
-            self.__end = dt.localize(self.__end, dateTime.tzinfo)
-
-    def belongs(self, dateTime):
-        return dateTime >= self.__begin and dateTime < self.__end
-
-    def getBeginning(self):
-        return self.__begin
-
-    def getEnding(self):
-        return self.__end
+            begin = dt.localize(begin, dateTime.tzinfo)
+            end = dt.localize(end, dateTime.tzinfo)
+        super(MonthRange, self).__init__(begin, end)
 
 
 def is_valid_frequency(frequency):
@@ -157,3 +144,63 @@ class Grouper(object):
     def getGrouped(self):
         """Return the grouped value."""
         raise NotImplementedError()
+
+
+class Resampler(object):
+    """Groups values by a certain frequency, checking the boundaries of the current group using integer timestamps.
+    Datetimes are only built once per group.
+
+    :param frequency: The grouping frequency in seconds.
+    :param buildGrouper: A callable that receives the group datetime and the first value, and returns a
+        :class:`Grouper`.
+    :param onGrouped: A callable that receives the group datetime and the grouped value, once a group is complete.
+    """
+
+    def __init__(self, frequency, buildGrouper, onGrouped):
+        if not is_valid_frequency(frequency):
+            raise Exception("Unsupported frequency")
+
+        self.__frequency = frequency
+        self.__intraDay = frequency < bar.Frequency.DAY
+        self.__buildGrouper = buildGrouper
+        self.__onGrouped = onGrouped
+        self.__grouper = None
+        self.__beginTs = None
+        self.__endTs = None
+
+    def __openGroup(self, dateTime, timestamp, value):
+        if self.__intraDay:
+            # Bucket boundaries can be calculated straight from the timestamp.
+            self.__beginTs = timestamp - timestamp % self.__frequency
+            self.__endTs = self.__beginTs + self.__frequency
+            begin = dt.seconds_to_datetime(self.__beginTs, get_timezone(dateTime))
+        else:
+            range_ = build_range(dateTime, self.__frequency)
+            self.__beginTs = range_.getBeginningTimestamp()
+            self.__endTs = range_.getEndingTimestamp()
+            begin = range_.getBeginning()
+        self.__grouper = self.__buildGrouper(begin, value)
+
+    def __closeGroup(self):
+        grouper = self.__grouper
+        self.__grouper = None
+        self.__onGrouped(grouper.getDateTime(), grouper.getGrouped())
+
+    def addValue(self, dateTime, value):
+        timestamp = dt.datetime_to_seconds(dateTime)
+        if self.__grouper is not None:
+            if timestamp >= self.__beginTs and timestamp < self.__endTs:
+                self.__grouper.addValue(value)
+                return
+            self.__closeGroup()
+        self.__openGroup(dateTime, timestamp, value)
+
+    def checkNow(self, dateTime):
+        if self.__grouper is not None:
+            timestamp = dt.datetime_to_seconds(dateTime)
+            if timestamp < self.__beginTs or timestamp >= self.__endTs:
+                self.__closeGroup()
+
+    def pushLast(self):
+        if self.__grouper is not None:
+            self.__closeGroup()
@@ -27,6 +27,9 @@ import pyalgotrade.broker
 from pyalgotrade.broker import backtesting
 from pyalgotrade import observer
 from pyalgotrade import dispatcher
+if six.PY3:
+    from pyalgotrade import asyncdispatcher
+from pyalgotrade import profiler
 import pyalgotrade.strategy.position
 from pyalgotrade import logger
 from pyalgotrade.barfeed import resampled
@@ -56,7 +59,7 @@ class BaseStrategy(object):
         self.__analyzers = []
         self.__namedAnalyzers = {}
         self.__resampledBarFeeds = []
-        self.__dispatcher = dispatcher.Dispatcher()
+        self.__dispatcher = self.__buildDispatcher()
         self.__broker.getOrderUpdatedEvent().subscribe(self.__onOrderEvent)
         self.__barFeed.getNewValuesEvent().subscribe(self.__onBars)
 
@@ -71,6 +74,12 @@ class BaseStrategy(object):
         # Initialize logging.
         self.__logger = logger.getLogger(BaseStrategy.LOGGER_NAME)
 
+    # Subjects that run coroutines require a dispatcher that runs an asyncio event loop.
+    def __buildDispatcher(self):
+        if self.__broker.runsInEventLoop() or self.__barFeed.runsInEventLoop():
+            return asyncdispatcher.Dispatcher()
+        return dispatcher.Dispatcher()
+
     # Only valid for testing purposes.
     def _setBroker(self, broker):
         self.__broker = broker
@@ -518,6 +527,10 @@ class BaseStrategy(object):
         else:
             raise Exception("Feed was empty")
 
+        if profiler.active is not None:
+            for line in profiler.active.getReport(self.__barFeed):
+                self.__logger.info(line)
+
     def stop(self):
         """Stops a running strategy."""
         self.__dispatcher.stop()
@@ -73,12 +73,16 @@ class EventBasedFilter(dataseries.SequenceDataSeries):
     :type eventWindow: :class:`EventWindow`.
     :param maxLen: The maximum number of values to hold.
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
-        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used, unless dataSeries is sized automatically, in
+        which case this one is sized automatically as well.
     :type maxLen: int.
     """
 
     def __init__(self, dataSeries, eventWindow, maxLen=None):
         super(EventBasedFilter, self).__init__(maxLen)
+        # Declare the lookback, so dataSeries holds at least the values in the window if it is sized automatically.
+        dataSeries.requireLen(eventWindow.getWindowSize())
+        dataseries.inherit_auto_max_len(self, dataSeries, maxLen)
         self.__dataSeries = dataSeries
         self.__dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
         self.__eventWindow = eventWindow
@@ -43,6 +43,8 @@ class BollingerBands(object):
         self.__stdDev = stats.StdDev(dataSeries, period, maxLen=maxLen)
         self.__upperBand = dataseries.SequenceDataSeries(maxLen)
         self.__lowerBand = dataseries.SequenceDataSeries(maxLen)
+        dataseries.inherit_auto_max_len(self.__upperBand, dataSeries, maxLen)
+        dataseries.inherit_auto_max_len(self.__lowerBand, dataSeries, maxLen)
         self.__numStdDev = numStdDev
         # It is important to subscribe after sma and stddev since we'll use those values.
         dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
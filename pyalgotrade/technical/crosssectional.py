@@ -0,0 +1,309 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy as np
+
+from pyalgotrade import dataseries
+
+
+def _to_value(value):
+    if np.isnan(value):
+        return None
+    return float(value)
+
+
+# A SequenceDataSeries that makes sure that the engine processed the current bars before being accessed.
+# This is necessary because the strategy may subscribe to the feed before the engine does.
+class _InstrumentDataSeries(dataseries.SequenceDataSeries):
+    def __init__(self, engine, maxLen):
+        super(_InstrumentDataSeries, self).__init__(maxLen)
+        self.__engine = engine
+
+    def __len__(self):
+        self.__engine.update()
+        return super(_InstrumentDataSeries, self).__len__()
+
+    def __getitem__(self, key):
+        self.__engine.update()
+        return super(_InstrumentDataSeries, self).__getitem__(key)
+
+    def getValueAbsolute(self, pos):
+        self.__engine.update()
+        return super(_InstrumentDataSeries, self).getValueAbsolute(pos)
+
+    def getDateTimes(self):
+        self.__engine.update()
+        return super(_InstrumentDataSeries, self).getDateTimes()
+
+
+class Engine(object):
+    """Keeps a (instruments x window) matrix with the last prices for a universe of instruments, and calculates
+    :class:`Indicator` instances for all of them at once.
+
+    :param barFeed: The bar feed that will supply the bars.
+    :type barFeed: :class:`pyalgotrade.barfeed.BaseBarFeed`.
+    :param instruments: Instrument identifiers.
+    :type instruments: list.
+    :param windowSize: The number of prices to keep for each instrument. Must be greater than 0.
+    :type windowSize: int.
+    :param maxLen: The maximum number of values that each per-instrument
+        :class:`pyalgotrade.dataseries.DataSeries` will hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded
+        from the opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        * Prices are taken using :meth:`pyalgotrade.bar.Bar.getPrice`.
+        * If an instrument has no bar for a given datetime, its last price is carried forward. NaN is used until the
+          first bar for an instrument is available.
+    """
+
+    def __init__(self, barFeed, instruments, windowSize, maxLen=None):
+        assert windowSize > 0, "windowSize must be > 0"
+        assert len(instruments) > 0, "No instruments supplied"
+
+        self.__barFeed = barFeed
+        self.__instruments = list(instruments)
+        self.__positions = dict((instrument, i) for i, instrument in enumerate(self.__instruments))
+        self.__window = np.empty((len(self.__instruments), windowSize))
+        self.__window.fill(np.nan)
+        self.__maxLen = maxLen
+        self.__indicators = []
+        self.__dateTime = None
+        self.__barFeed.getNewValuesEvent().subscribe(self.__onBars)
+
+    def __onBars(self, dateTime, bars):
+        self.update()
+
+    def update(self):
+        """Updates the window and the indicators with the feed's current bars, unless that was already done.
+
+        .. note::
+            There is no need to call this directly since accessors call it as needed.
+        """
+        bars = self.__barFeed.getCurrentBars()
+        if bars is None or bars.getDateTime() == self.__dateTime:
+            return
+
+        self.__dateTime = bars.getDateTime()
+        # Shift prices to the left and put the new ones in the last column, carrying forward the last ones.
+        self.__window[:, 0:-1] = self.__window[:, 1:]
+        prices = self.__window[:, -1]
+        for i, instrument in enumerate(self.__instruments):
+            bar = bars.getBar(instrument)
+            if bar is not None:
+                prices[i] = bar.getPrice()
+
+        for indicator in self.__indicators:
+            indicator.updateValues(self.__dateTime)
+
+    def registerIndicator(self, indicator):
+        self.__indicators.append(indicator)
+
+    def getInstruments(self):
+        """Returns the instrument identifiers. Rows in matrices follow this order."""
+        return self.__instruments
+
+    def getInstrumentPosition(self, instrument):
+        """Returns the row for a given instrument."""
+        return self.__positions[instrument]
+
+    def getWindowSize(self):
+        return self.__window.shape[1]
+
+    def getMaxLen(self):
+        return self.__maxLen
+
+    def getDateTime(self):
+        """Returns the :class:`datetime.datetime` for the last bars processed."""
+        self.update()
+        return self.__dateTime
+
+    def getWindow(self):
+        """Returns a numpy.array with one row per instrument and the prices, oldest first, in the columns."""
+        self.update()
+        return self.__window
+
+
+class Indicator(object):
+    """Base class for indicators calculated for every instrument in an :class:`Engine` at once.
+
+    :param engine: The engine that will supply the prices.
+    :type engine: :class:`Engine`.
+
+    .. note::
+        This is a base class and should not be used directly.
+    """
+
+    def __init__(self, engine):
+        self.__engine = engine
+        self.__values = np.empty(len(engine.getInstruments()))
+        self.__values.fill(np.nan)
+        self.__dataSeries = {}
+        engine.registerIndicator(self)
+
+    def getEngine(self):
+        return self.__engine
+
+    def calculate(self):
+        """Override to return a numpy.array with one value per instrument, using NaN for missing values."""
+        raise NotImplementedError()
+
+    def updateValues(self, dateTime):
+        self.__values = self.calculate()
+        for instrument, ds in self.__dataSeries.items():
+            ds.appendWithDateTime(dateTime, _to_value(self.__values[self.__engine.getInstrumentPosition(instrument)]))
+
+    def getValues(self):
+        """Returns a numpy.array with the last value for every instrument, using NaN for missing values."""
+        self.__engine.update()
+        return self.__values
+
+    def getValue(self, instrument):
+        """Returns the last value for a given instrument, or None if not available."""
+        return _to_value(self.getValues()[self.__engine.getInstrumentPosition(instrument)])
+
+    def getDataSeries(self, instrument):
+        """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the values for a given instrument.
+
+        .. note::
+            Values are recorded from the moment the DataSeries is first requested, and None is used for missing values.
+        """
+        ret = self.__dataSeries.get(instrument)
+        if ret is None:
+            self.__engine.getInstrumentPosition(instrument)  # Fail for unknown instruments.
+            ret = _InstrumentDataSeries(self.__engine, self.__engine.getMaxLen())
+            self.__dataSeries[instrument] = ret
+        return ret
+
+    def __getitem__(self, instrument):
+        """Returns the :class:`pyalgotrade.dataseries.DataSeries` for a given instrument."""
+        return self.getDataSeries(instrument)
+
+
+class SMA(Indicator):
+    """Simple moving average for every instrument.
+
+    :param engine: The engine that will supply the prices.
+    :type engine: :class:`Engine`.
+    :param period: The number of values to use to calculate the SMA. Must be <= the engine's window size.
+    :type period: int.
+    """
+
+    def __init__(self, engine, period):
+        assert period > 0 and period <= engine.getWindowSize(), "period must be > 0 and <= windowSize"
+        super(SMA, self).__init__(engine)
+        self.__period = period
+
+    def calculate(self):
+        return self.getEngine().getWindow()[:, -self.__period:].mean(axis=1)
+
+
+class StdDev(Indicator):
+    """Standard deviation for every instrument.
+
+    :param engine: The engine that will supply the prices.
+    :type engine: :class:`Engine`.
+    :param period: The number of values to use to calculate the standard deviation. Must be <= the engine's window
+        size.
+    :type period: int.
+    :param ddof: Delta degrees of freedom.
+    :type ddof: int.
+    """
+
+    def __init__(self, engine, period, ddof=0):
+        assert period > 0 and period <= engine.getWindowSize(), "period must be > 0 and <= windowSize"
+        super(StdDev, self).__init__(engine)
+        self.__period = period
+        self.__ddof = ddof
+
+    def calculate(self):
+        return self.getEngine().getWindow()[:, -self.__period:].std(axis=1, ddof=self.__ddof)
+
+
+class RateOfChange(Indicator):
+    """Rate of change for every instrument.
+
+    :param engine: The engine that will supply the prices.
+    :type engine: :class:`Engine`.
+    :param valuesAgo: The number of values back that a given value will compare to. Must be > 0 and < the engine's
+        window size.
+    :type valuesAgo: int.
+    """
+
+    def __init__(self, engine, valuesAgo):
+        assert valuesAgo > 0 and valuesAgo < engine.getWindowSize(), "valuesAgo must be > 0 and < windowSize"
+        super(RateOfChange, self).__init__(engine)
+        self.__valuesAgo = valuesAgo
+
+    def calculate(self):
+        window = self.getEngine().getWindow()
+        prev = window[:, -1 - self.__valuesAgo]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ret = (window[:, -1] - prev) / prev
+        ret[prev == 0] = np.nan
+        return ret
+
+
+class Rank(Indicator):
+    """Cross-sectional rank of another indicator's values. The lowest value gets rank 1, and instruments with missing
+    values are not ranked.
+
+    :param indicator: The indicator whose values will be ranked. Must belong to the same engine.
+    :type indicator: :class:`Indicator`.
+    """
+
+    def __init__(self, indicator):
+        super(Rank, self).__init__(indicator.getEngine())
+        self.__indicator = indicator
+
+    def calculate(self):
+        values = self.__indicator.getValues()
+        ret = np.empty(len(values))
+        ret.fill(np.nan)
+        valid = np.flatnonzero(~np.isnan(values))
+        ret[valid[np.argsort(values[valid], kind="mergesort")]] = np.arange(1, len(valid) + 1)
+        return ret
+
+
+class ZScore(Indicator):
+    """Cross-sectional z-score of another indicator's values. Instruments with missing values are not included.
+
+    :param indicator: The indicator whose values will be used. Must belong to the same engine.
+    :type indicator: :class:`Indicator`.
+    :param ddof: Delta degrees of freedom to use for the standard deviation.
+    :type ddof: int.
+    """
+
+    def __init__(self, indicator, ddof=0):
+        super(ZScore, self).__init__(indicator.getEngine())
+        self.__indicator = indicator
+        self.__ddof = ddof
+
+    def calculate(self):
+        values = self.__indicator.getValues()
+        valid = values[~np.isnan(values)]
+        ret = np.empty(len(values))
+        ret.fill(np.nan)
+        if len(valid) > self.__ddof:
+            std = valid.std(ddof=self.__ddof)
+            if std != 0:
+                ret = (values - valid.mean()) / std
+        return ret
@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import math
+
 import numpy as np
 
 from pyalgotrade import technical
@@ -46,19 +48,60 @@ def hurst_exp(p, minLags, maxLags):
 class HurstExponentEventWindow(technical.EventWindow):
     def __init__(self, period, minLags, maxLags, logValues=True):
         super(HurstExponentEventWindow, self).__init__(period)
-        self.__minLags = minLags
-        self.__maxLags = maxLags
         self.__logValues = logValues
+        self.__lags = np.arange(minLags, maxLags)
+        # Number of differences available for each lag.
+        self.__counts = (period - self.__lags).astype(float)
+        # Precomputed least squares weights for the slope of log10(tau) over log10(lag), so that the fit becomes a
+        # dot product instead of a call to np.polyfit.
+        x = np.log10(self.__lags)
+        x = x - x.mean()
+        self.__slopeWeights = x / np.dot(x, x)
+        # Running sums of the lagged differences, and their squares, for each lag.
+        self.__sums = None
+        self.__sumsSq = None
+        self.__updatesLeft = 0
+
+    def __resetSums(self):
+        values = self.getValues()
+        self.__sums = np.empty(len(self.__lags))
+        self.__sumsSq = np.empty(len(self.__lags))
+        for i, lag in enumerate(self.__lags):
+            diffs = np.subtract(values[lag:], values[:-lag])
+            self.__sums[i] = diffs.sum()
+            self.__sumsSq[i] = np.dot(diffs, diffs)
+        # Rebuild the sums from scratch every once in a while to avoid accumulating rounding errors.
+        self.__updatesLeft = self.getWindowSize()
 
     def onNewValue(self, dateTime, value):
-        if value is not None and self.__logValues:
-            value = np.log10(value)
-        super(HurstExponentEventWindow, self).onNewValue(dateTime, value)
+        if value is None:
+            return
+
+        if self.__logValues:
+            value = math.log10(value)
+
+        if self.__sums is None or self.__updatesLeft == 0:
+            super(HurstExponentEventWindow, self).onNewValue(dateTime, value)
+            if self.windowFull():
+                self.__resetSums()
+        else:
+            # Differences that fall out of the window when the oldest value is dropped.
+            values = self.getValues()
+            removed = values[self.__lags] - values[0]
+            super(HurstExponentEventWindow, self).onNewValue(dateTime, value)
+            # Differences between the new value and the lagged ones.
+            added = value - self.getValues()[-1 - self.__lags]
+            self.__sums += added - removed
+            self.__sumsSq += added * added - removed * removed
+            self.__updatesLeft -= 1
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            ret = hurst_exp(self.getValues(), self.__minLags, self.__maxLags)
+            means = self.__sums / self.__counts
+            variances = np.maximum(self.__sumsSq / self.__counts - means * means, 0)
+            # tau = sqrt(std(diffs)) so log10(tau) = log10(variance) / 4, and the hurst exponent is twice the slope.
+            ret = np.dot(self.__slopeWeights, np.log10(variances)) * 0.5
         return ret
 
 
@@ -67,7 +110,7 @@ class HurstExponent(technical.EventBasedFilter):
 
     :param dataSeries: The DataSeries instance being filtered.
     :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
-    :param period: The number of values to use to calculate the hurst exponent.
+    :param period: The number of values to use to calculate the hurst exponent. Must be >= maxLags.
     :type period: int.
     :param minLags: The minimum number of lags to use. Must be >= 2.
     :type minLags: int.
@@ -83,6 +126,7 @@ class HurstExponent(technical.EventBasedFilter):
         assert period > 0, "period must be > 0"
         assert minLags >= 2, "minLags must be >= 2"
         assert maxLags > minLags, "maxLags must be > minLags"
+        assert period >= maxLags, "period must be >= maxLags"
 
         super(HurstExponent, self).__init__(
             dataSeries,
@@ -82,6 +82,9 @@ class LineBreak(dataseries.SequenceDataSeries):
 
         self.__reversalLines = reversalLines
         self.__useAdjustedValues = useAdjustedValues
+        # Previous lines are used to check for reversals.
+        self.requireLen(reversalLines)
+        dataseries.inherit_auto_max_len(self, barDataSeries, maxLen)
 
         barDataSeries.getNewValueEvent().subscribe(self.__onNewBar)
 
@@ -56,6 +56,11 @@ class MACD(dataseries.SequenceDataSeries):
         self.__signalEMAWindow = ma.EMAEventWindow(signalEMA)
         self.__signal = dataseries.SequenceDataSeries(maxLen)
         self.__histogram = dataseries.SequenceDataSeries(maxLen)
+        for ds in [self, self.__signal, self.__histogram]:
+            dataseries.inherit_auto_max_len(ds, dataSeries, maxLen)
+        # Declare the lookbacks. The signal EMA is calculated over the MACD values.
+        dataSeries.requireLen(slowEMA)
+        self.requireLen(signalEMA)
         dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
 
     def getSignal(self):
@@ -21,6 +21,7 @@
 import datetime
 import os
 import argparse
+from multiprocessing import pool
 
 import six
 
@@ -32,9 +33,14 @@ import pyalgotrade.logger
 
 
 # http://www.quandl.com/help/api
+API_URL = "http://www.quandl.com/api/v1"
 
-def download_csv(sourceCode, tableCode, begin, end, frequency, authToken):
-    url = "http://www.quandl.com/api/v1/datasets/%s/%s.csv" % (sourceCode, tableCode)
+# Number of files to download concurrently when building feeds.
+DOWNLOAD_WORKERS = 8
+
+
+def download_csv(sourceCode, tableCode, begin, end, frequency, authToken, session=None):
+    url = "%s/datasets/%s/%s.csv" % (API_URL, sourceCode, tableCode)
     params = {
         "trim_start": begin.strftime("%Y-%m-%d"),
         "trim_end": end.strftime("%Y-%m-%d"),
@@ -43,10 +49,10 @@ def download_csv(sourceCode, tableCode, begin, end, frequency, authToken):
     if authToken is not None:
         params["auth_token"] = authToken
 
-    return csvutils.download_csv(url, params)
+    return csvutils.download_csv(url, params, session=session)
 
 
-def download_daily_bars(sourceCode, tableCode, year, csvFile, authToken=None):
+def download_daily_bars(sourceCode, tableCode, year, csvFile, authToken=None, session=None):
     """Download daily bars from Quandl for a given year.
 
     :param sourceCode: The dataset's source code.
@@ -59,15 +65,18 @@ def download_daily_bars(sourceCode, tableCode, year, csvFile, authToken=None):
     :type csvFile: string.
     :param authToken: Optional. An authentication token needed if you're doing more than 50 calls per day.
     :type authToken: string.
+    :param session: Optional. The requests.Session to use.
     """
 
-    bars = download_csv(sourceCode, tableCode, datetime.date(year, 1, 1), datetime.date(year, 12, 31), "daily", authToken)
+    bars = download_csv(
+        sourceCode, tableCode, datetime.date(year, 1, 1), datetime.date(year, 12, 31), "daily", authToken, session
+    )
     f = open(csvFile, "w")
     f.write(bars)
     f.close()
 
 
-def download_weekly_bars(sourceCode, tableCode, year, csvFile, authToken=None):
+def download_weekly_bars(sourceCode, tableCode, year, csvFile, authToken=None, session=None):
     """Download weekly bars from Quandl for a given year.
 
     :param sourceCode: The dataset's source code.
@@ -80,11 +89,12 @@ def download_weekly_bars(sourceCode, tableCode, year, csvFile, authToken=None):
     :type csvFile: string.
     :param authToken: Optional. An authentication token needed if you're doing more than 50 calls per day.
     :type authToken: string.
+    :param session: Optional. The requests.Session to use.
     """
 
     begin = dt.get_first_monday(year) - datetime.timedelta(days=1)  # Start on a sunday
     end = dt.get_last_monday(year) - datetime.timedelta(days=1)  # Start on a sunday
-    bars = download_csv(sourceCode, tableCode, begin, end, "weekly", authToken)
+    bars = download_csv(sourceCode, tableCode, begin, end, "weekly", authToken, session)
     f = open(csvFile, "w")
     f.write(bars)
     f.close()
@@ -92,10 +102,11 @@ def download_weekly_bars(sourceCode, tableCode, year, csvFile, authToken=None):
 
 def build_feed(sourceCode, tableCodes, fromYear, toYear, storage, frequency=bar.Frequency.DAY, timezone=None,
                skipErrors=False, authToken=None, columnNames={}, forceDownload=False,
-               skipMalformedBars=False
+               skipMalformedBars=False, downloadWorkers=DOWNLOAD_WORKERS, loadWorkers=1
                ):
     """Build and load a :class:`pyalgotrade.barfeed.quandlfeed.Feed` using CSV files downloaded from Quandl.
-    CSV files are downloaded if they haven't been downloaded before.
+    CSV files are downloaded if they haven't been downloaded before. Files are downloaded concurrently, sharing a pool
+    of HTTP connections, and can be parsed concurrently using a pool of processes.
 
     :param sourceCode: The dataset source code.
     :type sourceCode: string.
@@ -128,6 +139,11 @@ def build_feed(sourceCode, tableCodes, fromYear, toYear, storage, frequency=bar.
     :type columnNames: dict.
     :param skipMalformedBars: True to skip errors while parsing bars.
     :type skipMalformedBars: boolean.
+    :param downloadWorkers: The number of files to download concurrently.
+    :type downloadWorkers: int.
+    :param loadWorkers: The number of processes to use to parse files. If 1, files are parsed in this process. If None,
+        the number of CPUs is used.
+    :type loadWorkers: int.
 
     :rtype: :class:`pyalgotrade.barfeed.quandlfeed.Feed`.
     """
@@ -143,24 +159,47 @@ def build_feed(sourceCode, tableCodes, fromYear, toYear, storage, frequency=bar.
         logger.info("Creating %s directory" % (storage))
         os.mkdir(storage)
 
+    files = []
     for year in range(fromYear, toYear+1):
         for tableCode in tableCodes:
             fileName = os.path.join(storage, "%s-%s-%d-quandl.csv" % (sourceCode, tableCode, year))
-            if not os.path.exists(fileName) or forceDownload:
-                logger.info("Downloading %s %d to %s" % (tableCode, year, fileName))
-                try:
-                    if frequency == bar.Frequency.DAY:
-                        download_daily_bars(sourceCode, tableCode, year, fileName, authToken)
-                    else:
-                        assert frequency == bar.Frequency.WEEK, "Invalid frequency"
-                        download_weekly_bars(sourceCode, tableCode, year, fileName, authToken)
-                except Exception as e:
-                    if skipErrors:
-                        logger.error(str(e))
-                        continue
-                    else:
-                        raise e
-            ret.addBarsFromCSV(tableCode, fileName, skipMalformedBars=skipMalformedBars)
+            files.append((tableCode, year, fileName))
+
+    session = csvutils.build_session(downloadWorkers)
+
+    # Returns True if the file is available.
+    def download(job):
+        tableCode, year, fileName = job
+        if os.path.exists(fileName) and not forceDownload:
+            return True
+
+        logger.info("Downloading %s %d to %s" % (tableCode, year, fileName))
+        try:
+            if frequency == bar.Frequency.DAY:
+                download_daily_bars(sourceCode, tableCode, year, fileName, authToken, session)
+            else:
+                assert frequency == bar.Frequency.WEEK, "Invalid frequency"
+                download_weekly_bars(sourceCode, tableCode, year, fileName, authToken, session)
+        except Exception as e:
+            if skipErrors:
+                logger.error(str(e))
+                return False
+            else:
+                raise e
+        return True
+
+    downloadPool = pool.ThreadPool(max(1, min(downloadWorkers, len(files))))
+    try:
+        available = downloadPool.map(download, files)
+    finally:
+        downloadPool.close()
+        downloadPool.join()
+        session.close()
+
+    ret.addBarsFromCSVFiles(
+        [(tableCode, fileName) for (tableCode, _, fileName), ok in zip(files, available) if ok],
+        skipMalformedBars=skipMalformedBars, maxWorkers=loadWorkers
+    )
     return ret
 
 
@@ -18,24 +18,48 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import multiprocessing
 import os
 
+import numpy as np
+import six
+
+from pyalgotrade import bar
 from pyalgotrade import dispatcher
+from pyalgotrade import resamplebase
+from pyalgotrade.barfeed import csvfeed
 from pyalgotrade.dataseries import resampled
+from pyalgotrade.utils import dt
 
 
 datetime_format = "%Y-%m-%d %H:%M:%S"
 
+# Output file formats.
+CSV = "csv"
+COLUMNAR = "npz"
+
 
 class CSVFileWriter(object):
-    def __init__(self, csvFile):
-        self.__file = open(csvFile, "w")
+    def __init__(self, csvFile, bufferSize=10000):
+        self.__csvFile = csvFile
+        # The file is only kept open while flushing, so many writers can be used at the same time without running out
+        # of file descriptors.
+        self.__fileCreated = False
+        self.__lines = []
+        self.__bufferSize = bufferSize
         self.__writeLine("Date Time", "Open", "High", "Low", "Close", "Volume", "Adj Close")
 
     def __writeLine(self, *values):
-        line = ",".join([str(value) for value in values])
-        self.__file.write(line)
-        self.__file.write(os.linesep)
+        self.__lines.append(",".join([str(value) for value in values]))
+        if len(self.__lines) >= self.__bufferSize:
+            self.__flush()
+
+    def __flush(self):
+        mode = "a" if self.__fileCreated else "w"
+        with open(self.__csvFile, mode) as f:
+            f.writelines([line + os.linesep for line in self.__lines])
+        self.__fileCreated = True
+        self.__lines = []
 
     def writeBar(self, bar_):
         adjClose = bar_.getAdjClose()
@@ -53,30 +77,148 @@ class CSVFileWriter(object):
         )
 
     def close(self):
-        self.__file.close()
+        self.__flush()
 
 
-def resample_impl(barFeed, frequency, csvFile):
-    instruments = barFeed.getRegisteredInstruments()
-    if len(instruments) != 1:
-        raise Exception("Only barfeeds with 1 instrument can be resampled")
+class ColumnarFileWriter(object):
+    """Writes bars to a NumPy .npz file with one array per column. Datetimes are stored as seconds since the epoch,
+    without timezone information, and missing adjusted close values as NaN."""
+
+    def __init__(self, path):
+        self.__path = path
+        self.__columns = ([], [], [], [], [], [], [])
+
+    def writeBar(self, bar_):
+        adjClose = bar_.getAdjClose()
+        if adjClose is None:
+            adjClose = np.nan
+        values = (
+            dt.datetime_to_seconds(dt.unlocalize(bar_.getDateTime())),
+            bar_.getOpen(),
+            bar_.getHigh(),
+            bar_.getLow(),
+            bar_.getClose(),
+            bar_.getVolume(),
+            adjClose
+        )
+        for column, value in zip(self.__columns, values):
+            column.append(value)
+
+    def close(self):
+        # Use a file object so numpy doesn't append the extension.
+        with open(self.__path, "wb") as f:
+            np.savez(
+                f,
+                datetime=np.array(self.__columns[0], dtype=np.int64),
+                open=np.array(self.__columns[1], dtype=float),
+                high=np.array(self.__columns[2], dtype=float),
+                low=np.array(self.__columns[3], dtype=float),
+                close=np.array(self.__columns[4], dtype=float),
+                volume=np.array(self.__columns[5], dtype=float),
+                adj_close=np.array(self.__columns[6], dtype=float)
+            )
+
+
+def load_columnar_bars(path, frequency, timezone=None):
+    """Loads bars from a file written using the columnar format.
+
+    :param path: The path to the file.
+    :type path: string.
+    :param frequency: The frequency of the bars. Check :class:`pyalgotrade.bar.Frequency`.
+    :param timezone: The timezone to use to localize bars. Check :mod:`pyalgotrade.marketsession`.
+    :type timezone: A pytz timezone.
+    :rtype: A list of :class:`pyalgotrade.bar.BasicBar` that can be loaded using
+        :meth:`pyalgotrade.barfeed.membf.BarFeed.addBarsFromSequence`.
+    """
+
+    ret = []
+    with np.load(path) as data:
+        names = ("datetime", "open", "high", "low", "close", "volume", "adj_close")
+        arrays = [data[name] for name in names]
+    # Calculate the adjustment factor for all the bars at once.
+    # The result is nan for bars without adjusted close, and inf/nan for bars with a close of 0.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        adjFactors = (arrays[6] / arrays[4]).tolist()
+    columns = [array.tolist() for array in arrays]
+    for seconds, open_, high, low, close, volume, adjClose, adjFactor in zip(*(columns + [adjFactors])):
+        dateTime = dt.seconds_to_datetime(seconds)
+        if timezone is not None:
+            dateTime = dt.localize(dateTime, timezone)
+        if np.isnan(adjClose):
+            adjClose = None
+        if adjClose is None or close == 0:
+            adjFactor = None
+        # These bars were validated before being written.
+        ret.append(bar.BasicBar.fromTrustedValues(
+            dateTime, open_, high, low, close, volume, adjClose, frequency, adjFactor=adjFactor
+        ))
+    return ret
+
+
+def get_output_path(outputDir, instrument, frequency, fileFormat=CSV):
+    """Returns the path to the file where resampled bars for a given instrument and frequency are written.
+
+    :param outputDir: The directory where files are written.
+    :type outputDir: string.
+    :param instrument: Instrument identifier.
+    :type instrument: string.
+    :param frequency: The grouping frequency in seconds.
+    :param fileFormat: **resample.CSV** or **resample.COLUMNAR**.
+    """
+    return os.path.join(outputDir, "%s-%d.%s" % (instrument, frequency, fileFormat))
+
+
+def build_writer(path, fileFormat):
+    if fileFormat == CSV:
+        ret = CSVFileWriter(path)
+    elif fileFormat == COLUMNAR:
+        ret = ColumnarFileWriter(path)
+    else:
+        raise Exception("Invalid file format %s" % fileFormat)
+    return ret
+
 
-    csvWriter = CSVFileWriter(csvFile)
+def build_resampler(frequency, writer):
+    return resamplebase.Resampler(
+        frequency,
+        lambda groupDateTime, bar_: resampled.BarGrouper(groupDateTime, bar_, frequency),
+        lambda groupDateTime, bar_: writer.writeBar(bar_)
+    )
 
-    def on_bar(ds, dateTime, value):
-        csvWriter.writeBar(value)
 
-    insrumentDS = barFeed[instruments[0]]
-    resampledDS = resampled.ResampledBarDataSeries(insrumentDS, frequency)
-    resampledDS.getNewValueEvent().subscribe(on_bar)
+# Resamples all the bars in barFeed in a single pass.
+# writers is a dictionary that maps (instrument, frequency) to a writer.
+# If dispatch is True, bars are dispatched as usual, so dataseries and subscribers to the feed get updated.
+def resample_impl(barFeed, writers, dispatch=False):
+    resamplers = {}
+    for (instrument, frequency), writer in six.iteritems(writers):
+        resamplers.setdefault(instrument, []).append(build_resampler(frequency, writer))
 
-    # Process all bars.
-    disp = dispatcher.Dispatcher()
-    disp.addSubject(barFeed)
-    disp.run()
-    resampledDS.pushLast()
+    def on_bars(dateTime, bars):
+        for instrument, bar_ in bars.items():
+            for resampler in resamplers.get(instrument, []):
+                resampler.addValue(dateTime, bar_)
 
-    csvWriter.close()
+    if dispatch:
+        barFeed.getNewValuesEvent().subscribe(on_bars)
+        disp = dispatcher.Dispatcher()
+        disp.addSubject(barFeed)
+        disp.run()
+    else:
+        # Pull bars straight from the feed since there is no need to update dataseries or emit events.
+        barFeed.start()
+        try:
+            while not barFeed.eof():
+                dateTime, bars = barFeed.getNextValues()
+                if dateTime is not None:
+                    on_bars(dateTime, bars)
+        finally:
+            barFeed.stop()
+            barFeed.join()
+
+    for instrumentResamplers in resamplers.values():
+        for resampler in instrumentResamplers:
+            resampler.pushLast()
 
 
 def resample_to_csv(barFeed, frequency, csvFile):
@@ -105,4 +247,115 @@ def resample_to_csv(barFeed, frequency, csvFile):
     """
 
     assert frequency > 0, "Invalid frequency"
-    resample_impl(barFeed, frequency, csvFile)
+
+    instruments = barFeed.getRegisteredInstruments()
+    if len(instruments) != 1:
+        raise Exception("Only barfeeds with 1 instrument can be resampled")
+
+    writer = CSVFileWriter(csvFile)
+    try:
+        resample_impl(barFeed, {(instruments[0], frequency): writer}, dispatch=True)
+    finally:
+        writer.close()
+
+
+def resample_to_files(barFeed, frequencies, outputDir, fileFormat=CSV):
+    """Resample every instrument in a BarFeed to many frequencies in a single pass.
+    One file per instrument and frequency is written to outputDir. Check :func:`get_output_path`.
+
+    :param barFeed: The bar feed that will provide the bars.
+    :type barFeed: :class:`pyalgotrade.barfeed.BarFeed`
+    :param frequencies: The grouping frequencies in seconds.
+    :type frequencies: list.
+    :param outputDir: The directory where files will be written.
+    :type outputDir: string.
+    :param fileFormat: **resample.CSV** to write files that can be loaded using
+        :class:`pyalgotrade.barfeed.csvfeed.GenericBarFeed`, or **resample.COLUMNAR** to write NumPy .npz files that
+        can be loaded using :func:`load_columnar_bars`.
+
+    .. note::
+        * Datetimes are stored without timezone information.
+        * Supported resampling frequencies are the same as in :func:`resample_to_csv`.
+    """
+
+    for frequency in frequencies:
+        if not resamplebase.is_valid_frequency(frequency):
+            raise Exception("Unsupported frequency")
+
+    writers = {}
+    try:
+        for instrument in barFeed.getRegisteredInstruments():
+            for frequency in frequencies:
+                path = get_output_path(outputDir, instrument, frequency, fileFormat)
+                writers[(instrument, frequency)] = build_writer(path, fileFormat)
+        resample_impl(barFeed, writers)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+
+class GenericBarFeedBuilder(object):
+    """Builds a :class:`pyalgotrade.barfeed.csvfeed.GenericBarFeed` with the bars for one instrument.
+    Instances can be used with :func:`resample_files`.
+
+    :param frequency: The frequency of the source bars. Check :class:`pyalgotrade.bar.Frequency`.
+    :param timezone: The timezone to use to localize bars. Check :mod:`pyalgotrade.marketsession`.
+    :type timezone: A pytz timezone.
+    """
+
+    def __init__(self, frequency, timezone=None):
+        self.__frequency = frequency
+        self.__timezone = timezone
+
+    def __call__(self, instrument, paths):
+        ret = csvfeed.GenericBarFeed(self.__frequency, self.__timezone)
+        for path in paths:
+            ret.addBarsFromCSV(instrument, path)
+        return ret
+
+
+def resample_instrument(args):
+    instrument, paths, buildFeed, frequencies, outputDir, fileFormat = args
+    resample_to_files(buildFeed(instrument, paths), frequencies, outputDir, fileFormat)
+    return instrument
+
+
+def resample_files(sources, buildFeed, frequencies, outputDir, fileFormat=CSV, processes=None):
+    """Resample bars from files, for many instruments and frequencies, using a pool of processes.
+    Each instrument is loaded and resampled to every frequency in a single pass.
+
+    :param sources: A dictionary that maps instruments to the list of files with their bars.
+    :type sources: dict.
+    :param buildFeed: A callable that receives an instrument and the list of files, and returns a
+        :class:`pyalgotrade.barfeed.BarFeed` with the bars for that instrument. It must be picklable, like a module
+        level function or a :class:`GenericBarFeedBuilder` instance.
+    :param frequencies: The grouping frequencies in seconds.
+    :type frequencies: list.
+    :param outputDir: The directory where files will be written. Check :func:`get_output_path`.
+    :type outputDir: string.
+    :param fileFormat: **resample.CSV** or **resample.COLUMNAR**. Check :func:`resample_to_files`.
+    :param processes: The number of processes to use. If None then as many processes as CPUs are used.
+        If 1 then everything runs in the calling process.
+    :type processes: int.
+    """
+
+    jobs = [
+        (instrument, paths, buildFeed, frequencies, outputDir, fileFormat)
+        for instrument, paths in six.iteritems(sources)
+    ]
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    assert processes > 0, "No processes"
+
+    if processes == 1:
+        for job in jobs:
+            resample_instrument(job)
+    else:
+        pool = multiprocessing.Pool(min(processes, max(len(jobs), 1)))
+        try:
+            for instrument in pool.imap_unordered(resample_instrument, jobs):
+                pass
+        finally:
+            pool.close()
+            pool.join()
@@ -29,6 +29,7 @@ import tweepy
 from tweepy import streaming
 
 from pyalgotrade import observer
+from pyalgotrade.utils import wakeup
 import pyalgotrade.logger
 
 
@@ -96,7 +97,8 @@ class TwitterFeed(observer.Subject):
         super(TwitterFeed, self).__init__()
 
         self.__event = observer.Event()
-        self.__queue = queue.Queue()
+        self.__queue = wakeup.Queue()
+        self.__queueNotifies = False
         self.__thread = None
         self.__running = False
 
@@ -119,7 +121,7 @@ class TwitterFeed(observer.Subject):
     def __dispatchImpl(self):
         ret = False
         try:
-            nextTweet = json.loads(self.__queue.get(True, TwitterFeed.QUEUE_TIMEOUT))
+            nextTweet = json.loads(self.__queue.get(not self.__queueNotifies, TwitterFeed.QUEUE_TIMEOUT))
             ret = True
             self.__event.emit(nextTweet)
         except queue.Empty:
@@ -168,3 +170,10 @@ class TwitterFeed(observer.Subject):
 
     def peekDateTime(self):
         return None
+
+    def onDispatcherRegistered(self, dispatcher):
+        super(TwitterFeed, self).onDispatcherRegistered(dispatcher)
+        self.__queueNotifies = wakeup.set_queue_wakeup(self.__queue, dispatcher.getWakeup())
+
+    def supportsWakeup(self):
+        return self.__queueNotifies
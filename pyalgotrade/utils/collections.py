@@ -18,6 +18,10 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+from __future__ import absolute_import
+
+import collections
+
 import numpy as np
 
 
@@ -139,3 +143,30 @@ class ListDeque(object):
 
     def __getitem__(self, key):
         return self.__values[key]
+
+
+# A dictionary that holds up to maxSize items, discarding the least recently used ones.
+class LRUCache(object):
+    def __init__(self, maxSize):
+        assert maxSize > 0, "Invalid maximum size"
+
+        self.__values = collections.OrderedDict()
+        self.__maxSize = maxSize
+
+    def get(self, key, default=None):
+        try:
+            ret = self.__values.pop(key)
+        except KeyError:
+            return default
+        # Move it to the end since it was recently used.
+        self.__values[key] = ret
+        return ret
+
+    def set(self, key, value):
+        self.__values.pop(key, None)
+        self.__values[key] = value
+        if len(self.__values) > self.__maxSize:
+            self.__values.popitem(last=False)
+
+    def __len__(self):
+        return len(self.__values)
@@ -24,6 +24,7 @@ import logging
 import six
 from six.moves import xrange
 import requests
+import requests.adapters
 
 
 logging.getLogger("requests").setLevel(logging.ERROR)
@@ -38,6 +39,9 @@ class FastDictReader(object):
             self.__fieldNames = six.next(self.reader)
         self.__dict = {}
 
+    def getFieldNames(self):
+        return self.__fieldNames
+
     def _next_impl(self):
         # Skip empty rows.
         row = six.next(self.reader)
@@ -65,8 +69,21 @@ class FastDictReader(object):
         return self._next_impl()
 
 
-def download_csv(url, url_params=None, content_type="text/csv"):
-    response = requests.get(url, params=url_params)
+def build_session(poolSize):
+    """Returns a requests.Session that keeps up to poolSize connections per host alive, so it can be shared by
+    threads doing concurrent downloads."""
+    ret = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=poolSize, pool_maxsize=poolSize)
+    ret.mount("http://", adapter)
+    ret.mount("https://", adapter)
+    return ret
+
+
+def download_csv(url, url_params=None, content_type="text/csv", session=None):
+    if session is None:
+        response = requests.get(url, params=url_params)
+    else:
+        response = session.get(url, params=url_params)
 
     response.raise_for_status()
     response_content_type = response.headers['content-type']
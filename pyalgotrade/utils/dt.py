@@ -18,9 +18,16 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import bisect
 import datetime
 import pytz
 
+from pyalgotrade.utils import collections
+
+
+# Number of naive datetimes, per timezone, whose localized version is cached.
+LOCALIZE_CACHE_SIZE = 4096
+
 
 def datetime_is_naive(dateTime):
     """ Returns True if dateTime is naive."""
@@ -32,6 +39,75 @@ def unlocalize(dateTime):
     return dateTime.replace(tzinfo=None)
 
 
+class TimezoneTable(object):
+    """Precomputed UTC offset transitions for a pytz timezone. It converts datetimes from/to the timezone using a bisect
+    instead of going through pytz, and gives the same results.
+
+    :param timeZone: The timezone.
+    :type timeZone: A pytz timezone.
+
+    .. note::
+        Use :func:`get_timezone_table` instead of building instances directly.
+    """
+
+    def __init__(self, timeZone):
+        self.__timeZone = timeZone
+        self.__cache = collections.LRUCache(LOCALIZE_CACHE_SIZE)
+
+        utcTransitions = getattr(timeZone, "_utc_transition_times", None)
+        if utcTransitions:
+            # Each entry is (utcoffset, dst, tzname) and pytz keeps a tzinfo instance for each one of those.
+            self.__utcTransitions = utcTransitions
+            self.__offsets = [info[0] for info in timeZone._transition_info]
+            self.__tzinfos = [timeZone._tzinfos[info] for info in timeZone._transition_info]
+        else:
+            # A timezone with a fixed offset, like UTC.
+            self.__utcTransitions = [datetime.datetime.min]
+            self.__offsets = [timeZone.utcoffset(None) or datetime.timedelta(0)]
+            self.__tzinfos = [timeZone]
+
+        # Local times around a transition can be ambiguous or non-existent. Local times in
+        # [self.__localStarts[i], self.__ambiguousStarts[i + 1]) unequivocally belong to the i-th offset.
+        self.__localStarts = [datetime.datetime.min]
+        self.__ambiguousStarts = [datetime.datetime.min]
+        for i in range(1, len(self.__utcTransitions)):
+            prevOffset = self.__offsets[i - 1]
+            offset = self.__offsets[i]
+            self.__localStarts.append(self.__utcTransitions[i] + max(prevOffset, offset))
+            self.__ambiguousStarts.append(self.__utcTransitions[i] + min(prevOffset, offset))
+
+    def fromUTC(self, dateTime):
+        """Converts a naive datetime in UTC to an aware datetime in this timezone."""
+        pos = max(0, bisect.bisect_right(self.__utcTransitions, dateTime) - 1)
+        return (dateTime + self.__offsets[pos]).replace(tzinfo=self.__tzinfos[pos])
+
+    def localize(self, dateTime):
+        """Adds timezone information to a naive datetime, like pytz localize does, without changing the date and time."""
+        ret = self.__cache.get(dateTime)
+        if ret is None:
+            pos = bisect.bisect_right(self.__localStarts, dateTime) - 1
+            nextPos = pos + 1
+            if nextPos < len(self.__ambiguousStarts) and dateTime >= self.__ambiguousStarts[nextPos]:
+                # Let pytz deal with ambiguous and non-existent times.
+                ret = self.__timeZone.localize(dateTime)
+            else:
+                ret = dateTime.replace(tzinfo=self.__tzinfos[pos])
+            self.__cache.set(dateTime, ret)
+        return ret
+
+
+_timezone_tables = {}
+
+
+def get_timezone_table(timeZone):
+    """Returns the :class:`TimezoneTable` for a pytz timezone, or None if timeZone is not a pytz timezone."""
+    ret = _timezone_tables.get(timeZone)
+    if ret is None and hasattr(timeZone, "localize"):
+        ret = TimezoneTable(timeZone)
+        _timezone_tables[timeZone] = ret
+    return ret
+
+
 def localize(dateTime, timeZone):
     """Returns a datetime adjusted to a timezone:
 
@@ -41,10 +117,22 @@ def localize(dateTime, timeZone):
        and time data so the result is the same UTC time.
     """
 
-    if datetime_is_naive(dateTime):
-        ret = timeZone.localize(dateTime)
+    table = get_timezone_table(timeZone)
+    if table is None:
+        if datetime_is_naive(dateTime):
+            ret = timeZone.localize(dateTime)
+        else:
+            ret = dateTime.astimezone(timeZone)
+    elif dateTime.tzinfo is None:
+        ret = table.localize(dateTime)
+    elif dateTime.tzinfo is pytz.utc:
+        ret = table.fromUTC(dateTime.replace(tzinfo=None))
     else:
-        ret = dateTime.astimezone(timeZone)
+        offset = dateTime.utcoffset()
+        if offset is None:
+            ret = table.localize(dateTime)
+        else:
+            ret = table.fromUTC(dateTime.replace(tzinfo=None) - offset)
     return ret
 
 
@@ -54,15 +142,42 @@ def as_utc(dateTime):
 
 def datetime_to_timestamp(dateTime):
     """ Converts a datetime.datetime to a UTC timestamp."""
-    diff = as_utc(dateTime) - epoch_utc
+    # Naive datetimes are assumed to be in UTC. Aware ones get adjusted when subtracting.
+    if datetime_is_naive(dateTime):
+        diff = dateTime.replace(tzinfo=None) - epoch_naive
+    else:
+        diff = dateTime - epoch_utc
     return diff.total_seconds()
 
 
+def datetime_to_seconds(dateTime):
+    """Converts a datetime.datetime to an integer UTC timestamp without going through pytz.
+    Naive datetimes are assumed to be in UTC, and fractions of a second are discarded."""
+    delta = dateTime.replace(tzinfo=None) - epoch_naive
+    ret = delta.days * 86400 + delta.seconds
+    offset = dateTime.utcoffset()
+    if offset is not None:
+        ret -= offset.days * 86400 + offset.seconds
+    return ret
+
+
+def seconds_to_datetime(seconds, timeZone=None):
+    """Converts an integer UTC timestamp to a datetime.datetime. If timeZone is None a naive datetime is returned."""
+    ret = epoch_naive + datetime.timedelta(seconds=seconds)
+    if timeZone is not None:
+        table = get_timezone_table(timeZone)
+        if table is not None:
+            ret = table.fromUTC(ret)
+        else:
+            ret = ret.replace(tzinfo=pytz.utc).astimezone(timeZone)
+    return ret
+
+
 def timestamp_to_datetime(timeStamp, localized=True):
     """ Converts a UTC timestamp to a datetime.datetime."""
     ret = datetime.datetime.utcfromtimestamp(timeStamp)
     if localized:
-        ret = localize(ret, pytz.utc)
+        ret = ret.replace(tzinfo=pytz.utc)
     return ret
 
 
@@ -82,4 +197,5 @@ def get_last_monday(year):
     return ret
 
 
-epoch_utc = as_utc(datetime.datetime(1970, 1, 1))
+epoch_naive = datetime.datetime(1970, 1, 1)
+epoch_utc = epoch_naive.replace(tzinfo=pytz.utc)
@@ -0,0 +1,267 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+
+
+# Number of parsed strings to remember per parser. Once full, the cache is cleared.
+PARSE_CACHE_SIZE = 10000
+
+MONTH_ABBREVIATIONS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12
+}
+
+# Supported directives with their width, the minimum width that strptime accepts, and the datetime field they set.
+DIRECTIVES = {
+    "Y": (4, 4, "year"),
+    "y": (2, 2, "year"),
+    "m": (2, 1, "month"),
+    "b": (3, 3, "month"),
+    "d": (2, 1, "day"),
+    "H": (2, 1, "hour"),
+    "M": (2, 1, "minute"),
+    "S": (2, 1, "second"),
+}
+
+FIELDS = ["year", "month", "day", "hour", "minute", "second", "microsecond"]
+
+
+def two_digit_year(value):
+    # The same pivot that strptime uses.
+    if value < 69:
+        return value + 2000
+    return value + 1900
+
+
+def month_abbreviation(value):
+    return MONTH_ABBREVIATIONS[value.lower()]
+
+
+# Splits a format into a list of (directive, literal) tuples. Only one of them is set on each tuple.
+def tokenize(dateTimeFormat):
+    ret = []
+    i = 0
+    while i < len(dateTimeFormat):
+        char = dateTimeFormat[i]
+        if char == "%" and i + 1 < len(dateTimeFormat):
+            directive = dateTimeFormat[i + 1]
+            if directive == "%":
+                ret.append((None, "%"))
+            else:
+                ret.append((directive, None))
+            i += 2
+        else:
+            ret.append((None, char))
+            i += 1
+    return ret
+
+
+def get_field_value(directive, value):
+    if directive == "b":
+        ret = "month_abbreviation(%s)" % value
+    elif directive == "y":
+        ret = "two_digit_year(int(%s))" % value
+    else:
+        ret = "int(%s)" % value
+    return ret
+
+
+def get_source(checks, fields, fallback):
+    args = [fields.get(field, "1" if field in ["month", "day"] else "0") for field in FIELDS]
+    args[0] = fields.get("year", "1900")
+    return [
+        "    if %s:" % " and ".join(checks),
+        "        try:",
+        "            return datetime.datetime(%s)" % ", ".join(args),
+        "        except (ValueError, KeyError):",
+        "            pass",
+        "    return %s(s)" % fallback,
+    ]
+
+
+# Returns the source code for a function that parses strings with a fixed width format, or None if the format is not
+# supported. Strings that don't fit the format are handed to fallback.
+def build_fixed_width_source(tokens, fallback):
+    checks = []
+    digitSlices = []
+    fields = {}
+    pos = 0
+    for i, (directive, literal) in enumerate(tokens):
+        if literal is not None:
+            checks.append("s[%d] == %r" % (pos, literal))
+            pos += 1
+        elif directive == "f":
+            # Fractions of a second have a variable width, so they are only supported at the end.
+            if i != len(tokens) - 1:
+                return None
+            fields["microsecond"] = "int(s[%d:].ljust(6, '0'))" % pos
+            digitSlices.append("s[%d:]" % pos)
+        elif directive in DIRECTIVES and DIRECTIVES[directive][2] not in fields:
+            width, minWidth, field = DIRECTIVES[directive]
+            value = "s[%d:%d]" % (pos, pos + width)
+            fields[field] = get_field_value(directive, value)
+            if directive != "b":
+                digitSlices.append(value)
+            pos += width
+        else:
+            return None
+
+    if tokens and tokens[-1][0] == "f":
+        checks.insert(0, "%d < len(s) <= %d" % (pos, pos + 6))
+    else:
+        checks.insert(0, "len(s) == %d" % pos)
+    if digitSlices:
+        checks.append("(%s).isdigit()" % " + ".join(digitSlices))
+    return ["def parse_fixed_width(s):"] + get_source(checks, fields, fallback)
+
+
+# Returns the source code for a function that parses strings where fields are separated by single characters, and
+# may not be zero-padded, or None if the format is not supported. Strings that don't fit the format are handed to
+# fallback.
+def build_separated_source(tokens, fallback):
+    # Directives and separators should alternate.
+    directives = tokens[0::2]
+    separators = tokens[1::2]
+    if len(tokens) % 2 == 0 or any(literal is not None for directive, literal in directives) or \
+            any(literal is None for directive, literal in separators):
+        return None
+
+    lines = ["def parse_separated(s):"]
+    checks = []
+    digitValues = []
+    fields = {}
+    start = "0"
+    for i, (directive, literal) in enumerate(directives):
+        if directive not in DIRECTIVES or DIRECTIVES[directive][2] in fields:
+            return None
+        width, minWidth, field = DIRECTIVES[directive]
+        value = "v%d" % i
+        if i < len(separators):
+            lines.append("    p%d = s.find(%r, %s)" % (i, separators[i][1], start))
+            lines.append("    %s = s[%s:p%d]" % (value, start, i))
+            start = "p%d + 1" % i
+        else:
+            lines.append("    %s = s[%s:]" % (value, start))
+        checks.append("%d <= len(%s) <= %d" % (minWidth, value, width))
+        fields[field] = get_field_value(directive, value)
+        if directive != "b":
+            digitValues.append(value)
+
+    # If a separator is missing find returns -1, and the resulting values will have the wrong width.
+    checks.insert(0, " and ".join("p%d >= 0" % i for i in range(len(separators))) or "True")
+    if digitValues:
+        checks.append("(%s).isdigit()" % " + ".join(digitValues))
+    return lines + get_source(checks, fields, fallback)
+
+
+# Returns the source code for a module that defines a parse function for the format, or None if the format is not
+# supported.
+def build_source(dateTimeFormat):
+    tokens = tokenize(dateTimeFormat)
+    separatedSource = build_separated_source(tokens, "strptime")
+    if separatedSource is not None:
+        fixedWidthSource = build_fixed_width_source(tokens, "parse_separated")
+    else:
+        fixedWidthSource = build_fixed_width_source(tokens, "strptime")
+    if fixedWidthSource is None:
+        return None
+
+    lines = []
+    if separatedSource is not None:
+        lines.extend(separatedSource)
+    lines.extend(fixedWidthSource)
+    lines.append("parse = parse_fixed_width")
+    return "\n".join(lines)
+
+
+class DateTimeParser(object):
+    """Parses datetimes using a format supported by datetime.datetime.strptime.
+
+    The format is compiled into a function that slices fixed width fields and converts them using int, which is a lot
+    faster than strptime. If fields are separated by single characters, strings with values that are not zero-padded
+    are handled by splitting on those. Formats with unsupported directives, and strings that don't match the compiled
+    layout, are parsed using strptime. Parsed strings are memoized, since the same string is usually found many times
+    when loading files for multiple instruments.
+
+    :param dateTimeFormat: The format.
+    :type dateTimeFormat: string.
+
+    .. note::
+        Use :func:`get_parser` instead of building instances directly.
+    """
+
+    def __init__(self, dateTimeFormat):
+        self.__dateTimeFormat = dateTimeFormat
+        self.__cache = {}
+        source = build_source(dateTimeFormat)
+        if source is None:
+            self.__parseImpl = self.__strptime
+        else:
+            namespace = {
+                "datetime": datetime,
+                "two_digit_year": two_digit_year,
+                "month_abbreviation": month_abbreviation,
+                "strptime": self.__strptime,
+            }
+            exec(source, namespace)
+            self.__parseImpl = namespace["parse"]
+
+    # Compiled functions can't be pickled, so unpickling compiles the format again.
+    def __reduce__(self):
+        return (get_parser, (self.__dateTimeFormat,))
+
+    def __strptime(self, dateString):
+        return datetime.datetime.strptime(dateString, self.__dateTimeFormat)
+
+    def getFormat(self):
+        return self.__dateTimeFormat
+
+    def isCompiled(self):
+        """Returns True if the format was compiled, or False if strptime is used."""
+        return self.__parseImpl != self.__strptime
+
+    def parse(self, dateString):
+        """Parses a string and returns a naive :class:`datetime.datetime`. It raises ValueError if dateString doesn't
+        match the format."""
+        ret = self.__cache.get(dateString)
+        if ret is None:
+            ret = self.__parseImpl(dateString)
+            if len(self.__cache) >= PARSE_CACHE_SIZE:
+                self.__cache.clear()
+            self.__cache[dateString] = ret
+        return ret
+
+
+_parsers = {}
+
+
+def get_parser(dateTimeFormat):
+    """Returns the :class:`DateTimeParser` for a given format."""
+    ret = _parsers.get(dateTimeFormat)
+    if ret is None:
+        ret = DateTimeParser(dateTimeFormat)
+        _parsers[dateTimeFormat] = ret
+    return ret
+
+
+def parse(dateString, dateTimeFormat):
+    """Parses a string like datetime.datetime.strptime does, using the :class:`DateTimeParser` for the format."""
+    return get_parser(dateTimeFormat).parse(dateString)
@@ -0,0 +1,79 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import threading
+
+from six.moves import queue
+
+
+class Wakeup(object):
+    """Used by threads to wake up a dispatcher that is waiting for events.
+
+    Notifications are not lost if they take place while the dispatcher is not waiting, so the next wait will return
+    right away.
+    """
+
+    def __init__(self):
+        self.__condition = threading.Condition()
+        self.__pending = False
+
+    def notify(self):
+        with self.__condition:
+            self.__pending = True
+            self.__condition.notify_all()
+
+    def wait(self, timeout):
+        """Waits until notified or until the timeout expires. Returns True if notified."""
+        with self.__condition:
+            if not self.__pending:
+                self.__condition.wait(timeout)
+            ret = self.__pending
+            self.__pending = False
+        return ret
+
+
+class Queue(queue.Queue):
+    """A queue that notifies a :class:`Wakeup` every time an item is put."""
+
+    def __init__(self, maxsize=0):
+        queue.Queue.__init__(self, maxsize)
+        self.__wakeup = None
+
+    def setWakeup(self, wakeup):
+        self.__wakeup = wakeup
+
+    def put(self, item, block=True, timeout=None):
+        queue.Queue.put(self, item, block, timeout)
+        wakeup = self.__wakeup
+        if wakeup is not None:
+            wakeup.notify()
+
+
+def set_queue_wakeup(queue_, wakeup):
+    """Sets the :class:`Wakeup` to notify when items are put in a queue.
+
+    :rtype: True if the queue will notify the wakeup, or False if queue\\_ is not a :class:`Queue` and has to be polled.
+    """
+
+    ret = False
+    if wakeup is not None and isinstance(queue_, Queue):
+        queue_.setWakeup(wakeup)
+        ret = True
+    return ret
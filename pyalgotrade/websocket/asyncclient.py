@@ -0,0 +1,157 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+
+This module requires Python 3.
+"""
+
+import asyncio
+import json
+
+import tornado.websocket
+
+from pyalgotrade.websocket import client
+
+
+logger = client.logger
+
+
+# Base clase for websocket clients that run in an asyncio event loop, instead of in a dedicated thread.
+# It has the same interface as client.WebSocketClientBase, but connecting and handling messages is done by the run
+# coroutine.
+class WebSocketClientBase(object):
+    def __init__(self, url):
+        self.__url = url
+        self.__connection = None
+        self.__keepAliveMgr = None
+        self.__connected = False
+        self.__stopRequested = False
+
+    # Must be set before calling run().
+    def setKeepAliveMgr(self, keepAliveMgr):
+        if self.__keepAliveMgr is not None:
+            raise Exception("KeepAliveMgr already set")
+        self.__keepAliveMgr = keepAliveMgr
+
+    def isConnected(self):
+        return self.__connected
+
+    async def run(self):
+        """Connects and handles messages until the connection gets closed. Failing to connect is handled as a
+        disconnection."""
+        try:
+            self.__connection = await tornado.websocket.websocket_connect(self.__url)
+        except Exception as e:
+            logger.error("Failed to connect: %s" % (e))
+            self.onDisconnectionDetected()
+            return
+
+        # stopClient may have been called while connecting.
+        if self.__stopRequested:
+            self.__connection.close()
+            return
+
+        self.__opened()
+        while True:
+            message = await self.__connection.read_message()
+            if message is None:
+                break
+            self.__receivedMessage(message)
+        self.__closed(self.__connection.close_code, self.__connection.close_reason)
+
+    def __receivedMessage(self, message):
+        try:
+            msg = json.loads(message)
+
+            if self.__keepAliveMgr is not None:
+                self.__keepAliveMgr.setAlive()
+                if self.__keepAliveMgr.handleResponse(msg):
+                    return
+
+            self.onMessage(msg)
+        except Exception as e:
+            self.onUnhandledException(e)
+
+    def __opened(self):
+        self.__connected = True
+        if self.__keepAliveMgr is not None:
+            self.__keepAliveMgr.start()
+            self.__keepAliveMgr.setAlive()
+        self.onOpened()
+
+    def __closed(self, code, reason):
+        wasConnected = self.__connected
+        self.__connected = False
+        if self.__keepAliveMgr:
+            self.__keepAliveMgr.stop()
+            self.__keepAliveMgr = None
+
+        if wasConnected:
+            self.onClosed(code, reason)
+
+    def send(self, payload, binary=False):
+        self.__connection.write_message(payload, binary)
+
+    def close(self, code=1000, reason=""):
+        if self.__connection is not None:
+            self.__connection.close(code, reason)
+
+    def stopClient(self):
+        self.__stopRequested = True
+        try:
+            if self.__connected:
+                self.close()
+        except Exception as e:
+            logger.warning("Failed to close connection: %s" % (e))
+
+    ######################################################################
+    # Overrides
+
+    def onUnhandledException(self, exception):
+        logger.critical("Unhandled exception", exc_info=exception)
+        raise
+
+    def onOpened(self):
+        pass
+
+    def onMessage(self, msg):
+        raise NotImplementedError()
+
+    def onClosed(self, code, reason):
+        pass
+
+    def onDisconnectionDetected(self):
+        pass
+
+
+async def run_client(buildClient, shouldReconnect, reconnectDelay):
+    """Runs websocket clients until shouldReconnect returns False. Every time the connection gets closed, a new client
+    is built after reconnectDelay seconds.
+
+    :param buildClient: A function that returns a :class:`WebSocketClientBase`.
+    :param shouldReconnect: A function that returns True if a new client should be built.
+    :param reconnectDelay: The number of seconds to wait before building a new client.
+    """
+
+    while True:
+        await buildClient().run()
+        if not shouldReconnect():
+            break
+        await asyncio.sleep(reconnectDelay)
+        if not shouldReconnect():
+            break
@@ -20,15 +20,20 @@
 
 import json
 
+import six
 from six.moves.urllib.parse import urlencode
 
 import pyalgotrade
 from pyalgotrade.websocket import client
+if six.PY3:
+    from pyalgotrade.websocket import asyncclient
 import pyalgotrade.logger
 
 
 logger = pyalgotrade.logger.getLogger("pusher")
 
+WEBSOCKET_URL = "ws://ws.pusherapp.com/app"
+
 
 # Pusher protocol reference: http://pusher.com/docs/pusher_protocol
 # Every message on a Pusher WebSocket connection is packaged as an event.
@@ -70,17 +75,17 @@ class PingKeepAliveMgr(client.KeepAliveMgr):
         return ret
 
 
-class WebSocketClient(client.WebSocketClientBase):
-    def __init__(self, appKey, protocol=5, maxInactivity=120, responseTimeout=30):
-        params = {
-            "protocol": protocol,
-            "client": "Python-PyAlgoTrade",
-            "version": pyalgotrade.__version__
-            }
-        url = "ws://ws.pusherapp.com/app/%s?%s" % (appKey, urlencode(params))
-        super(WebSocketClient, self).__init__(url)
-        self.setKeepAliveMgr(PingKeepAliveMgr(self, maxInactivity, responseTimeout))
+def build_url(appKey, protocol):
+    params = {
+        "protocol": protocol,
+        "client": "Python-PyAlgoTrade",
+        "version": pyalgotrade.__version__
+        }
+    return "%s/%s?%s" % (WEBSOCKET_URL, appKey, urlencode(params))
 
+
+# Pusher protocol handling, shared by the websocket clients. Use it along with a websocket client base class.
+class PusherProtocol(object):
     def sendEvent(self, eventType, eventData):
         msgDict = {"event": eventType}
         if eventData:
@@ -126,3 +131,18 @@ class WebSocketClient(client.WebSocketClientBase):
 
     def onUnknownEvent(self, event):
         raise NotImplementedError()
+
+
+class WebSocketClient(PusherProtocol, client.WebSocketClientBase):
+    def __init__(self, appKey, protocol=5, maxInactivity=120, responseTimeout=30):
+        super(WebSocketClient, self).__init__(build_url(appKey, protocol))
+        self.setKeepAliveMgr(PingKeepAliveMgr(self, maxInactivity, responseTimeout))
+
+
+if six.PY3:
+    class AsyncWebSocketClient(PusherProtocol, asyncclient.WebSocketClientBase):
+        """A Pusher websocket client that runs in an asyncio event loop."""
+
+        def __init__(self, appKey, protocol=5, maxInactivity=120, responseTimeout=30):
+            super(AsyncWebSocketClient, self).__init__(build_url(appKey, protocol))
+            self.setKeepAliveMgr(PingKeepAliveMgr(self, maxInactivity, responseTimeout))
@@ -0,0 +1,209 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import asyncio
+import datetime
+import threading
+import time
+
+from . import common
+from .observer_test import NonRealtimeFeed, ThreadedRealtimeFeed
+
+from pyalgotrade import observer
+from pyalgotrade import dispatcher
+from pyalgotrade import asyncdispatcher
+from pyalgotrade.utils import wakeup
+
+
+# A realtime feed that gets values from a coroutine running in the dispatcher's event loop.
+class CoroutineRealtimeFeed(observer.Subject):
+    def __init__(self, count, delay, fail=False):
+        super(CoroutineRealtimeFeed, self).__init__()
+        self.__count = count
+        self.__delay = delay
+        self.__fail = fail
+        self.__queue = wakeup.Queue()
+        self.__event = observer.Event()
+        self.__eof = False
+        self.__stopped = False
+        self.__queueNotifies = False
+
+    async def __produce(self):
+        for i in range(self.__count):
+            await asyncio.sleep(self.__delay)
+            if self.__stopped:
+                return
+            self.__queue.put(time.time())
+        if self.__fail:
+            raise Exception("Coroutine failed")
+        self.__queue.put(None)
+
+    def getEvent(self):
+        return self.__event
+
+    def start(self):
+        super(CoroutineRealtimeFeed, self).start()
+
+    def runsInEventLoop(self):
+        return True
+
+    def runAsync(self):
+        return self.__produce()
+
+    def stop(self):
+        self.__stopped = True
+
+    def join(self):
+        pass
+
+    def eof(self):
+        return self.__eof
+
+    def dispatch(self):
+        ret = False
+        try:
+            value = self.__queue.get(False)
+            if value is None:
+                self.__eof = True
+            else:
+                ret = True
+                self.__event.emit(value)
+        except wakeup.queue.Empty:
+            pass
+        return ret
+
+    def peekDateTime(self):
+        return None
+
+    def onDispatcherRegistered(self, dispatcher):
+        self.__queueNotifies = wakeup.set_queue_wakeup(self.__queue, dispatcher.getWakeup())
+
+    def supportsWakeup(self):
+        return self.__queueNotifies
+
+
+# A realtime subject that has to be polled since it doesn't support the wakeup. It never has events.
+class PolledFeed(observer.Subject):
+    def __init__(self, eof):
+        super(PolledFeed, self).__init__()
+        self.__eof = eof
+
+    def start(self):
+        super(PolledFeed, self).start()
+
+    def stop(self):
+        pass
+
+    def join(self):
+        pass
+
+    def eof(self):
+        return self.__eof()
+
+    def dispatch(self):
+        return False
+
+    def peekDateTime(self):
+        return None
+
+
+class DispatcherTestCase(common.TestCase):
+    def testNrtFeeds(self):
+        values = []
+        now = datetime.datetime.now()
+        nrtFeed1 = NonRealtimeFeed([now + datetime.timedelta(seconds=i) for i in range(0, 10, 2)])
+        nrtFeed1.getEvent().subscribe(lambda dateTime: values.append(dateTime))
+        nrtFeed2 = NonRealtimeFeed([now + datetime.timedelta(seconds=i) for i in range(1, 10, 2)])
+        nrtFeed2.getEvent().subscribe(lambda dateTime: values.append(dateTime))
+
+        disp = asyncdispatcher.Dispatcher()
+        disp.addSubject(nrtFeed1)
+        disp.addSubject(nrtFeed2)
+        disp.run()
+
+        self.assertEqual(values, [now + datetime.timedelta(seconds=i) for i in range(10)])
+
+    def testCoroutineFeed(self):
+        latencies = []
+        idleEvents = []
+        feed = CoroutineRealtimeFeed(10, 0.05)
+        feed.getEvent().subscribe(lambda putTime: latencies.append(time.time() - putTime))
+
+        disp = asyncdispatcher.Dispatcher()
+        disp.addSubject(feed)
+        disp.getIdleEvent().subscribe(lambda: idleEvents.append(1))
+        disp.run()
+
+        self.assertEqual(len(latencies), 10)
+        self.assertLess(max(latencies), 0.1)
+        # The dispatcher awaits the wakeup while idle instead of polling.
+        self.assertLess(len(idleEvents), 25)
+
+    def testCoroutineAndThreadedFeeds(self):
+        values = []
+        feed1 = CoroutineRealtimeFeed(5, 0.02)
+        feed1.getEvent().subscribe(lambda putTime: values.append(putTime))
+        feed2 = ThreadedRealtimeFeed(5, 0.02)
+        feed2.getEvent().subscribe(lambda putTime: values.append(putTime))
+
+        disp = asyncdispatcher.Dispatcher()
+        disp.addSubject(feed1)
+        disp.addSubject(feed2)
+        disp.run()
+
+        self.assertEqual(len(values), 10)
+
+    def testPolledSubjects(self):
+        values = []
+        idleEvents = []
+        feed = CoroutineRealtimeFeed(5, 0.05)
+        feed.getEvent().subscribe(lambda putTime: values.append(putTime))
+
+        disp = asyncdispatcher.Dispatcher()
+        disp.addSubject(feed)
+        disp.addSubject(PolledFeed(feed.eof))
+        disp.getIdleEvent().subscribe(lambda: idleEvents.append(1))
+        disp.run()
+
+        self.assertEqual(len(values), 5)
+        # The dispatcher sleeps between passes instead of spinning.
+        self.assertLess(len(idleEvents), 0.25 / asyncdispatcher.POLL_INTERVAL * 2)
+
+    def testStopWakesUp(self):
+        disp = asyncdispatcher.Dispatcher()
+        # A feed that won't produce values for a long time.
+        feed = CoroutineRealtimeFeed(1, 10)
+        disp.addSubject(feed)
+        disp.getStartEvent().subscribe(lambda: threading.Timer(0.05, disp.stop).start())
+        begin = time.time()
+        disp.run()
+        # The coroutine gets cancelled after the shutdown timeout.
+        self.assertLess(time.time() - begin, asyncdispatcher.SHUTDOWN_TIMEOUT + dispatcher.Dispatcher.WAKEUP_TIMEOUT)
+
+    def testCoroutineFailure(self):
+        disp = asyncdispatcher.Dispatcher()
+        disp.addSubject(CoroutineRealtimeFeed(1, 0.01, fail=True))
+        with self.assertRaisesRegexp(Exception, "Coroutine failed"):
+            disp.run()
+
+    def testRequiresAsyncDispatcher(self):
+        disp = dispatcher.Dispatcher()
+        with self.assertRaisesRegexp(Exception, "has to be used with pyalgotrade.asyncdispatcher.Dispatcher"):
+            disp.addSubject(CoroutineRealtimeFeed(1, 0.01))
@@ -40,6 +40,39 @@ class BasicBarTestCase(common.TestCase):
         with self.assertRaises(Exception):
             bar.BasicBar(datetime.datetime.now(), 1, 1, 1.5, 1, 1, 1, bar.Frequency.DAY)
 
+    def testTrustedConstruction(self):
+        dt = datetime.datetime.now()
+        b1 = bar.BasicBar(dt, 2, 3, 1, 2.1, 10, 5, bar.Frequency.DAY, {"extra": 1})
+        b2 = bar.BasicBar.fromTrustedValues(dt, 2, 3, 1, 2.1, 10, 5, bar.Frequency.DAY, {"extra": 1})
+        self.assertEquals(b1.__getstate__(), b2.__getstate__())
+        self.assertEquals(b2.getHigh(), 3)
+        self.assertEquals(b2.getLow(), 1)
+        self.assertEquals(b2.getPrice(), 2.1)
+        # Values are not checked.
+        bar.BasicBar.fromTrustedValues(dt, 2, 1, 1, 1, 1, 1, bar.Frequency.DAY)
+
+    def testAdjustedValues(self):
+        dt = datetime.datetime.now()
+        for b in [
+            bar.BasicBar(dt, 2, 3, 1, 2.1, 10, 5, bar.Frequency.DAY),
+            bar.BasicBar.fromTrustedValues(dt, 2, 3, 1, 2.1, 10, 5, bar.Frequency.DAY),
+            cPickle.loads(cPickle.dumps(bar.BasicBar(dt, 2, 3, 1, 2.1, 10, 5, bar.Frequency.DAY))),
+        ]:
+            self.assertAlmostEqual(b.getOpen(True), 5 * 2 / 2.1)
+            self.assertAlmostEqual(b.getHigh(True), 5 * 3 / 2.1)
+            self.assertAlmostEqual(b.getLow(True), 5 * 1 / 2.1)
+            self.assertEquals(b.getClose(True), 5)
+
+        b = bar.BasicBar.fromTrustedValues(dt, 2, 3, 1, 2.1, 10, 5, bar.Frequency.DAY, adjFactor=2)
+        self.assertEquals(b.getOpen(True), 4)
+        self.assertEquals(b.getHigh(True), 6)
+        self.assertEquals(b.getLow(True), 2)
+
+        # Bars with a close of 0 can't be adjusted.
+        b = bar.BasicBar(dt, 0, 0, 0, 0, 10, 5, bar.Frequency.DAY)
+        with self.assertRaises(ZeroDivisionError):
+            b.getOpen(True)
+
     def testTypicalPrice(self):
         b = bar.BasicBar(datetime.datetime.now(), 2, 3, 1, 2.1, 10, 5, bar.Frequency.DAY)
         self.assertEquals(b.getTypicalPrice(), (3 + 1 + 2.1) / 3)
@@ -100,8 +133,22 @@ class BarsTestCase(common.TestCase):
         self.assertEquals(bars["a"].getClose(), 1)
         self.assertEquals(bars["b"].getClose(), 2)
         self.assertTrue("a" in bars)
-        self.assertEquals(bars.items(), [("a", b1), ("b", b2)])
-        self.assertEquals(bars.keys(), ["a", "b"])
-        self.assertEquals(bars.getInstruments(), ["a", "b"])
+        self.assertEquals(bars.items(), (("a", b1), ("b", b2)))
+        self.assertEquals(bars.keys(), ("a", "b"))
+        self.assertEquals(bars.getInstruments(), ("a", "b"))
+        # Accessors are cached.
+        self.assertTrue(bars.items() is bars.items())
+        self.assertTrue(bars.getInstruments() is bars.getInstruments())
         self.assertEquals(bars.getDateTime(), dt)
         self.assertEquals(bars.getBar("a").getClose(), 1)
+
+    def testTrustedConstruction(self):
+        dt = datetime.datetime.now()
+        b1 = bar.BasicBar(dt, 1, 1, 1, 1, 10, 1, bar.Frequency.DAY)
+        b2 = bar.BasicBar(dt, 2, 2, 2, 2, 10, 2, bar.Frequency.DAY)
+        bars = bar.Bars.fromTrustedBars({"a": b1, "b": b2}, dt)
+        self.assertEquals(bars.getDateTime(), dt)
+        self.assertEquals(bars.getInstruments(), ("a", "b"))
+        self.assertEquals(bars.items(), (("a", b1), ("b", b2)))
+        self.assertEquals(bars.getBar("b").getClose(), 2)
+        self.assertTrue("a" in bars)
@@ -19,13 +19,19 @@
 """
 
 import datetime
+import gzip
+import os
 
 from . import common
 
 from pyalgotrade import barfeed
 from pyalgotrade.barfeed import common as bfcommon
+from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.barfeed import membf
 from pyalgotrade import bar
 from pyalgotrade import dispatcher
+from pyalgotrade.technical import linebreak
+from pyalgotrade.technical import ma
 
 
 def check_base_barfeed(testCase, barFeed, barsHaveAdjClose):
@@ -88,3 +94,261 @@ class CommonTestCase(common.TestCase):
         self.assertEqual(bfcommon.sanitize_ohlc(10, 9, 9, 10), (10, 10, 9, 10))
         self.assertEqual(bfcommon.sanitize_ohlc(10, 12, 11, 10), (10, 12, 10, 10))
         self.assertEqual(bfcommon.sanitize_ohlc(10, 12, 10, 9), (10, 12, 9, 9))
+
+
+class MemBarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return True
+
+
+class OnDemandDataSeriesTestCase(common.TestCase):
+    def __buildFeed(self, maxLen=None):
+        ret = MemBarFeed(bar.Frequency.DAY, maxLen)
+        ret.setOnDemandDataSeries(True)
+        for instrument, price in [("orcl", 10), ("aapl", 20), ("ibm", 30)]:
+            bars = []
+            for day in range(1, 11):
+                value = price + day
+                dateTime = datetime.datetime(2001, 1, day)
+                bars.append(bar.BasicBar(dateTime, value, value, value, value, 1, 1, bar.Frequency.DAY))
+            ret.addBarsFromSequence(instrument, bars)
+        return ret
+
+    def testOnlyRequestedDataSeriesAreUpdated(self):
+        barFeed = self.__buildFeed()
+        self.assertEqual(barFeed.getRegisteredInstruments(), ["orcl", "aapl", "ibm"])
+        self.assertIn("orcl", barFeed)
+        self.assertFalse(barFeed.hasDataSeries("orcl"))
+        closeDS = barFeed["orcl"].getCloseDataSeries()
+        self.assertTrue(barFeed.hasDataSeries("orcl"))
+
+        for dateTime, bars in barFeed:
+            pass
+        self.assertEqual(closeDS[:], [10 + day for day in range(1, 11)])
+        self.assertFalse(barFeed.hasDataSeries("aapl"))
+        self.assertFalse(barFeed.hasDataSeries("ibm"))
+        self.assertEqual(barFeed.getLastBar("ibm").getClose(), 40)
+        with self.assertRaises(KeyError):
+            barFeed["msft"]
+
+    def testBackfill(self):
+        barFeed = self.__buildFeed(maxLen=3)
+        barFeed.start()
+        for i in range(5):
+            barFeed.getNextValuesAndUpdateDS()
+        self.assertEqual(barFeed["aapl"].getCloseDataSeries()[:], [23, 24, 25])
+        self.assertEqual(barFeed["aapl"].getDateTimes()[-1], datetime.datetime(2001, 1, 5))
+        barFeed.getNextValuesAndUpdateDS()
+        self.assertEqual(barFeed["aapl"].getCloseDataSeries()[:], [24, 25, 26])
+
+    def testAdjustedValues(self):
+        barFeed = MemBarFeed(bar.Frequency.DAY)
+        barFeed.setOnDemandDataSeries(True)
+        barFeed.addBarsFromSequence("orcl", [
+            bar.BasicBar(datetime.datetime(2001, 1, 1), 10, 10, 10, 10, 1, 5, bar.Frequency.DAY)
+        ])
+        barFeed.setUseAdjustedValues(True)
+        for dateTime, bars in barFeed:
+            pass
+        self.assertFalse(barFeed.hasDataSeries("orcl"))
+        self.assertEqual(barFeed.getLastBar("orcl").getPrice(), 5)
+
+    def testDisableOnDemand(self):
+        barFeed = self.__buildFeed()
+        barFeed.start()
+        barFeed.getNextValuesAndUpdateDS()
+        barFeed.setOnDemandDataSeries(False)
+        self.assertTrue(barFeed.hasDataSeries("ibm"))
+        barFeed.getNextValuesAndUpdateDS()
+        self.assertEqual(barFeed["ibm"].getCloseDataSeries()[:], [31, 32])
+
+    def testAutoMaxLen(self):
+        barFeed = self.__buildFeed()
+        barFeed.setAutoMaxLen(3)
+        self.assertEqual(barFeed["orcl"].getMaxLen(), 3)
+        self.assertEqual(barFeed["orcl"].getCloseDataSeries().getMaxLen(), 3)
+        lineBreak = linebreak.LineBreak(barFeed["orcl"], 5)
+        self.assertEqual(lineBreak.getMaxLen(), 5)
+        sma = ma.SMA(barFeed["orcl"].getCloseDataSeries(), 5)
+
+        for dateTime, bars in barFeed:
+            pass
+        # The SMA declares its lookback on the close dataseries.
+        self.assertEqual(barFeed["orcl"].getCloseDataSeries()[:], [16, 17, 18, 19, 20])
+        self.assertEqual([round(value, 4) for value in sma[:]], [16, 17, 18])
+        self.assertEqual(barFeed["aapl"].getMaxLen(), 3)
+
+
+def write_csv(path, startDateTime, count, step):
+    lines = ["Date Time,Open,High,Low,Close,Volume,Adj Close"]
+    for i in range(count):
+        dateTime = startDateTime + datetime.timedelta(minutes=i * step)
+        lines.append("%s,%d,%d,%d,%d,%d,%d" % (dateTime.strftime("%Y-%m-%d %H:%M:%S"), i, i + 2, i, i + 1, i, i))
+    content = "\n".join(lines) + "\n"
+    if path.endswith(".gz"):
+        with gzip.open(path, "wb") as f:
+            f.write(content.encode("ascii"))
+    else:
+        with open(path, "w") as f:
+            f.write(content)
+
+
+# Keeps track of the files opened by csvfeed.
+class OpenFileTracker(object):
+    def __init__(self):
+        self.__files = []
+        self.__openFile = None
+
+    def __enter__(self):
+        self.__openFile = csvfeed.open_file
+        csvfeed.open_file = self.__trackOpenFile
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        csvfeed.open_file = self.__openFile
+
+    def __trackOpenFile(self, path):
+        ret = self.__openFile(path)
+        self.__files.append(ret)
+        return ret
+
+    def getFiles(self):
+        return self.__files
+
+    def getOpenCount(self):
+        return len([f for f in self.__files if not f.closed])
+
+
+def load_all(barFeed):
+    ret = []
+    for dateTime, bars in barFeed:
+        ret.append((dateTime, sorted((instrument, bar_.getClose()) for instrument, bar_ in bars.items())))
+    return ret
+
+
+class GenericBarFeedTestCase(common.TestCase):
+    def testAddBarsFromCSVFiles(self):
+        with common.TmpDir() as tmpPath:
+            files = []
+            for i in range(5):
+                path = os.path.join(tmpPath, "%d.csv" % i)
+                write_csv(path, datetime.datetime(2018, 1, 1, i), 100, i + 1)
+                files.append(("inst%d" % i, path))
+
+            expectedFeed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+            for instrument, path in files:
+                expectedFeed.addBarsFromCSV(instrument, path)
+            expected = load_all(expectedFeed)
+
+            for maxWorkers in [1, 3]:
+                barFeed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+                barFeed.addBarsFromCSVFiles(files, maxWorkers=maxWorkers)
+                self.assertTrue(barFeed.barsHaveAdjClose())
+                self.assertEqual(sorted(barFeed.getRegisteredInstruments()), [instrument for instrument, _ in files])
+                self.assertEqual(load_all(barFeed), expected)
+
+    def testAddBarsFromCSVFilesWithErrors(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "malformed.csv")
+            with open(path, "w") as f:
+                f.write("Date Time,Open,High,Low,Close,Volume,Adj Close\n")
+                f.write("2000-01-03 00:00:00,1,1,1,1,1,1\n")
+                f.write("2000-01-04 00:00:00,1,1,1,1,x,1\n")
+            files = [("a", path), ("b", path)]
+
+            barFeed = csvfeed.GenericBarFeed(bar.Frequency.DAY)
+            with self.assertRaises(ValueError):
+                barFeed.addBarsFromCSVFiles(files, maxWorkers=2)
+
+            barFeed = csvfeed.GenericBarFeed(bar.Frequency.DAY)
+            barFeed.addBarsFromCSVFiles(files, skipMalformedBars=True, maxWorkers=2)
+            self.assertEqual(len(load_all(barFeed)), 1)
+
+
+class StreamingBarFeedTestCase(common.TestCase):
+    def __buildFeeds(self, tmpPath, readAheadSize, maxOpenFiles=csvfeed.MAX_OPEN_FILES):
+        files = {
+            "a": (os.path.join(tmpPath, "a.csv"), datetime.datetime(2018, 1, 1), 100, 1),
+            "b": (os.path.join(tmpPath, "b.csv.gz"), datetime.datetime(2018, 1, 1, 0, 30), 50, 2),
+            "c": (os.path.join(tmpPath, "c.csv"), datetime.datetime(2018, 1, 1), 10, 3),
+        }
+        streamingFeed = csvfeed.StreamingGenericBarFeed(
+            bar.Frequency.MINUTE, readAheadSize=readAheadSize, maxOpenFiles=maxOpenFiles
+        )
+        genericFeed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+        for instrument, (path, startDateTime, count, step) in sorted(files.items()):
+            write_csv(path, startDateTime, count, step)
+            streamingFeed.addBarsFromCSV(instrument, path)
+            # GenericBarFeed can't load gzip compressed files.
+            if path.endswith(".gz"):
+                path = path[:-3]
+                write_csv(path, startDateTime, count, step)
+            genericFeed.addBarsFromCSV(instrument, path)
+        return streamingFeed, genericFeed
+
+    def testBaseBarFeed(self):
+        with common.TmpDir() as tmpPath:
+            barFeed, _ = self.__buildFeeds(tmpPath, 7)
+            check_base_barfeed(self, barFeed, True)
+            self.assertTrue(barFeed.eof())
+            self.assertEqual(len(barFeed["a"]), 100)
+            self.assertEqual(len(barFeed["b"]), 50)
+            self.assertEqual(len(barFeed["c"]), 10)
+
+    def testSameAsGenericBarFeed(self):
+        with common.TmpDir() as tmpPath:
+            for readAheadSize in [1, 3, 1000]:
+                streamingFeed, genericFeed = self.__buildFeeds(tmpPath, readAheadSize)
+                streamingBars = load_all(streamingFeed)
+                self.assertEqual(streamingBars, load_all(genericFeed))
+                self.assertEqual(len(streamingBars), 115)
+
+    def testReset(self):
+        with common.TmpDir() as tmpPath:
+            barFeed, _ = self.__buildFeeds(tmpPath, 4)
+            expected = load_all(barFeed)
+            barFeed.reset()
+            self.assertEqual(load_all(barFeed), expected)
+
+    def testMaxOpenFiles(self):
+        with common.TmpDir() as tmpPath, OpenFileTracker() as tracker:
+            streamingFeed, genericFeed = self.__buildFeeds(tmpPath, 4, maxOpenFiles=2)
+            maxOpenCount = 0
+            for dateTime, bars in streamingFeed:
+                maxOpenCount = max(maxOpenCount, tracker.getOpenCount())
+            self.assertEqual(maxOpenCount, 2)
+            self.assertEqual(tracker.getOpenCount(), 0)
+
+            streamingFeed.reset()
+            self.assertEqual(load_all(streamingFeed), load_all(genericFeed))
+
+    def testLargeGzipFile(self):
+        with common.TmpDir() as tmpPath, OpenFileTracker() as tracker:
+            path = os.path.join(tmpPath, "orcl.csv.gz")
+            write_csv(path, datetime.datetime(2018, 1, 1), 1000, 1)
+            barFeed = csvfeed.StreamingGenericBarFeed(bar.Frequency.MINUTE, readAheadSize=7)
+            barFeed.addBarsFromCSV("orcl", path)
+            bars = load_all(barFeed)
+            self.assertEqual([closes for _, closes in bars], [[("orcl", i + 1)] for i in range(1000)])
+            # The file is kept open between chunks instead of being decompressed again for every chunk.
+            self.assertEqual(len(tracker.getFiles()), 1)
+            self.assertEqual(tracker.getOpenCount(), 0)
+
+    def testNotInAscendingOrder(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "orcl.csv")
+            with open(path, "w") as f:
+                f.write("Date Time,Open,High,Low,Close,Volume,Adj Close\n")
+                f.write("2000-01-04 00:00:00,1,1,1,1,1,1\n")
+                f.write("2000-01-03 00:00:00,1,1,1,1,1,1\n")
+            barFeed = csvfeed.StreamingGenericBarFeed(bar.Frequency.DAY)
+            with self.assertRaisesRegexp(Exception, "Bars in .* are not in ascending order.*"):
+                barFeed.addBarsFromCSV("orcl", path)
+
+    def testCantAddAfterStart(self):
+        with common.TmpDir() as tmpPath:
+            barFeed, _ = self.__buildFeeds(tmpPath, 4)
+            barFeed.start()
+            with self.assertRaisesRegexp(Exception, "Can't add more bars once you started consuming bars"):
+                barFeed.addBarsFromCSV("d", os.path.join(tmpPath, "a.csv"))
+            barFeed.stop()
@@ -24,26 +24,34 @@ import time
 import threading
 import json
 
-from six.moves import queue
+import six
+from ws4py import websocket
 
 from . import common as tc_common
 from . import test_strategy
+from . import websocket_server
 
+from pyalgotrade import bar
 from pyalgotrade import broker as basebroker
 from pyalgotrade.bitstamp import barfeed
 from pyalgotrade.bitstamp import broker
 from pyalgotrade.bitstamp import wsclient
 from pyalgotrade.bitstamp import httpclient
 from pyalgotrade.bitstamp import common
+from pyalgotrade.bitstamp import orderbook
 from pyalgotrade.bitcoincharts import barfeed as btcbarfeed
 from pyalgotrade import strategy
 from pyalgotrade import dispatcher
+from pyalgotrade.utils import wakeup
+from pyalgotrade.websocket import pusher
+if six.PY3:
+    from pyalgotrade import asyncdispatcher
 
 
 class WebSocketClientThreadMock(threading.Thread):
     def __init__(self, events):
         threading.Thread.__init__(self)
-        self.__queue = queue.Queue()
+        self.__queue = wakeup.Queue()
         self.__queue.put((wsclient.WebSocketClient.Event.CONNECTED, None))
         for event in events:
             self.__queue.put(event)
@@ -64,9 +72,19 @@ class WebSocketClientThreadMock(threading.Thread):
         self.__stop = True
 
 
+def build_order_book_update(dateTime, bids, asks):
+    eventDict = {
+        "data": json.dumps({
+            "bids": [[str(price), str(volume)] for price, volume in bids],
+            "asks": [[str(price), str(volume)] for price, volume in asks],
+        })
+    }
+    return wsclient.OrderBookUpdate(dateTime, eventDict)
+
+
 class TestingLiveTradeFeed(barfeed.LiveTradeFeed):
-    def __init__(self):
-        barfeed.LiveTradeFeed.__init__(self)
+    def __init__(self, **kwargs):
+        barfeed.LiveTradeFeed.__init__(self, **kwargs)
         # Disable reconnections so the test finishes when ON_DISCONNECTED is pushed.
         self.enableReconection(False)
         self.__events = []
@@ -82,10 +100,32 @@ class TestingLiveTradeFeed(barfeed.LiveTradeFeed):
         eventDict["data"] = json.dumps(dataDict)
         self.__events.append((wsclient.WebSocketClient.Event.TRADE, wsclient.Trade(dateTime, eventDict)))
 
+    def addOrderBookUpdate(self, dateTime, bids, asks):
+        orderBookUpdate = build_order_book_update(dateTime, bids, asks)
+        self.__events.append((wsclient.WebSocketClient.Event.ORDER_BOOK_UPDATE, orderBookUpdate))
+
     def buildWebSocketClientThread(self):
         return WebSocketClientThreadMock(self.__events)
 
 
+# Behaves like the Bitstamp Pusher server: sends a trade and an order book update once subscribed to the channels.
+class PusherServerMock(websocket.WebSocket):
+    def __sendEvent(self, event, data, channel=None):
+        msg = {"event": event, "data": json.dumps(data)}
+        if channel is not None:
+            msg["channel"] = channel
+        self.send(json.dumps(msg))
+
+    def opened(self):
+        self.__sendEvent("pusher:connection_established", {"socket_id": "1.1", "activity_timeout": 120})
+
+    def received_message(self, message):
+        msg = json.loads(message.data.decode("utf-8"))
+        if msg.get("event") == "pusher:subscribe" and msg["data"]["channel"] == "order_book":
+            self.__sendEvent("trade", {"id": 1, "price": 100.1, "amount": 0.5, "type": 0}, "live_trades")
+            self.__sendEvent("data", {"bids": [["100", "1.5"]], "asks": [["101", "2.5"]]}, "order_book")
+
+
 class HTTPClientMock(object):
     class UserTransactionType:
         MARKET_TRADE = 2
@@ -188,6 +228,190 @@ class TestingLiveBroker(broker.LiveBroker):
         return self.__httpClient
 
 
+class OrderBookTestCase(tc_common.TestCase):
+    def testUpdate(self):
+        book = orderbook.OrderBook()
+        self.assertIsNone(book.getBestBid())
+        self.assertIsNone(book.getBestAsk())
+        self.assertIsNone(book.getMidPrice())
+
+        change = book.update(build_order_book_update(
+            datetime.datetime(2000, 1, 1), [(100, 1), (99, 2), (98, 3)], [(101, 4), (102, 5)]
+        ))
+        self.assertEqual(change.getDateTime(), datetime.datetime(2000, 1, 1))
+        self.assertEqual(sorted(change.getBidChanges()), [(98, 3), (99, 2), (100, 1)])
+        self.assertEqual(sorted(change.getAskChanges()), [(101, 4), (102, 5)])
+        self.assertTrue(change.topOfBookChanged())
+        self.assertEqual(book.getBestBid(), 100)
+        self.assertEqual(book.getBestAsk(), 101)
+        self.assertEqual(book.getMidPrice(), 100.5)
+        self.assertEqual(book.getSpread(), 1)
+        self.assertEqual(book.getImbalance(), (1 - 4) / 5.0)
+        self.assertEqual(book.getBids().getLevels(), [(100, 1), (99, 2), (98, 3)])
+        self.assertEqual(book.getAsks().getLevels(2), [(101, 4), (102, 5)])
+
+        # Only levels that changed are reported.
+        change = book.update(build_order_book_update(
+            datetime.datetime(2000, 1, 2), [(100, 1), (99, 2.5), (97, 1)], [(101, 4), (102, 5)]
+        ))
+        self.assertEqual(sorted(change.getBidChanges()), [(97, 1), (98, 0), (99, 2.5)])
+        self.assertEqual(change.getAskChanges(), [])
+        self.assertFalse(change.topOfBookChanged())
+        self.assertEqual(book.getBids().getLevels(), [(100, 1), (99, 2.5), (97, 1)])
+        self.assertEqual(book.getBids().getVolume(98), 0)
+
+        # Nothing changed.
+        self.assertIsNone(book.update(build_order_book_update(
+            datetime.datetime(2000, 1, 3), [(100, 1), (99, 2.5), (97, 1)], [(101, 4), (102, 5)]
+        )))
+        self.assertFalse(book.topOfBookChanged())
+
+        # The best ask gets removed.
+        change = book.update(build_order_book_update(
+            datetime.datetime(2000, 1, 4), [(100, 1), (99, 2.5), (97, 1)], [(102, 5)]
+        ))
+        self.assertEqual(change.getAskChanges(), [(101, 0)])
+        self.assertTrue(change.topOfBookChanged())
+        self.assertEqual(book.getBestAsk(), 102)
+        self.assertEqual(book.getSpread(), 2)
+
+    def testDepth(self):
+        book = orderbook.OrderBook()
+        book.update(build_order_book_update(
+            datetime.datetime(2000, 1, 1), [(100, 1), (99, 2), (98, 3)], [(101, 4), (102, 5)]
+        ))
+        bids = book.getBids()
+        self.assertEqual(len(bids), 3)
+        self.assertEqual(bids.getTotalVolume(), 6)
+        self.assertEqual(bids.getCumulativeVolume(101), 0)
+        self.assertEqual(bids.getCumulativeVolume(100), 1)
+        self.assertEqual(bids.getCumulativeVolume(98.5), 3)
+        self.assertEqual(bids.getCumulativeVolume(90), 6)
+        self.assertEqual(bids.getPriceForVolume(1), 100)
+        self.assertEqual(bids.getPriceForVolume(1.5), 99)
+        self.assertEqual(bids.getPriceForVolume(6), 98)
+        self.assertIsNone(bids.getPriceForVolume(7))
+
+        asks = book.getAsks()
+        self.assertEqual(asks.getCumulativeVolume(100), 0)
+        self.assertEqual(asks.getCumulativeVolume(101.5), 4)
+        self.assertEqual(asks.getPriceForVolume(5), 102)
+
+        # Cumulative volumes are updated after changes.
+        book.update(build_order_book_update(
+            datetime.datetime(2000, 1, 2), [(100, 1), (98, 3)], [(100.5, 1), (101, 4), (102, 5)]
+        ))
+        self.assertEqual(bids.getCumulativeVolume(98.5), 1)
+        self.assertEqual(asks.getCumulativeVolume(101.5), 5)
+        self.assertEqual(asks.getTotalVolume(), 10)
+
+    def testLiveTradeFeed(self):
+        changes = []
+        barFeed = TestingLiveTradeFeed()
+        barFeed.addTrade(datetime.datetime(2000, 1, 1), 1, 100, 0.1)
+        barFeed.addOrderBookUpdate(datetime.datetime(2000, 1, 1), [(100, 1)], [(101, 1)])
+        barFeed.addOrderBookUpdate(datetime.datetime(2000, 1, 2), [(100, 1)], [(101, 1)])
+        barFeed.addOrderBookUpdate(datetime.datetime(2000, 1, 3), [(100, 2)], [(101, 1)])
+        barFeed.getOrderBookChangeEvent().subscribe(lambda change: changes.append(change.getBidChanges()))
+
+        disp = dispatcher.Dispatcher()
+        disp.addSubject(barFeed)
+        disp.run()
+
+        self.assertEqual(changes, [[(100, 1)], [(100, 2)]])
+        self.assertEqual(barFeed.getOrderBook().getBestBid(), 100)
+        self.assertEqual(barFeed.getOrderBook().getDateTime(), datetime.datetime(2000, 1, 3))
+
+
+class LiveTradeFeedTestCase(tc_common.TestCase):
+    def __run(self, barFeed):
+        ret = []
+        barFeed.getNewValuesEvent().subscribe(lambda dateTime, bars: ret.append(bars[common.btc_symbol]))
+        disp = dispatcher.Dispatcher()
+        disp.addSubject(barFeed)
+        disp.run()
+        return ret
+
+    def testTradeBars(self):
+        barFeed = TestingLiveTradeFeed()
+        barFeed.addTrade(datetime.datetime(2000, 1, 1), 1, 100, 0.1)
+        barFeed.addTrade(datetime.datetime(2000, 1, 1), 2, 101, 0.2)
+        bars = self.__run(barFeed)
+
+        self.assertEqual(len(bars), 2)
+        self.assertEqual(bars[0].getFrequency(), bar.Frequency.TRADE)
+        self.assertEqual(bars[0].getTradeId(), 1)
+        self.assertEqual(bars[1].getDateTime(), datetime.datetime(2000, 1, 1, 0, 0, 0, 1))
+        self.assertEqual(bars[1].getClose(), 101)
+
+    def testTimeBars(self):
+        barFeed = TestingLiveTradeFeed(frequency=bar.Frequency.MINUTE)
+        barFeed.addTrade(datetime.datetime(2000, 1, 1, 0, 0, 10), 1, 100, 0.1)
+        barFeed.addTrade(datetime.datetime(2000, 1, 1, 0, 0, 20), 2, 102, 0.2)
+        barFeed.addTrade(datetime.datetime(2000, 1, 1, 0, 0, 30), 3, 99, 0.3)
+        barFeed.addTrade(datetime.datetime(2000, 1, 1, 0, 0, 40), 4, 101, 0.4)
+        barFeed.addTrade(datetime.datetime(2000, 1, 1, 0, 1, 5), 5, 103, 1)
+        barFeed.addTrade(datetime.datetime(2000, 1, 1, 0, 3, 0), 6, 104, 2)
+        bars = self.__run(barFeed)
+
+        self.assertEqual(len(bars), 3)
+        self.assertEqual(bars[0].getDateTime(), datetime.datetime(2000, 1, 1))
+        self.assertEqual(bars[0].getFrequency(), bar.Frequency.MINUTE)
+        self.assertEqual(bars[0].getOpen(), 100)
+        self.assertEqual(bars[0].getHigh(), 102)
+        self.assertEqual(bars[0].getLow(), 99)
+        self.assertEqual(bars[0].getClose(), 101)
+        self.assertAlmostEqual(bars[0].getVolume(), 1)
+        self.assertEqual(bars[1].getDateTime(), datetime.datetime(2000, 1, 1, 0, 1))
+        self.assertEqual(bars[1].getClose(), 103)
+        # The last bar is pushed once disconnected.
+        self.assertEqual(bars[2].getDateTime(), datetime.datetime(2000, 1, 1, 0, 3))
+        self.assertEqual(bars[2].getVolume(), 2)
+
+    def testVolumeBars(self):
+        barFeed = TestingLiveTradeFeed(volumeBarSize=1)
+        barFeed.addTrade(datetime.datetime(2000, 1, 1, 0, 0, 1), 1, 100, 0.5)
+        barFeed.addTrade(datetime.datetime(2000, 1, 1, 0, 0, 2), 2, 102, 0.6)
+        barFeed.addTrade(datetime.datetime(2000, 1, 1, 0, 0, 3), 3, 99, 0.2)
+        barFeed.addTrade(datetime.datetime(2000, 1, 1, 0, 0, 4), 4, 98, 0.8)
+        barFeed.addTrade(datetime.datetime(2000, 1, 1, 0, 0, 5), 5, 97, 0.1)
+        bars = self.__run(barFeed)
+
+        self.assertEqual(len(bars), 3)
+        self.assertEqual(bars[0].getDateTime(), datetime.datetime(2000, 1, 1, 0, 0, 1))
+        self.assertEqual(bars[0].getOpen(), 100)
+        self.assertEqual(bars[0].getClose(), 102)
+        self.assertAlmostEqual(bars[0].getVolume(), 1.1)
+        self.assertEqual(bars[1].getDateTime(), datetime.datetime(2000, 1, 1, 0, 0, 3))
+        self.assertEqual(bars[1].getLow(), 98)
+        self.assertAlmostEqual(bars[1].getVolume(), 1)
+        # The last bar is pushed once disconnected, even if incomplete.
+        self.assertEqual(bars[2].getDateTime(), datetime.datetime(2000, 1, 1, 0, 0, 5))
+        self.assertAlmostEqual(bars[2].getVolume(), 0.1)
+
+    def testCoalescePendingBars(self):
+        barFeed = TestingLiveTradeFeed(maxPendingBars=2)
+        for i in range(5):
+            barFeed.addTrade(datetime.datetime(2000, 1, 1, 0, 0, i), i, 100 + i, 0.1)
+        bars = self.__run(barFeed)
+
+        # All the trades were queued, so they were coalesced into a single bar.
+        self.assertEqual(len(bars), 1)
+        self.assertEqual(bars[0].getDateTime(), datetime.datetime(2000, 1, 1, 0, 0, 4))
+        self.assertEqual(bars[0].getOpen(), 100)
+        self.assertEqual(bars[0].getHigh(), 104)
+        self.assertEqual(bars[0].getClose(), 104)
+        self.assertAlmostEqual(bars[0].getVolume(), 0.5)
+
+    def testInvalidParameters(self):
+        with self.assertRaisesRegexp(Exception, "Volume bars require bar.Frequency.TRADE"):
+            barfeed.LiveTradeFeed(frequency=bar.Frequency.MINUTE, volumeBarSize=1)
+        with self.assertRaisesRegexp(Exception, "volumeBarSize must be greater than 0"):
+            barfeed.LiveTradeFeed(volumeBarSize=0)
+        with self.assertRaisesRegexp(Exception, "maxPendingBars must be greater than 0"):
+            barfeed.LiveTradeFeed(maxPendingBars=0)
+
+
 class NonceTest(unittest.TestCase):
     def testNonceGenerator(self):
         gen = httpclient.NonceGenerator()
@@ -672,3 +896,84 @@ class WebSocketTestCase(tc_common.TestCase):
         # Check that we received both events.
         self.assertTrue(events["on_bars"])
         self.assertTrue(events["on_order_book_updated"])
+
+
+@unittest.skipIf(six.PY2, "asyncio requires Python 3")
+class AsyncWebSocketTestCase(tc_common.TestCase):
+    def setUp(self):
+        super(AsyncWebSocketTestCase, self).setUp()
+        self.__server = websocket_server.run_websocket_server_thread("127.0.0.1", 0, PusherServerMock)
+        self.__origURL = pusher.WEBSOCKET_URL
+        pusher.WEBSOCKET_URL = "ws://127.0.0.1:%d/app" % self.__server.getPort()
+
+    def tearDown(self):
+        pusher.WEBSOCKET_URL = self.__origURL
+        self.__server.stop()
+        self.__server.join()
+        super(AsyncWebSocketTestCase, self).tearDown()
+
+    def testBarFeed(self):
+        bars = []
+        orderBookUpdates = []
+
+        disp = asyncdispatcher.Dispatcher()
+        barFeed = barfeed.LiveTradeFeed(useAsyncio=True)
+        disp.addSubject(barFeed)
+
+        def check_stop():
+            if bars and orderBookUpdates:
+                disp.stop()
+
+        def on_bars(dateTime, bars_):
+            bars.append(bars_[common.btc_symbol])
+            check_stop()
+
+        def on_order_book_updated(orderBookUpdate):
+            orderBookUpdates.append(orderBookUpdate)
+            check_stop()
+
+        barFeed.getNewValuesEvent().subscribe(on_bars)
+        barFeed.getOrderBookUpdateEvent().subscribe(on_order_book_updated)
+        # Don't wait for events forever if something goes wrong.
+        timer = threading.Timer(10, disp.stop)
+        timer.start()
+        try:
+            disp.run()
+        finally:
+            timer.cancel()
+
+        self.assertEqual(len(bars), 1)
+        self.assertEqual(bars[0].getPrice(), 100.1)
+        self.assertEqual(bars[0].getVolume(), 0.5)
+        self.assertTrue(bars[0].isBuy())
+        self.assertEqual(len(orderBookUpdates), 1)
+        self.assertEqual(orderBookUpdates[0].getBidPrices(), [100])
+        self.assertEqual(orderBookUpdates[0].getAskVolumes(), [2.5])
+        self.assertTrue(barFeed.eof())
+
+    def testStrategy(self):
+        class Strategy(TestStrategy):
+            def __init__(self, feed, brk):
+                super(Strategy, self).__init__(feed, brk)
+                self.prices = []
+
+            def onBars(self, bars):
+                self.prices.append(bars[common.btc_symbol].getPrice())
+
+            def onIdle(self):
+                if self.prices and self.bid is not None:
+                    self.stop()
+
+        barFeed = barfeed.LiveTradeFeed(useAsyncio=True)
+        strat = Strategy(barFeed, broker.PaperTradingBroker(1000, barFeed))
+        self.assertIsInstance(strat.getDispatcher(), asyncdispatcher.Dispatcher)
+        timer = threading.Timer(10, strat.stop)
+        timer.start()
+        try:
+            strat.run()
+        finally:
+            timer.cancel()
+
+        self.assertEqual(strat.prices, [100.1])
+        self.assertEqual(strat.bid, 100)
+        self.assertEqual(strat.ask, 101)
@@ -19,13 +19,17 @@
 """
 
 import datetime
+import random
 
 from . import common
 
 from pyalgotrade import broker
 from pyalgotrade.broker import backtesting
+from pyalgotrade.broker import fillstrategy
+from pyalgotrade.broker import slippage
 from pyalgotrade import bar
 from pyalgotrade import barfeed
+from pyalgotrade.barfeed import membf
 
 
 class OrderUpdateCallback:
@@ -129,6 +133,11 @@ class BarFeed(barfeed.BaseBarFeed):
         return self.__nextBars
 
 
+class MultiInstrumentBarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return True
+
+
 class BaseTestCase(common.TestCase):
     TestInstrument = "orcl"
 
@@ -455,6 +464,53 @@ class BrokerTestCase(BaseTestCase):
         self.assertEqual(len(brk.getActiveOrders("ins2")), 1)
         self.assertEqual(len(brk.getActiveOrders("ins3")), 0)
 
+    def testOrdersForInstrumentsWithoutBarsAreNotProcessed(self):
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(1000, barFeed)
+
+        order1 = brk.createMarketOrder(broker.Order.Action.BUY, "ins1", 1)
+        brk.submitOrder(order1)
+        order2 = brk.createMarketOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 1)
+        brk.submitOrder(order2)
+        barFeed.dispatchBars(10, 15, 8, 12)
+
+        self.assertTrue(order1.isSubmitted())
+        self.assertTrue(order2.isFilled())
+        self.assertEqual(brk.getActiveOrders(), [order1])
+        self.assertEqual(brk.getActiveOrders("ins1"), [order1])
+        self.assertEqual(brk.getActiveOrders(BaseTestCase.TestInstrument), [])
+
+    def testOrdersProcessedInSubmissionOrder(self):
+        dateTime = datetime.datetime(2011, 1, 1)
+        barFeed = MultiInstrumentBarFeed(bar.Frequency.DAY)
+        for instrument in ["ins1", "ins2", "ins3"]:
+            barFeed.addBarsFromSequence(instrument, [bar.BasicBar(dateTime, 10, 10, 10, 10, 100, 10, bar.Frequency.DAY)])
+        # There is only enough cash for one of the orders.
+        brk = self.buildBroker(15, barFeed)
+        orderEvents = OrderUpdateCallback(brk)
+
+        order1 = brk.createMarketOrder(broker.Order.Action.BUY, "ins3", 1)
+        brk.submitOrder(order1)
+        order2 = brk.createMarketOrder(broker.Order.Action.BUY, "ins1", 1)
+        order2.setGoodTillCanceled(True)
+        brk.submitOrder(order2)
+        self.assertEqual(brk.getActiveOrders(), [order1, order2])
+
+        barFeed.start()
+        barFeed.dispatch()
+        self.assertTrue(order1.isFilled())
+        self.assertTrue(order2.isAccepted())
+        self.assertEqual(
+            [(event.getOrder().getId(), event.getEventType()) for event in orderEvents.events],
+            [
+                (order1.getId(), broker.OrderEvent.Type.SUBMITTED),
+                (order2.getId(), broker.OrderEvent.Type.SUBMITTED),
+                (order1.getId(), broker.OrderEvent.Type.ACCEPTED),
+                (order1.getId(), broker.OrderEvent.Type.FILLED),
+                (order2.getId(), broker.OrderEvent.Type.ACCEPTED),
+            ]
+        )
+
     def testSetShares(self):
         barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
         brk = self.buildBroker(1000, barFeed)
@@ -462,6 +518,83 @@ class BrokerTestCase(BaseTestCase):
         self.assertEqual(brk.getShares("btc"), 100)
         self.assertEqual(brk.getEquity(), 1000 + 100*50)
 
+    def testEquityAndCashWithShorts(self):
+        dateTimes = [datetime.datetime(2011, 1, 1), datetime.datetime(2011, 1, 2)]
+        barFeed = MultiInstrumentBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence("ins1", [
+            bar.BasicBar(dateTimes[0], 10, 10, 10, 10, 100, 10, bar.Frequency.DAY),
+            bar.BasicBar(dateTimes[1], 12, 12, 12, 12, 100, 12, bar.Frequency.DAY),
+        ])
+        barFeed.addBarsFromSequence("ins2", [
+            bar.BasicBar(dateTimes[0], 20, 20, 20, 20, 100, 20, bar.Frequency.DAY),
+        ])
+        brk = self.buildBroker(1000, barFeed)
+        brk.setAllowNegativeCash(True)
+        brk.submitOrder(brk.createMarketOrder(broker.Order.Action.BUY, "ins1", 10))
+        brk.submitOrder(brk.createMarketOrder(broker.Order.Action.SELL_SHORT, "ins2", 5))
+
+        barFeed.start()
+        barFeed.dispatch()
+        self.assertEqual(brk.getShares("ins1"), 10)
+        self.assertEqual(brk.getShares("ins2"), -5)
+        self.assertEqual(brk.getCash(), 1000 - 10*10 + 5*20)
+        self.assertEqual(brk.getCash(False), 1000 - 10*10)
+        self.assertEqual(brk.getEquity(), 1000)
+
+        # Only ins1 gets revalued. ins2 keeps the last price.
+        barFeed.dispatch()
+        self.assertEqual(brk.getCash(False), 1000 - 10*10)
+        self.assertEqual(brk.getEquity(), 1000 + 10*2)
+        brk.setCash(0)
+        self.assertEqual(brk.getCash(False), -5*20)
+        self.assertEqual(brk.getEquity(), 10*12 - 5*20)
+
+    def testEquityWithAdjustedValues(self):
+        dateTimes = [datetime.datetime(2011, 1, 1), datetime.datetime(2011, 1, 2)]
+        barFeed = MultiInstrumentBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence("ins1", [
+            bar.BasicBar(dateTimes[0], 10, 10, 10, 10, 100, 5, bar.Frequency.DAY),
+            bar.BasicBar(dateTimes[1], 12, 12, 12, 12, 100, 6, bar.Frequency.DAY),
+        ])
+        barFeed.addBarsFromSequence("ins2", [
+            bar.BasicBar(dateTimes[0], 20, 20, 20, 20, 100, 10, bar.Frequency.DAY),
+        ])
+        brk = self.buildBroker(1000, barFeed)
+        brk.submitOrder(brk.createMarketOrder(broker.Order.Action.BUY, "ins1", 10))
+        brk.submitOrder(brk.createMarketOrder(broker.Order.Action.BUY, "ins2", 5))
+
+        barFeed.start()
+        barFeed.dispatch()
+        self.assertEqual(brk.getEquity(), 1000)
+
+        # Positions get revalued using adjusted prices, even for instruments that have no bar.
+        barFeed.setUseAdjustedValues(True)
+        self.assertEqual(brk.getEquity(), 1000 - 10*10 - 5*20 + 10*5 + 5*10)
+        barFeed.dispatch()
+        self.assertEqual(brk.getEquity(), 1000 - 10*10 - 5*20 + 10*6 + 5*10)
+
+    def testEquityDoesntDrift(self):
+        instruments = ["ins%d" % i for i in range(10)]
+        barFeed = MultiInstrumentBarFeed(bar.Frequency.DAY)
+        for i, instrument in enumerate(instruments):
+            bars = []
+            for day in range(500):
+                price = 10 + i + ((day * 7919 + i * 104729) % 1000) / 3.0
+                dateTime = datetime.datetime(2011, 1, 1) + datetime.timedelta(days=day)
+                bars.append(bar.BasicBar(dateTime, price, price, price, price, 100, price, bar.Frequency.DAY))
+            barFeed.addBarsFromSequence(instrument, bars)
+        brk = self.buildBroker(1000000, barFeed)
+        for instrument in instruments:
+            brk.submitOrder(brk.createMarketOrder(broker.Order.Action.BUY, instrument, 7))
+
+        barFeed.start()
+        while not barFeed.eof():
+            barFeed.dispatch()
+            bars = barFeed.getCurrentBars()
+            positions = brk.getPositions()
+            positionsValue = sum(bars[instrument].getPrice() * shares for instrument, shares in positions.items())
+            self.assertEqual(brk.getEquity(), brk.getCash() + positionsValue)
+
 
 class MarketOrderTestCase(BaseTestCase):
     def testGetPositions(self):
@@ -1193,6 +1326,106 @@ class MarketOrderTestCase(BaseTestCase):
             brk.createMarketOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 1, onClose=True)
 
 
+class CountingFillStrategy(fillstrategy.DefaultStrategy):
+    def __init__(self, useTriggerRange):
+        super(CountingFillStrategy, self).__init__()
+        self.__useTriggerRange = useTriggerRange
+        self.fillCalls = 0
+
+    def getTriggerRange(self, broker_, bar):
+        if self.__useTriggerRange:
+            return super(CountingFillStrategy, self).getTriggerRange(broker_, bar)
+        return None
+
+    def fillLimitOrder(self, broker_, order, bar):
+        self.fillCalls += 1
+        return super(CountingFillStrategy, self).fillLimitOrder(broker_, order, bar)
+
+    def fillStopOrder(self, broker_, order, bar):
+        self.fillCalls += 1
+        return super(CountingFillStrategy, self).fillStopOrder(broker_, order, bar)
+
+    def fillStopLimitOrder(self, broker_, order, bar):
+        self.fillCalls += 1
+        return super(CountingFillStrategy, self).fillStopLimitOrder(broker_, order, bar)
+
+
+class RestingOrdersTestCase(BaseTestCase):
+    def __runRestingOrders(self, useTriggerRange):
+        rnd = random.Random(1234)
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(100000, barFeed)
+        brk.setAllowNegativeCash(True)
+        fillStrategy = CountingFillStrategy(useTriggerRange)
+        fillStrategy.setVolumeLimit(0.1)
+        fillStrategy.setSlippageModel(slippage.VolumeShareSlippage())
+        brk.setFillStrategy(fillStrategy)
+        events = []
+        brk.getOrderUpdatedEvent().subscribe(
+            lambda broker_, orderEvent: events.append((
+                orderEvent.getOrder().getId(),
+                orderEvent.getEventType(),
+                orderEvent.getOrder().getFilled(),
+                orderEvent.getOrder().getAvgFillPrice()
+            ))
+        )
+
+        price = 100
+        for i in range(50):
+            for j in range(20):
+                action = rnd.choice([broker.Order.Action.BUY, broker.Order.Action.SELL])
+                orderPrice = price + rnd.randint(-20, 20)
+                orderType = rnd.choice(["limit", "stop", "stoplimit"])
+                if orderType == "limit":
+                    order = brk.createLimitOrder(action, BaseTestCase.TestInstrument, orderPrice, rnd.randint(1, 5))
+                elif orderType == "stop":
+                    order = brk.createStopOrder(action, BaseTestCase.TestInstrument, orderPrice, rnd.randint(1, 5))
+                else:
+                    order = brk.createStopLimitOrder(
+                        action, BaseTestCase.TestInstrument, orderPrice, orderPrice + rnd.randint(-2, 2),
+                        rnd.randint(1, 5)
+                    )
+                order.setGoodTillCanceled(True)
+                brk.submitOrder(order)
+            # Cancel some of the orders.
+            for order in brk.getActiveOrders():
+                if rnd.random() < 0.05:
+                    brk.cancelOrder(order)
+            price = max(price + rnd.randint(-3, 3), 30)
+            barFeed.dispatchBars(price, price + rnd.randint(0, 3), price - rnd.randint(0, 3), price, volume=100)
+        return events, fillStrategy.fillCalls, [order.getId() for order in brk.getActiveOrders()]
+
+    def testSameResultsWithTriggerRange(self):
+        events, fillCalls, activeOrders = self.__runRestingOrders(True)
+        expectedEvents, expectedFillCalls, expectedActiveOrders = self.__runRestingOrders(False)
+        self.assertEqual(events, expectedEvents)
+        self.assertEqual(activeOrders, expectedActiveOrders)
+        self.assertTrue(len(activeOrders) > 0)
+        self.assertTrue(fillCalls < expectedFillCalls)
+
+    def testOnlyTriggeredOrdersAreProcessed(self):
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(1000, barFeed)
+        fillStrategy = CountingFillStrategy(True)
+        brk.setFillStrategy(fillStrategy)
+
+        orders = []
+        for limitPrice in range(1, 11):
+            order = brk.createLimitOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, limitPrice, 1)
+            order.setGoodTillCanceled(True)
+            brk.submitOrder(order)
+            orders.append(order)
+
+        # All orders get accepted on the first bar.
+        barFeed.dispatchBars(20, 20, 20, 20)
+        self.assertEqual(fillStrategy.fillCalls, 10)
+        # Only the orders with a limit price >= 8 should be processed.
+        barFeed.dispatchBars(20, 20, 8, 20)
+        self.assertEqual(fillStrategy.fillCalls, 13)
+        self.assertEqual([order.isFilled() for order in orders], [False] * 7 + [True] * 3)
+        self.assertEqual(len(brk.getActiveOrders()), 7)
+
+
 class LimitOrderTestCase(BaseTestCase):
     def testBuySellPartial(self):
         barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
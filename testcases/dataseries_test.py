@@ -190,6 +190,29 @@ class TestBarDataSeries(common.TestCase):
         self.__testGetValue(ds.getAdjCloseDataSeries(), 10, 3)
         self.__testGetValue(ds.getPriceDataSeries(), 10, 3)
 
+    def testAdjustedDataSeries(self):
+        ds = bards.BarDataSeries()
+        firstDt = datetime.datetime.now()
+        for i in xrange(5):
+            ds.append(bar.BasicBar(firstDt + datetime.timedelta(seconds=i), 2, 4, 1, 3, 10, 1.5, bar.Frequency.SECOND))
+        # Adjusted data series get backfilled when requested.
+        adjOpenDS = ds.getAdjOpenDataSeries()
+        adjHighDS = ds.getAdjHighDataSeries()
+        adjLowDS = ds.getAdjLowDataSeries()
+        for i in xrange(5, 10):
+            ds.append(bar.BasicBar(firstDt + datetime.timedelta(seconds=i), 2, 4, 1, 3, 10, 1.5, bar.Frequency.SECOND))
+
+        self.__testGetValue(adjOpenDS, 10, 1)
+        self.__testGetValue(adjHighDS, 10, 2)
+        self.__testGetValue(adjLowDS, 10, 0.5)
+        self.assertEqual(adjOpenDS.getDateTimes(), ds.getDateTimes())
+
+    def testAdjustedDataSeriesWithoutAdjClose(self):
+        ds = bards.BarDataSeries()
+        adjOpenDS = ds.getAdjOpenDataSeries()
+        ds.append(bar.BasicBar(datetime.datetime.now(), 2, 4, 1, 3, 10, None, bar.Frequency.SECOND))
+        self.assertEqual(adjOpenDS[-1], None)
+
     def testSeqLikeOps(self):
         seq = []
         ds = bards.BarDataSeries()
@@ -406,6 +429,70 @@ class TestDateAlignedDataSeries(common.TestCase):
         self.assertEqual(ads1[:], [2, 3])
         self.assertEqual(ads2[:], [2, 3])
 
+    def testNWay(self):
+        size = 30
+        commonDateTimes = []
+        sources = [dataseries.SequenceDataSeries() for i in xrange(3)]
+        alignedDSs = aligned.datetime_aligned_n(sources)
+        self.assertEqual(len(alignedDSs), 3)
+
+        now = datetime.datetime.now()
+        for i in xrange(size):
+            dateTime = now + datetime.timedelta(seconds=i)
+            if i % 3 == 0:
+                commonDateTimes.append(dateTime)
+            for j, ds in enumerate(sources):
+                if i % 3 == 0 or i % 3 == j:
+                    ds.appendWithDateTime(dateTime, i * 10 + j)
+
+        for j, ads in enumerate(alignedDSs):
+            self.assertEqual(ads.getDateTimes(), commonDateTimes)
+            self.assertEqual(ads[:], [i * 10 + j for i in xrange(0, size, 3)])
+
+    def testNWayOutOfOrderSources(self):
+        sources = [dataseries.SequenceDataSeries() for i in xrange(3)]
+        syncer = aligned.MultiSyncer(sources, [dataseries.SequenceDataSeries() for i in xrange(3)])
+        rows = []
+        syncer.getNewRowEvent().subscribe(lambda dateTime, values: rows.append((dateTime, list(values))))
+
+        now = datetime.datetime.now()
+        sources[0].appendWithDateTime(now + datetime.timedelta(seconds=1), 1)
+        sources[0].appendWithDateTime(now + datetime.timedelta(seconds=2), 2)
+        sources[1].appendWithDateTime(now + datetime.timedelta(seconds=2), None)
+        sources[2].appendWithDateTime(now + datetime.timedelta(seconds=1), 1)
+        self.assertEqual(rows, [])
+        sources[2].appendWithDateTime(now + datetime.timedelta(seconds=2), 2)
+        self.assertEqual(rows, [(now + datetime.timedelta(seconds=2), [2, None, 2])])
+
+    def testPendingBounded(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        syncer = aligned.MultiSyncer([ds1, ds2], [dataseries.SequenceDataSeries(), dataseries.SequenceDataSeries()], 5)
+        rows = []
+        syncer.getNewRowEvent().subscribe(lambda dateTime, values: rows.append(dateTime))
+
+        now = datetime.datetime.now()
+        for i in xrange(20):
+            ds1.appendWithDateTime(now + datetime.timedelta(seconds=i), i)
+        self.assertEqual(syncer.getPendingCount(), 5)
+        # The oldest values were evicted.
+        ds2.appendWithDateTime(now + datetime.timedelta(seconds=14), 14)
+        self.assertEqual(rows, [])
+        ds2.appendWithDateTime(now + datetime.timedelta(seconds=15), 15)
+        self.assertEqual(rows, [now + datetime.timedelta(seconds=15)])
+        self.assertEqual(syncer.getPendingCount(), 4)
+
+    def testStaleEvicted(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        syncer = aligned.MultiSyncer([ds1, ds2], [dataseries.SequenceDataSeries(), dataseries.SequenceDataSeries()])
+
+        now = datetime.datetime.now()
+        for i in xrange(0, 20, 2):
+            ds1.appendWithDateTime(now + datetime.timedelta(seconds=i), i)
+            ds2.appendWithDateTime(now + datetime.timedelta(seconds=i + 1), i + 1)
+        self.assertEqual(syncer.getPendingCount(), 1)
+
 
 class TestUpdatedDefaultMaxLen(common.TestCase):
     def setUp(self):
@@ -424,3 +511,52 @@ class TestUpdatedDefaultMaxLen(common.TestCase):
         self.assertEqual(len(ds), 2048)
         self.assertEqual(ds[0], 952)
         self.assertEqual(ds[-1], 2999)
+
+
+class TestAutoMaxLen(common.TestCase):
+    def testRequireLen(self):
+        ds = dataseries.SequenceDataSeries()
+        ds.requireLen(5)
+        self.assertEqual(ds.getMaxLen(), dataseries.DEFAULT_MAX_LEN)
+        self.assertEqual(ds.getAutoMaxLen(), None)
+
+        ds.setAutoMaxLen()
+        self.assertEqual(ds.getAutoMaxLen(), dataseries.DEFAULT_AUTO_MIN_LEN)
+        self.assertEqual(ds.getMaxLen(), 5)
+        ds.requireLen(3)
+        self.assertEqual(ds.getMaxLen(), 5)
+        ds.requireLen(10)
+        self.assertEqual(ds.getMaxLen(), 10)
+        ds.setAutoMaxLen(20)
+        self.assertEqual(ds.getMaxLen(), 20)
+
+        for i in xrange(30):
+            ds.append(i)
+        self.assertEqual(ds[:], list(range(10, 30)))
+
+    def testInvalidMinLen(self):
+        with self.assertRaisesRegexp(Exception, "Invalid minimum length"):
+            dataseries.SequenceDataSeries().setAutoMaxLen(0)
+
+    def testBarDataSeries(self):
+        ds = bards.BarDataSeries()
+        ds.setAutoMaxLen(3)
+        ds.getCloseDataSeries().requireLen(5)
+        now = datetime.datetime.now()
+        for i in xrange(10):
+            extra = {"extra": i}
+            ds.append(bar.BasicBar(now + datetime.timedelta(seconds=i), i, i, i, i, 1, i, bar.Frequency.SECOND, extra))
+
+        self.assertEqual(len(ds), 3)
+        self.assertEqual(ds.getCloseDataSeries()[:], [5, 6, 7, 8, 9])
+        self.assertEqual(ds.getVolumeDataSeries().getMaxLen(), 3)
+        self.assertEqual(ds.getExtraDataSeries("extra")[:], [7, 8, 9])
+        self.assertEqual(ds.getAdjOpenDataSeries().getMaxLen(), 3)
+
+    def testAligned(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds1.setAutoMaxLen()
+        ds2 = dataseries.SequenceDataSeries()
+        aligned1, aligned2 = aligned.datetime_aligned(ds1, ds2)
+        self.assertEqual(aligned1.getMaxLen(), dataseries.DEFAULT_AUTO_MIN_LEN)
+        self.assertEqual(aligned2.getMaxLen(), dataseries.DEFAULT_MAX_LEN)
@@ -18,6 +18,7 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import datetime
 import os
 
 from six.moves import xrange
@@ -29,6 +30,7 @@ from pyalgotrade.barfeed import yahoofeed
 from pyalgotrade.barfeed import sqlitefeed
 from pyalgotrade import bar
 from pyalgotrade import marketsession
+from pyalgotrade.utils import dt
 
 
 class TemporarySQLiteFeed:
@@ -127,3 +129,105 @@ class SQLiteFeedTestCase(common.TestCase):
             self.assertEqual(len(barDS.getHighDataSeries()), 2)
             self.assertEqual(len(barDS.getLowDataSeries()), 2)
             self.assertEqual(len(barDS.getAdjCloseDataSeries()), 2)
+
+    def testBulkInsertAndUpdate(self):
+        tmpFeed = TemporarySQLiteFeed(SQLiteFeedTestCase.dbName, bar.Frequency.DAY)
+        with tmpFeed:
+            yahooFeed = yahoofeed.Feed()
+            yahooFeed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+            yahooBars = [bars["orcl"] for dateTime, bars in yahooFeed]
+
+            db = tmpFeed.getFeed().getDatabase()
+            db.addBarsFromSequence("orcl", yahooBars[:100], bar.Frequency.DAY)
+            self.assertEqual(len(db.getBars("orcl", bar.Frequency.DAY)), 100)
+
+            # Existing bars get updated.
+            updated = [
+                bar.BasicBar(
+                    bar_.getDateTime(), bar_.getOpen(), bar_.getHigh() + 1, bar_.getLow(), bar_.getClose(),
+                    bar_.getVolume(), bar_.getAdjClose(), bar_.getFrequency()
+                ) for bar_ in yahooBars
+            ]
+            db.addBarsFromSequence("orcl", updated, bar.Frequency.DAY)
+            dbBars = db.getBars("orcl", bar.Frequency.DAY)
+            self.assertEqual(len(dbBars), len(yahooBars))
+            for expected, actual in zip(updated, dbBars):
+                self.assertEqual(dt.unlocalize(actual.getDateTime()), expected.getDateTime())
+                self.assertEqual(actual.getHigh(), expected.getHigh())
+                self.assertEqual(actual.getAdjClose(), expected.getAdjClose())
+
+    def testBulkInsertRollback(self):
+        tmpFeed = TemporarySQLiteFeed(SQLiteFeedTestCase.dbName, bar.Frequency.DAY)
+        with tmpFeed:
+            db = tmpFeed.getFeed().getDatabase()
+
+            def bars():
+                yield bar.BasicBar(datetime.datetime(2001, 1, 1), 1, 1, 1, 1, 1, 1, bar.Frequency.DAY)
+                raise Exception("Error loading bars")
+
+            with self.assertRaisesRegexp(Exception, "Error loading bars"):
+                db.addBarsFromSequence("orcl", bars(), bar.Frequency.DAY)
+            self.assertEqual(db.getBars("orcl", bar.Frequency.DAY), [])
+
+            # The instrument is created again after the rollback.
+            db.addBar("orcl", bar.BasicBar(datetime.datetime(2001, 1, 2), 1, 1, 1, 1, 1, 1, bar.Frequency.DAY), bar.Frequency.DAY)
+            self.assertEqual(len(db.getBars("orcl", bar.Frequency.DAY)), 1)
+
+
+class SQLiteStreamingFeedTestCase(common.TestCase):
+    def __loadBars(self, barFeed):
+        ret = []
+        for dateTime, bars in barFeed:
+            ret.append(dict(bars.items()))
+        return ret
+
+    def testSameBarsAsFeed(self):
+        dbFilePath = common.get_data_file_path("multiinstrument.sqlite")
+        instruments = ["^n225", "spy"]
+        timezone = marketsession.USEquities.getTimezone()
+
+        memFeed = sqlitefeed.Feed(dbFilePath, bar.Frequency.DAY)
+        for instrument in instruments:
+            memFeed.loadBars(instrument, timezone)
+        streamingFeed = sqlitefeed.StreamingFeed(dbFilePath, bar.Frequency.DAY, instruments, timezone)
+        feed_test.tstBaseFeedInterface(self, streamingFeed)
+
+        streamingFeed = sqlitefeed.StreamingFeed(dbFilePath, bar.Frequency.DAY, instruments, timezone)
+        expected = self.__loadBars(memFeed)
+        actual = self.__loadBars(streamingFeed)
+        self.assertEqual(len(expected), len(actual))
+        for expectedBars, actualBars in zip(expected, actual):
+            self.assertEqual(sorted(expectedBars.keys()), sorted(actualBars.keys()))
+            for instrument, expectedBar in expectedBars.items():
+                actualBar = actualBars[instrument]
+                self.assertEqual(expectedBar.getDateTime(), actualBar.getDateTime())
+                self.assertEqual(expectedBar.getOpen(), actualBar.getOpen())
+                self.assertEqual(expectedBar.getClose(), actualBar.getClose())
+                self.assertEqual(expectedBar.getAdjClose(), actualBar.getAdjClose())
+        self.assertEqual(len(streamingFeed["spy"]), len(memFeed["spy"]))
+        self.assertEqual(len(streamingFeed["^n225"]), len(memFeed["^n225"]))
+
+    def testDateTimeRangeAndMissingInstruments(self):
+        dbFilePath = common.get_data_file_path("multiinstrument.sqlite")
+        fromDateTime = datetime.datetime(2011, 1, 1)
+        toDateTime = datetime.datetime(2011, 1, 31)
+        streamingFeed = sqlitefeed.StreamingFeed(
+            dbFilePath, bar.Frequency.DAY, ["spy", "missing"], fromDateTime=fromDateTime, toDateTime=toDateTime
+        )
+        barsList = self.__loadBars(streamingFeed)
+        self.assertTrue(len(barsList) > 0)
+        for bars in barsList:
+            self.assertEqual(list(bars.keys()), ["spy"])
+            dateTime = bars["spy"].getDateTime().replace(tzinfo=None)
+            self.assertTrue(fromDateTime <= dateTime <= toDateTime)
+        self.assertEqual(len(streamingFeed["missing"]), 0)
+
+    def testNoInstruments(self):
+        dbFilePath = common.get_data_file_path("multiinstrument.sqlite")
+        streamingFeed = sqlitefeed.StreamingFeed(dbFilePath, bar.Frequency.DAY, ["missing"])
+        self.assertEqual(self.__loadBars(streamingFeed), [])
+
+    def testDuplicateInstruments(self):
+        dbFilePath = common.get_data_file_path("multiinstrument.sqlite")
+        with self.assertRaisesRegexp(Exception, "spy and SPY refer to the same instrument"):
+            sqlitefeed.StreamingFeed(dbFilePath, bar.Frequency.DAY, ["spy", "SPY"])
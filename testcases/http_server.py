@@ -1,5 +1,6 @@
 import threading
-import BaseHTTPServer
+
+from six.moves import BaseHTTPServer
 
 
 class WebServerThread(threading.Thread):
@@ -8,17 +9,22 @@ class WebServerThread(threading.Thread):
         self.__host = host
         self.__port = port
         self.__handlerClass = handlerClass
-        self.__server = None
 
-    def run(self):
         def handler_cls_builder(*args, **kwargs):
             return self.__handlerClass(*args, **kwargs)
 
+        # Bind right away so the port is known, even if 0 was used to pick a free one.
         self.__server = BaseHTTPServer.HTTPServer((self.__host, self.__port), handler_cls_builder)
+
+    def getPort(self):
+        return self.__server.server_address[1]
+
+    def run(self):
         self.__server.serve_forever()
 
     def stop(self):
         self.__server.shutdown()
+        self.__server.server_close()
 
 
 # handlerClass should be a subclass of (BaseHTTPServer.BaseHTTPRequestHandler.
@@ -82,3 +82,23 @@ class MemFeedTestCase(common.TestCase):
         self.assertEqual(len(values), len(reloadedValues))
         for i in range(len(values)):
             self.assertEqual(values[i], reloadedValues[i])
+
+    def testOnDemandKeys(self):
+        now = datetime.datetime.now()
+        feed = memfeed.MemFeed()
+        feed.setOnDemandDataSeries(True)
+        feed.addValues([(now, {"b": 1})])
+        feed.addValues([(now + datetime.timedelta(seconds=1), {"a": 2})])
+        # c is not registered.
+        feed.addValues([
+            (now + datetime.timedelta(seconds=2), {"a": 3}),
+            (now + datetime.timedelta(seconds=3), {"c": 4}),
+        ])
+
+        disp = dispatcher.Dispatcher()
+        disp.addSubject(feed)
+        disp.run()
+
+        # Keys that were only seen in values are available as well, in the order they were seen.
+        self.assertEqual(feed.getKeys(), ["b", "a", "c"])
+        self.assertEqual(len(feed["c"]), 0)
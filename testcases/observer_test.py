@@ -20,6 +20,8 @@
 
 import datetime
 import copy
+import threading
+import time
 
 from six.moves import xrange
 
@@ -27,6 +29,7 @@ from . import common
 
 from pyalgotrade import observer
 from pyalgotrade import dispatcher
+from pyalgotrade.utils import wakeup
 
 
 class NonRealtimeFeed(observer.Subject):
@@ -97,6 +100,67 @@ class RealtimeFeed(observer.Subject):
         return self.__priority
 
 
+# A realtime feed that gets values from a thread and notifies the dispatcher's wakeup.
+class ThreadedRealtimeFeed(observer.Subject):
+    def __init__(self, count, delay):
+        super(ThreadedRealtimeFeed, self).__init__()
+        self.__count = count
+        self.__delay = delay
+        self.__queue = wakeup.Queue()
+        self.__event = observer.Event()
+        self.__thread = threading.Thread(target=self.__threadMain)
+        self.__eof = False
+        self.__queueNotifies = False
+        self.__stopTime = None
+
+    def __threadMain(self):
+        for i in xrange(self.__count):
+            time.sleep(self.__delay)
+            self.__queue.put(time.time())
+        self.__queue.put(None)
+
+    def getEvent(self):
+        return self.__event
+
+    def start(self):
+        super(ThreadedRealtimeFeed, self).start()
+        self.__thread.start()
+
+    def stop(self):
+        self.__stopTime = time.time()
+
+    def join(self):
+        self.__thread.join()
+
+    def getStopTime(self):
+        return self.__stopTime
+
+    def eof(self):
+        return self.__eof
+
+    def dispatch(self):
+        ret = False
+        try:
+            value = self.__queue.get(not self.__queueNotifies, 0.01)
+            if value is None:
+                self.__eof = True
+            else:
+                ret = True
+                self.__event.emit(value)
+        except wakeup.queue.Empty:
+            pass
+        return ret
+
+    def peekDateTime(self):
+        return None
+
+    def onDispatcherRegistered(self, dispatcher):
+        self.__queueNotifies = wakeup.set_queue_wakeup(self.__queue, dispatcher.getWakeup())
+
+    def supportsWakeup(self):
+        return self.__queueNotifies
+
+
 class DispatcherTestCase(common.TestCase):
     def test1NrtFeed(self):
         values = []
@@ -224,6 +288,47 @@ class DispatcherTestCase(common.TestCase):
         # Check that although feed2 is realtime, feed1 was dispatched before.
         self.assertTrue(values[0] < values[1])
 
+    def testWakeup(self):
+        latencies = []
+        idleEvents = []
+        feed = ThreadedRealtimeFeed(10, 0.05)
+        feed.getEvent().subscribe(lambda putTime: latencies.append(time.time() - putTime))
+
+        disp = dispatcher.Dispatcher()
+        disp.addSubject(feed)
+        disp.getIdleEvent().subscribe(lambda: idleEvents.append(1))
+        disp.run()
+
+        self.assertEqual(len(latencies), 10)
+        self.assertLess(max(latencies), 0.1)
+        # The dispatcher blocks while idle instead of polling every 10 ms.
+        self.assertLess(len(idleEvents), 25)
+
+    def testWakeupNotUsedWithPolledSubjects(self):
+        values = []
+        feed = ThreadedRealtimeFeed(5, 0.02)
+        feed.getEvent().subscribe(lambda putTime: values.append(putTime))
+        rtFeed = RealtimeFeed([datetime.datetime.now()] * 5)
+        rtFeed.getEvent().subscribe(lambda value: values.append(value))
+
+        disp = dispatcher.Dispatcher()
+        disp.addSubject(feed)
+        disp.addSubject(rtFeed)
+        disp.run()
+
+        self.assertEqual(len(values), 10)
+
+    def testStopWakesUp(self):
+        disp = dispatcher.Dispatcher()
+        # A feed that won't produce values for a long time.
+        feed = ThreadedRealtimeFeed(1, 1)
+        disp.addSubject(feed)
+        disp.getStartEvent().subscribe(lambda: threading.Timer(0.05, disp.stop).start())
+        begin = time.time()
+        disp.run()
+        # The dispatcher should not wait for the wakeup timeout.
+        self.assertLess(feed.getStopTime() - begin, dispatcher.Dispatcher.WAKEUP_TIMEOUT)
+
 
 class EventTestCase(common.TestCase):
     def testEmitOrder(self):
@@ -303,3 +408,31 @@ class EventTestCase(common.TestCase):
 
         event.emit()
         self.assertTrue(handlersData == [1, 1])
+
+    def testNestedEmitUsesHandlersFromOutermostEmit(self):
+        handlersData = []
+        event = observer.Event()
+
+        def handler2(depth):
+            handlersData.append((2, depth))
+
+        def handler1(depth):
+            handlersData.append((1, depth))
+            if depth == 0:
+                event.unsubscribe(handler1)
+                event.subscribe(handler2)
+                # Changes are deferred until the outermost emit finishes.
+                event.emit(depth + 1)
+
+        event.subscribe(handler1)
+        event.emit(0)
+        self.assertEqual(handlersData, [(1, 0), (1, 1)])
+        event.emit(0)
+        self.assertEqual(handlersData, [(1, 0), (1, 1), (2, 0)])
+
+    def testUnsubscribeMissingHandler(self):
+        event = observer.Event()
+        with self.assertRaises(ValueError):
+            event.unsubscribe(lambda: None)
+        # Emitting with no handlers is a no-op.
+        event.emit(1, 2, 3)
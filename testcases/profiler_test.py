@@ -0,0 +1,99 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+from . import common
+
+from pyalgotrade import profiler
+from pyalgotrade import observer
+from pyalgotrade import strategy
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.stratanalyzer import returns
+from pyalgotrade.technical import ma
+
+
+class SMAStrategy(strategy.BacktestingStrategy):
+    def __init__(self, barFeed, instrument):
+        super(SMAStrategy, self).__init__(barFeed)
+        self.__sma = ma.SMA(barFeed[instrument].getCloseDataSeries(), 10)
+
+    def onBars(self, bars):
+        pass
+
+
+class ProfilerTestCase(common.TestCase):
+    def tearDown(self):
+        profiler.disable()
+
+    def testHandlerLabels(self):
+        class Owner(object):
+            def handler(self):
+                pass
+
+            def __privateHandler(self):
+                pass
+
+            def getPrivateHandler(self):
+                return self.__privateHandler
+
+        owner = Owner()
+        self.assertEqual(profiler.get_handler_label(owner.handler), "Owner.handler")
+        self.assertEqual(profiler.get_handler_label(owner.getPrivateHandler()), "Owner.__privateHandler")
+
+    def testEventHandlersAreTimed(self):
+        calls = []
+        event = observer.Event()
+        event.subscribe(lambda value: calls.append(value))
+
+        event.emit(1)
+        prof = profiler.enable()
+        event.emit(2)
+        event.emit(3)
+        profiler.disable()
+        event.emit(4)
+
+        self.assertEqual(calls, [1, 2, 3, 4])
+        handlerStats = prof.getHandlerStats()
+        self.assertEqual(len(handlerStats), 1)
+        self.assertEqual(handlerStats[0].getCount(), 2)
+
+    def testStrategyReport(self):
+        instrument = "orcl"
+        barFeed = yahoofeed.Feed()
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        strat = SMAStrategy(barFeed, instrument)
+        strat.attachAnalyzer(returns.Returns())
+
+        prof = profiler.enable()
+        strat.run()
+
+        self.assertEqual(prof.getDispatchCount(barFeed), 252)
+        self.assertTrue(prof.getElapsed() > 0)
+        subjectStats = prof.getSubjectStats()
+        self.assertEqual(subjectStats[0].getLabel(), "Feed")
+        self.assertEqual(subjectStats[0].getCount(), 252)
+        handlerLabels = [stats.getLabel() for stats in prof.getHandlerStats()]
+        for label in ["Broker.onBars", "SMA.__onNewValue", "Returns.__onReturns", "SMAStrategy.__onBars"]:
+            self.assertIn(label, handlerLabels)
+        # Sorted by time, descending.
+        times = [stats.getTime() for stats in prof.getHandlerStats()]
+        self.assertEqual(times, sorted(times, reverse=True))
+
+        report = prof.getReport(barFeed)
+        self.assertTrue(report[0].startswith("252 bars in"))
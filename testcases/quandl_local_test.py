@@ -0,0 +1,96 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+
+from six.moves import BaseHTTPServer
+from six.moves.urllib import parse
+
+from . import common
+from . import http_server
+
+from pyalgotrade.tools import quandl
+
+
+class QuandlRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    requestedPaths = []
+
+    def do_GET(self):
+        url = parse.urlparse(self.path)
+        QuandlRequestHandler.requestedPaths.append(url.path)
+        params = parse.parse_qs(url.query)
+        if url.path.endswith("/INVALID.csv"):
+            self.send_error(404)
+            return
+
+        with open(common.get_data_file_path("WIKI-ORCL-2000-quandl.csv")) as f:
+            lines = f.readlines()
+        rows = [line for line in lines[1:] if params["trim_start"][0] <= line[:10] <= params["trim_end"][0]]
+        content = "".join(lines[:1] + rows).encode("ascii")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalServerTestCase(common.TestCase):
+    def setUp(self):
+        QuandlRequestHandler.requestedPaths = []
+        self.__server = http_server.run_webserver_thread("127.0.0.1", 0, QuandlRequestHandler)
+        self.__apiUrl = quandl.API_URL
+        quandl.API_URL = "http://127.0.0.1:%d/api/v1" % self.__server.getPort()
+
+    def tearDown(self):
+        quandl.API_URL = self.__apiUrl
+        self.__server.stop()
+        self.__server.join()
+
+    def testBuildFeedConcurrently(self):
+        instruments = ["ORCL", "AAA", "BBB", "CCC"]
+        with common.TmpDir() as tmpPath:
+            bf = quandl.build_feed("WIKI", instruments, 1999, 2000, tmpPath, downloadWorkers=4, loadWorkers=2)
+            self.assertEqual(len(QuandlRequestHandler.requestedPaths), 8)
+            bf.loadAll()
+            for instrument in instruments:
+                self.assertEqual(len(bf[instrument]), 252)
+                self.assertEqual(bf[instrument][-1].getDateTime(), datetime.datetime(2000, 12, 29))
+                self.assertEqual(bf[instrument][-1].getClose(), 29.06)
+                self.assertEqual(bf[instrument][-1].getAdjClose(), 26.46449896098733)
+
+            # Files that were already downloaded are not downloaded again.
+            quandl.build_feed("WIKI", instruments, 1999, 2000, tmpPath)
+            self.assertEqual(len(QuandlRequestHandler.requestedPaths), 8)
+
+    def testIgnoreErrors(self):
+        with common.TmpDir() as tmpPath:
+            bf = quandl.build_feed("WIKI", ["ORCL", "INVALID"], 2000, 2000, tmpPath, skipErrors=True)
+            bf.loadAll()
+            self.assertEqual(bf.getRegisteredInstruments(), ["ORCL"])
+            self.assertEqual(len(bf["ORCL"]), 252)
+
+    def testDontIgnoreErrors(self):
+        with common.TmpDir() as tmpPath:
+            with self.assertRaisesRegexp(Exception, "404 Client Error.*"):
+                quandl.build_feed("WIKI", ["ORCL", "INVALID"], 2000, 2000, tmpPath)
@@ -213,6 +213,25 @@ class DataSeriesTestCase(common.TestCase):
         self.assertEqual(barDs[0].getAdjClose(), resampledBarDS[0].getAdjClose())
         self.assertEqual(resampledBarDS[0].getDateTime(), datetime.datetime(2014, 7, 7, 22, 46))
 
+    def testResampleLocalizedAcrossDST(self):
+        barDs = bards.BarDataSeries()
+        resampledBarDS = resampled_ds.ResampledBarDataSeries(barDs, bar.Frequency.HOUR)
+        timezone = marketsession.NYSE.timezone
+
+        # DST ends on 2013-11-03 at 2 AM, so 1 AM happens twice.
+        beginUTC = dt.as_utc(datetime.datetime(2013, 11, 3, 4))
+        for minutes in range(0, 4 * 60, 30):
+            barDateTime = dt.localize(beginUTC + datetime.timedelta(minutes=minutes), timezone)
+            barDs.append(bar.BasicBar(barDateTime, 1, 1, 1, 1, 10, 1, bar.Frequency.MINUTE))
+        resampledBarDS.pushLast()
+
+        self.assertEqual(len(resampledBarDS), 4)
+        for i in range(len(resampledBarDS)):
+            expected = dt.localize(beginUTC + datetime.timedelta(hours=i), timezone)
+            self.assertEqual(resampledBarDS[i].getDateTime(), expected)
+            self.assertEqual(resampledBarDS[i].getDateTime().utcoffset(), expected.utcoffset())
+            self.assertEqual(resampledBarDS[i].getVolume(), 20)
+
 
 class CSVResampleTestCase(common.TestCase):
     def testResampleNinjaTraderHour(self):
@@ -276,6 +295,103 @@ class CSVResampleTestCase(common.TestCase):
                 resample.resample_to_csv(feed, bar.Frequency.HOUR, os.path.join(tmp_path, "any.csv"))
 
 
+def build_nt_feed(instrument, paths):
+    ret = ninjatraderfeed.Feed(ninjatraderfeed.Frequency.MINUTE)
+    for path in paths:
+        ret.addBarsFromCSV(instrument, path)
+    return ret
+
+
+class MultiResampleTestCase(common.TestCase):
+    Frequencies = [bar.Frequency.MINUTE * 5, bar.Frequency.HOUR, bar.Frequency.DAY]
+
+    def __resampleToCSV(self, tmpPath, frequency):
+        feed = build_nt_feed("spy", [common.get_data_file_path("nt-spy-minute-2011.csv")])
+        ret = os.path.join(tmpPath, "expected-%d.csv" % frequency)
+        resample.resample_to_csv(feed, frequency, ret)
+        return ret
+
+    def testResampleToFiles(self):
+        with common.TmpDir() as tmp_path:
+            feed = ninjatraderfeed.Feed(ninjatraderfeed.Frequency.MINUTE)
+            feed.addBarsFromCSV("spy", common.get_data_file_path("nt-spy-minute-2011.csv"))
+            feed.addBarsFromCSV("spb", common.get_data_file_path("nt-spy-minute-2011.csv"))
+            resample.resample_to_files(feed, MultiResampleTestCase.Frequencies, tmp_path)
+
+            # Dataseries should not be updated.
+            self.assertEqual(len(feed["spy"]), 0)
+            for frequency in MultiResampleTestCase.Frequencies:
+                expected = common.get_file_lines(self.__resampleToCSV(tmp_path, frequency))
+                self.assertTrue(len(expected) > 1)
+                for instrument in ["spy", "spb"]:
+                    path = resample.get_output_path(tmp_path, instrument, frequency)
+                    self.assertEqual(common.get_file_lines(path), expected)
+
+    def testResampleToColumnarFiles(self):
+        with common.TmpDir() as tmp_path:
+            feed = build_nt_feed("spy", [common.get_data_file_path("nt-spy-minute-2011.csv")])
+            resample.resample_to_files(feed, MultiResampleTestCase.Frequencies, tmp_path, resample.COLUMNAR)
+
+            for frequency in MultiResampleTestCase.Frequencies:
+                csvFeed = csvfeed.GenericBarFeed(frequency, marketsession.USEquities.getTimezone(), maxLen=10000)
+                csvFeed.addBarsFromCSV("spy", self.__resampleToCSV(tmp_path, frequency))
+                csvFeed.loadAll()
+                expected = csvFeed["spy"]
+
+                path = resample.get_output_path(tmp_path, "spy", frequency, resample.COLUMNAR)
+                bars = resample.load_columnar_bars(path, frequency, marketsession.USEquities.getTimezone())
+                self.assertEqual(len(bars), len(expected))
+                for i in range(len(bars)):
+                    self.assertEqual(bars[i].getDateTime(), expected[i].getDateTime())
+                    self.assertEqual(bars[i].getOpen(), expected[i].getOpen())
+                    self.assertEqual(bars[i].getHigh(), expected[i].getHigh())
+                    self.assertEqual(bars[i].getLow(), expected[i].getLow())
+                    self.assertEqual(bars[i].getClose(), expected[i].getClose())
+                    self.assertEqual(bars[i].getVolume(), expected[i].getVolume())
+                    self.assertEqual(bars[i].getAdjClose(), None)
+
+    def testResampleFiles(self):
+        for processes in [1, 2]:
+            with common.TmpDir() as tmp_path:
+                sourcePath = common.get_data_file_path("nt-spy-minute-2011.csv")
+                sources = {"spy": [sourcePath], "spb": [sourcePath], "spc": [sourcePath]}
+                resample.resample_files(sources, build_nt_feed, [bar.Frequency.HOUR], tmp_path, processes=processes)
+
+                expected = common.get_file_lines(self.__resampleToCSV(tmp_path, bar.Frequency.HOUR))
+                for instrument in sources:
+                    path = resample.get_output_path(tmp_path, instrument, bar.Frequency.HOUR)
+                    self.assertEqual(common.get_file_lines(path), expected)
+
+    def testResampleFilesWithGenericBarFeedBuilder(self):
+        with common.TmpDir() as tmp_path:
+            sourcePath = self.__resampleToCSV(tmp_path, bar.Frequency.HOUR)
+            buildFeed = resample.GenericBarFeedBuilder(bar.Frequency.HOUR)
+            resample.resample_files({"spy": [sourcePath]}, buildFeed, [bar.Frequency.DAY], tmp_path, processes=2)
+
+            expected = common.get_file_lines(self.__resampleToCSV(tmp_path, bar.Frequency.DAY))
+            path = resample.get_output_path(tmp_path, "spy", bar.Frequency.DAY)
+            self.assertEqual(common.get_file_lines(path), expected)
+
+    def testCSVFileWriterBufferSize(self):
+        with common.TmpDir() as tmp_path:
+            feed = build_nt_feed("spy", [common.get_data_file_path("nt-spy-minute-2011.csv")])
+            feed.loadAll()
+            bars = feed["spy"][:5]
+
+            path = os.path.join(tmp_path, "bars.csv")
+            writer = resample.CSVFileWriter(path, bufferSize=2)
+            self.assertFalse(os.path.exists(path))
+            # The header and the first bar fill the buffer.
+            writer.writeBar(bars[0])
+            self.assertEqual(len(common.get_file_lines(path)), 2)
+            writer.writeBar(bars[1])
+            self.assertEqual(len(common.get_file_lines(path)), 2)
+            for bar_ in bars[2:]:
+                writer.writeBar(bar_)
+            writer.close()
+            self.assertEqual(len(common.get_file_lines(path)), len(bars) + 1)
+
+
 class BarFeedTestCase(common.TestCase):
 
     def testResampledBarFeed(self):
@@ -0,0 +1,122 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy as np
+
+from . import common
+
+from pyalgotrade.technical import crosssectional
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import roc
+from pyalgotrade.technical import stats
+from pyalgotrade.barfeed import yahoofeed
+
+
+class CrossSectionalTestCase(common.TestCase):
+    Instruments = ["spy", "nikkei"]
+
+    def __getFeed(self, instruments=Instruments):
+        barFeed = yahoofeed.Feed()
+        for instrument in instruments:
+            barFeed.addBarsFromCSV(instrument, common.get_data_file_path("%s-2010-yahoofinance.csv" % instrument))
+        return barFeed
+
+    def __dispatchAll(self, barFeed):
+        barFeed.start()
+        while not barFeed.eof():
+            barFeed.dispatch()
+
+    def testWindow(self):
+        barFeed = self.__getFeed()
+        checks = []
+
+        # Subscribe before building the engine to check that it gets updated when accessed.
+        def onBars(dateTime, bars):
+            self.assertEqual(engine.getDateTime(), dateTime)
+            for instrument in CrossSectionalTestCase.Instruments:
+                price = engine.getWindow()[engine.getInstrumentPosition(instrument), -1]
+                self.assertEqual(price, barFeed.getLastBar(instrument).getPrice())
+            checks.append(dateTime)
+
+        barFeed.getNewValuesEvent().subscribe(onBars)
+        engine = crosssectional.Engine(barFeed, CrossSectionalTestCase.Instruments, 3)
+        self.assertEqual(engine.getWindow().shape, (2, 3))
+        self.__dispatchAll(barFeed)
+        self.assertTrue(len(checks) > 0)
+
+    def testIndicatorsMatchFilters(self):
+        barFeed = self.__getFeed(["spy"])
+        engine = crosssectional.Engine(barFeed, ["spy"], 20)
+        sma = crosssectional.SMA(engine, 10)
+        stdDev = crosssectional.StdDev(engine, 15)
+        rateOfChange = crosssectional.RateOfChange(engine, 5)
+        smaDS = sma["spy"]
+        stdDevDS = stdDev["spy"]
+        rocDS = rateOfChange["spy"]
+
+        priceDS = barFeed["spy"].getPriceDataSeries()
+        expectedSMA = ma.SMA(priceDS, 10)
+        expectedStdDev = stats.StdDev(priceDS, 15)
+        expectedROC = roc.RateOfChange(priceDS, 5)
+        self.__dispatchAll(barFeed)
+
+        self.assertEqual(len(smaDS), len(expectedSMA))
+        for i in range(len(smaDS)):
+            self.assertEqual(common.safe_round(smaDS[i], 5), common.safe_round(expectedSMA[i], 5))
+            self.assertEqual(common.safe_round(stdDevDS[i], 5), common.safe_round(expectedStdDev[i], 5))
+            self.assertEqual(common.safe_round(rocDS[i], 5), common.safe_round(expectedROC[i], 5))
+
+    def testMissingBars(self):
+        barFeed = self.__getFeed()
+        engine = crosssectional.Engine(barFeed, CrossSectionalTestCase.Instruments, 2)
+        sma = crosssectional.SMA(engine, 1)
+        nikkeiDS = sma.getDataSeries("nikkei")
+        self.__dispatchAll(barFeed)
+
+        # The last price should be carried forward on dates with no bars for nikkei.
+        nikkeiBars = barFeed["nikkei"]
+        self.assertTrue(len(nikkeiDS) > len(nikkeiBars))
+        self.assertEqual(nikkeiDS[-1], nikkeiBars[-1].getPrice())
+        self.assertEqual(sma.getValue("nikkei"), nikkeiBars[-1].getPrice())
+
+    def testRankAndZScore(self):
+        barFeed = self.__getFeed()
+        engine = crosssectional.Engine(barFeed, CrossSectionalTestCase.Instruments, 2)
+        rateOfChange = crosssectional.RateOfChange(engine, 1)
+        rank = crosssectional.Rank(rateOfChange)
+        zScore = crosssectional.ZScore(rateOfChange)
+        barFeed.start()
+        while not barFeed.eof():
+            barFeed.dispatch()
+            values = rateOfChange.getValues()
+            ranks = rank.getValues()
+            zScores = zScore.getValues()
+            valid = ~np.isnan(values)
+            self.assertTrue(np.array_equal(valid, ~np.isnan(ranks)))
+            if valid.all():
+                if values[0] < values[1]:
+                    self.assertEqual(list(ranks), [1, 2])
+                elif values[0] > values[1]:
+                    self.assertEqual(list(ranks), [2, 1])
+                if values[0] != values[1]:
+                    self.assertEqual(sorted(np.round(zScores, 5)), [-1, 1])
+            elif valid.any():
+                self.assertEqual(ranks[valid][0], 1)
+                self.assertTrue(np.isnan(zScores).all())
@@ -70,3 +70,14 @@ class TestCase(common.TestCase):
         hds = build_hurst(values, num_values - 10, 2, 20)
         self.assertEquals(round(hds[-1], 1), 0)
         self.assertEquals(round(hds[-2], 1), 0)
+
+    def testMatchesHurstExpFun(self):
+        period = 100
+        values = np.cumsum(np.random.randn(1000)) + 1000
+        hds = build_hurst(values, period, 2, 20)
+        logValues = np.log10(values)
+        for i in range(period - 1):
+            self.assertEqual(hds[i], None)
+        for i in range(period - 1, len(values)):
+            expected = hurst.hurst_exp(logValues[i - period + 1:i + 1], 2, 20)
+            self.assertAlmostEqual(hds[i], expected, places=7)
@@ -22,6 +22,11 @@ from . import common
 
 from pyalgotrade import technical
 from pyalgotrade import dataseries
+from pyalgotrade.dataseries import bards
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import macd
+from pyalgotrade.technical import rsi
+from pyalgotrade.technical import stoch
 
 
 class TestEventWindow(technical.EventWindow):
@@ -68,3 +73,35 @@ class DataSeriesFilterTest(common.TestCase):
         for i in range(0, len(testFilter)):
             self.assertEqual(testFilter[i], ds[i])
             self.assertEqual(testFilter.getDataSeries()[i], ds[i])
+
+    def testAutoMaxLen(self):
+        ds = dataseries.SequenceDataSeries()
+        ds.setAutoMaxLen(3)
+        testFilter = TestFilter(ds)
+        chained = TestFilter(testFilter)
+        explicit = technical.EventBasedFilter(ds, TestEventWindow(), maxLen=10)
+        for i in range(20):
+            ds.append(i)
+
+        self.assertEqual(ds.getMaxLen(), 3)
+        self.assertEqual(testFilter.getAutoMaxLen(), 3)
+        self.assertEqual(chained[:], [17, 18, 19])
+        self.assertEqual(explicit.getAutoMaxLen(), None)
+        self.assertEqual(len(explicit), 10)
+
+    def testIndicatorsDeclareLookback(self):
+        ds = dataseries.SequenceDataSeries()
+        ds.setAutoMaxLen()
+        ma.SMA(ds, 5)
+        self.assertEqual(ds.getMaxLen(), 5)
+        rsi.RSI(ds, 14)
+        self.assertEqual(ds.getMaxLen(), 15)
+        macdDS = macd.MACD(ds, 26, 30, 9)
+        self.assertEqual(ds.getMaxLen(), 30)
+        self.assertEqual(macdDS.getMaxLen(), 9)
+
+        barDS = bards.BarDataSeries()
+        barDS.setAutoMaxLen()
+        so = stoch.StochasticOscillator(barDS, 10, dSMAPeriod=4)
+        self.assertEqual(barDS.getMaxLen(), 10)
+        self.assertEqual(so.getMaxLen(), 4)
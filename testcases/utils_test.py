@@ -20,13 +20,16 @@
 
 import datetime
 
+import pytz
 from six.moves import xrange
 
 from . import common
 
 from pyalgotrade import utils
+from pyalgotrade import marketsession
 from pyalgotrade.utils import collections
 from pyalgotrade.utils import dt
+from pyalgotrade.utils import dtparser
 
 
 class UtilsTestCase(common.TestCase):
@@ -316,6 +319,63 @@ class ListDequeTestCase(CollectionTestCaseBase):
         CollectionTestCaseBase._testResizeEmptyImpl(self)
 
 
+class DateTimeParserTestCase(common.TestCase):
+    def __assertSameAsStrptime(self, dateString, dateTimeFormat):
+        try:
+            expected = datetime.datetime.strptime(dateString, dateTimeFormat)
+        except ValueError:
+            with self.assertRaises(ValueError):
+                dtparser.parse(dateString, dateTimeFormat)
+        else:
+            self.assertEqual(dtparser.parse(dateString, dateTimeFormat), expected)
+
+    def testCompiledFormats(self):
+        dateTime = datetime.datetime(2005, 12, 3, 9, 5, 7, 120000)
+        for dateTimeFormat in [
+            "%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%Y%m%d %H%M%S", "%d-%b-%y", "%Y-%m-%d %H:%M:%S.%f", "%m/%d/%Y", "%y%%%m"
+        ]:
+            self.assertTrue(dtparser.get_parser(dateTimeFormat).isCompiled())
+            dateString = dateTime.strftime(dateTimeFormat)
+            self.__assertSameAsStrptime(dateString, dateTimeFormat)
+            # Missing zero-padding.
+            self.__assertSameAsStrptime(dateString.replace("0", "", 1), dateTimeFormat)
+
+    def testInvalidValues(self):
+        for dateString in ["2005-13-01", "2005-+1-01", "2005-01-01 ", "2005/01/01", "2005-1-", "", "2005-02-30"]:
+            self.__assertSameAsStrptime(dateString, "%Y-%m-%d")
+        for dateString in ["3-Foo-05", "3-dec-05", "3-Dec-2005", "32-Dec-05"]:
+            self.__assertSameAsStrptime(dateString, "%d-%b-%y")
+
+    def testTwoDigitYears(self):
+        for year in ["00", "68", "69", "99"]:
+            self.__assertSameAsStrptime("1-Jan-" + year, "%d-%b-%y")
+
+    def testUnsupportedFormat(self):
+        parser = dtparser.get_parser("%Y %j")
+        self.assertFalse(parser.isCompiled())
+        self.assertEqual(parser.parse("2005 002"), datetime.datetime(2005, 1, 2))
+
+    def testMemoized(self):
+        parser = dtparser.DateTimeParser("%Y-%m-%d")
+        self.assertIs(parser.parse("2005-12-30"), parser.parse("2005-12-30"))
+
+
+class LRUCacheTestCase(common.TestCase):
+    def testEviction(self):
+        cache = collections.LRUCache(2)
+        cache.set(1, "a")
+        cache.set(2, "b")
+        self.assertEqual(cache.get(1), "a")
+        cache.set(3, "c")
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get(2), None)
+        self.assertEqual(cache.get(1), "a")
+        self.assertEqual(cache.get(3), "c")
+        cache.set(3, "d")
+        self.assertEqual(cache.get(3), "d")
+        self.assertEqual(cache.get(4, "default"), "default")
+
+
 class DateTimeTestCase(common.TestCase):
     def testTimeStampConversions(self):
         dateTime = datetime.datetime(2000, 1, 1)
@@ -331,6 +391,57 @@ class DateTimeTestCase(common.TestCase):
         dateTime = dt.as_utc(datetime.datetime(2000, 1, 1, 1, 1, 1, microsecond=10))
         self.assertEqual(dt.timestamp_to_datetime(dt.datetime_to_timestamp(dateTime), True), dateTime)
 
+    def testSecondsConversions(self):
+        dateTime = datetime.datetime(2000, 1, 1, 1, 1, 1)
+        self.assertEqual(dt.datetime_to_seconds(dateTime), int(dt.datetime_to_timestamp(dateTime)))
+        self.assertEqual(dt.seconds_to_datetime(dt.datetime_to_seconds(dateTime)), dateTime)
+
+        # Fractions of a second are discarded.
+        dateTime = datetime.datetime(2000, 1, 1, 1, 1, 1, microsecond=10)
+        self.assertEqual(dt.datetime_to_seconds(dateTime), int(dt.datetime_to_timestamp(dateTime)))
+
+        timeZone = marketsession.NYSE.timezone
+        for dateTime in [datetime.datetime(2000, 1, 1, 1, 1, 1), datetime.datetime(2000, 7, 1, 1, 1, 1)]:
+            dateTime = dt.localize(dateTime, timeZone)
+            seconds = dt.datetime_to_seconds(dateTime)
+            self.assertEqual(seconds, int(dt.datetime_to_timestamp(dateTime)))
+            self.assertEqual(dt.seconds_to_datetime(seconds, timeZone), dateTime)
+            self.assertEqual(dt.seconds_to_datetime(seconds, timeZone).utcoffset(), dateTime.utcoffset())
+
+    def testLocalizeMatchesPytz(self):
+        timeZones = [
+            pytz.timezone("US/Eastern"), pytz.timezone("Europe/London"), pytz.timezone("Australia/Sydney"),
+            pytz.timezone("Asia/Tokyo"), pytz.timezone("EST"), pytz.utc
+        ]
+        # Go through a couple of years, 15 minutes at a time, to hit ambiguous and non-existent times.
+        beginning = datetime.datetime(2010, 1, 1)
+        for timeZone in timeZones:
+            for i in xrange(0, 2 * 365 * 24 * 4, 7):
+                dateTime = beginning + datetime.timedelta(minutes=15 * i)
+                expected = timeZone.localize(dateTime)
+                localized = dt.localize(dateTime, timeZone)
+                self.assertEqual(localized, expected)
+                self.assertEqual(localized.tzname(), expected.tzname())
+
+                utcDateTime = dateTime.replace(tzinfo=pytz.utc)
+                expected = utcDateTime.astimezone(timeZone)
+                converted = dt.localize(utcDateTime, timeZone)
+                self.assertEqual(converted, expected)
+                self.assertEqual(converted.tzname(), expected.tzname())
+                self.assertEqual(dt.localize(converted, pytz.utc), utcDateTime)
+
+    def testLocalizeNonPytzTimezone(self):
+        class FixedOffset(datetime.tzinfo):
+            def utcoffset(self, dateTime):
+                return datetime.timedelta(hours=-3)
+
+            def dst(self, dateTime):
+                return datetime.timedelta(0)
+
+        dateTime = dt.localize(datetime.datetime(2000, 1, 1, 12, tzinfo=pytz.utc), FixedOffset())
+        self.assertEqual(dateTime.hour, 9)
+        self.assertEqual(dt.get_timezone_table(FixedOffset()), None)
+
     def testGetFirstMonday(self):
         self.assertEquals(dt.get_first_monday(2010), datetime.date(2010, 1, 4))
         self.assertEquals(dt.get_first_monday(2011), datetime.date(2011, 1, 3))
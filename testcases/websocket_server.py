@@ -11,12 +11,11 @@ class WebSocketServerThread(threading.Thread):
         self.__host = host
         self.__port = port
         self.__webSocketServerClass = webSocketServerClass
-        self.__server = None
 
-    def run(self):
         def handler_cls_builder(*args, **kwargs):
             return self.__webSocketServerClass(*args, **kwargs)
 
+        # Bind right away so the port is known, even if 0 was used to pick a free one.
         self.__server = simple_server.make_server(
             self.__host,
             self.__port,
@@ -25,10 +24,16 @@ class WebSocketServerThread(threading.Thread):
             app=wsgiutils.WebSocketWSGIApplication(handler_cls=handler_cls_builder)
         )
         self.__server.initialize_websockets_manager()
+
+    def getPort(self):
+        return self.__server.server_address[1]
+
+    def run(self):
         self.__server.serve_forever()
 
     def stop(self):
         self.__server.shutdown()
+        self.__server.server_close()
 
 
 # webSocketServerClass should be a subclass of ws4py.websocket.WebSocket
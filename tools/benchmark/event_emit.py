@@ -0,0 +1,97 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+
+Micro-benchmark for observer.Event.emit with 0, 1 and many handlers.
+It compares the current implementation with the previous list based one.
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # For pyalgotrade
+
+from pyalgotrade import observer
+
+
+# The list based implementation used before handlers were kept in a tuple.
+class ListEvent(object):
+    def __init__(self):
+        self.__handlers = []
+        self.__deferred = []
+        self.__emitting = 0
+
+    def __subscribeImpl(self, handler):
+        assert not self.__emitting
+        if handler not in self.__handlers:
+            self.__handlers.append(handler)
+
+    def __applyChanges(self):
+        assert not self.__emitting
+        for action, param in self.__deferred:
+            action(param)
+        self.__deferred = []
+
+    def subscribe(self, handler):
+        if self.__emitting:
+            self.__deferred.append((self.__subscribeImpl, handler))
+        elif handler not in self.__handlers:
+            self.__subscribeImpl(handler)
+
+    def emit(self, *args, **kwargs):
+        try:
+            self.__emitting += 1
+            for handler in self.__handlers:
+                handler(*args, **kwargs)
+        finally:
+            self.__emitting -= 1
+            if not self.__emitting:
+                self.__applyChanges()
+
+
+def handler(*args):
+    pass
+
+
+def build_event(eventClass, handlers):
+    ret = eventClass()
+    for i in range(handlers):
+        # Use different objects since duplicate handlers are ignored.
+        ret.subscribe(lambda *args: handler(*args))
+    return ret
+
+
+def run_benchmark(eventClass, handlers, emits, repeat):
+    event = build_event(eventClass, handlers)
+    timer = timeit.Timer(lambda: event.emit(1, 2, 3))
+    return min(timer.repeat(repeat=repeat, number=emits))
+
+
+def main():
+    emits = 1000000
+    repeat = 3
+    print("%-10s %12s %12s %8s" % ("handlers", "list (s)", "tuple (s)", "speedup"))
+    for handlers in [0, 1, 2, 5]:
+        before = run_benchmark(ListEvent, handlers, emits, repeat)
+        after = run_benchmark(observer.Event, handlers, emits, repeat)
+        print("%-10d %12.3f %12.3f %7.2fx" % (handlers, before, after, before / after))
+
+
+if __name__ == "__main__":
+    main()
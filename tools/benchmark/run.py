@@ -0,0 +1,369 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+
+Throughput benchmarks using synthetic data. Each benchmark runs in its own process and the results are written as
+JSON, for example:
+
+    python tools/benchmark/run.py --instruments 5 --bars 10000 --output results.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # For pyalgotrade
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "samples"))  # For sma_crossover
+
+import pyalgotrade
+from pyalgotrade import bar
+from pyalgotrade import broker
+from pyalgotrade import strategy
+from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.broker import backtesting
+from pyalgotrade.stratanalyzer import drawdown
+from pyalgotrade.stratanalyzer import returns
+from pyalgotrade.stratanalyzer import sharpe
+from pyalgotrade.stratanalyzer import trades
+from pyalgotrade.technical import atr
+from pyalgotrade.technical import bollinger
+from pyalgotrade.technical import crosssectional
+from pyalgotrade.technical import cumret
+from pyalgotrade.technical import highlow
+from pyalgotrade.technical import hurst
+from pyalgotrade.technical import linebreak
+from pyalgotrade.technical import linreg
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import macd
+from pyalgotrade.technical import ratio
+from pyalgotrade.technical import roc
+from pyalgotrade.technical import rsi
+from pyalgotrade.technical import stats
+from pyalgotrade.technical import stoch
+from pyalgotrade.technical import vwap
+
+import synthetic
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+FREQUENCIES = {
+    "second": bar.Frequency.SECOND,
+    "minute": bar.Frequency.MINUTE,
+    "hour": bar.Frequency.HOUR,
+    "day": bar.Frequency.DAY,
+}
+
+# Indicator name to a function that builds it given a pyalgotrade.dataseries.bards.BarDataSeries.
+INDICATORS = [
+    ("SMA", lambda barDS: ma.SMA(barDS.getCloseDataSeries(), 20)),
+    ("EMA", lambda barDS: ma.EMA(barDS.getCloseDataSeries(), 20)),
+    ("WMA", lambda barDS: ma.WMA(barDS.getCloseDataSeries(), list(range(1, 11)))),
+    ("RSI", lambda barDS: rsi.RSI(barDS.getCloseDataSeries(), 14)),
+    ("MACD", lambda barDS: macd.MACD(barDS.getCloseDataSeries(), 12, 26, 9)),
+    ("BollingerBands", lambda barDS: bollinger.BollingerBands(barDS.getCloseDataSeries(), 20, 2)),
+    ("ATR", lambda barDS: atr.ATR(barDS, 14)),
+    ("StochasticOscillator", lambda barDS: stoch.StochasticOscillator(barDS, 14)),
+    ("RateOfChange", lambda barDS: roc.RateOfChange(barDS.getCloseDataSeries(), 10)),
+    ("StdDev", lambda barDS: stats.StdDev(barDS.getCloseDataSeries(), 20)),
+    ("ZScore", lambda barDS: stats.ZScore(barDS.getCloseDataSeries(), 20)),
+    ("LeastSquaresRegression", lambda barDS: linreg.LeastSquaresRegression(barDS.getCloseDataSeries(), 20)),
+    ("Slope", lambda barDS: linreg.Slope(barDS.getCloseDataSeries(), 20)),
+    ("Trend", lambda barDS: linreg.Trend(barDS.getCloseDataSeries(), 20)),
+    ("HurstExponent", lambda barDS: hurst.HurstExponent(barDS.getCloseDataSeries(), 100)),
+    ("High", lambda barDS: highlow.High(barDS.getCloseDataSeries(), 20)),
+    ("Low", lambda barDS: highlow.Low(barDS.getCloseDataSeries(), 20)),
+    ("CumulativeReturn", lambda barDS: cumret.CumulativeReturn(barDS.getCloseDataSeries())),
+    ("Ratio", lambda barDS: ratio.Ratio(barDS.getCloseDataSeries())),
+    ("VWAP", lambda barDS: vwap.VWAP(barDS, 20)),
+    ("LineBreak", lambda barDS: linebreak.LineBreak(barDS, 3)),
+]
+
+
+class Benchmark(object):
+    """Base class for benchmarks. Only :meth:`run` is measured."""
+
+    def __init__(self, config):
+        self.__config = config
+
+    def getConfig(self):
+        return self.__config
+
+    def buildUniverse(self):
+        config = self.getConfig()
+        return synthetic.generate_universe(config.instruments, config.bars, config.frequency, config.seed)
+
+    def setUp(self):
+        pass
+
+    # Returns the number of bars processed.
+    def run(self):
+        raise NotImplementedError()
+
+    def tearDown(self):
+        pass
+
+
+def dispatch_all(barFeed):
+    barFeed.start()
+    try:
+        while not barFeed.eof():
+            barFeed.dispatch()
+    finally:
+        barFeed.stop()
+        barFeed.join()
+
+
+class CSVLoad(Benchmark):
+    def setUp(self):
+        self.__tmpDir = tempfile.mkdtemp()
+        self.__files = []
+        for instrument, bars in sorted(self.buildUniverse().items()):
+            path = os.path.join(self.__tmpDir, "%s.csv" % instrument)
+            synthetic.write_csv(path, bars)
+            self.__files.append((instrument, path))
+
+    def run(self):
+        barFeed = csvfeed.GenericBarFeed(self.getConfig().frequency)
+        for instrument, path in self.__files:
+            barFeed.addBarsFromCSV(instrument, path)
+        return self.getConfig().instruments * self.getConfig().bars
+
+    def tearDown(self):
+        shutil.rmtree(self.__tmpDir)
+
+
+class FeedIteration(Benchmark):
+    def setUp(self):
+        self.__barFeed = synthetic.build_feed(self.buildUniverse(), self.getConfig().frequency)
+
+    def run(self):
+        dispatch_all(self.__barFeed)
+        return self.getConfig().instruments * self.getConfig().bars
+
+
+class Indicator(Benchmark):
+    def __init__(self, config, buildIndicator):
+        super(Indicator, self).__init__(config)
+        self.__buildIndicator = buildIndicator
+
+    def setUp(self):
+        self.__barFeed = synthetic.build_feed(self.buildUniverse(), self.getConfig().frequency)
+        self.__indicators = [
+            self.__buildIndicator(self.__barFeed[instrument])
+            for instrument in self.__barFeed.getRegisteredInstruments()
+        ]
+
+    def run(self):
+        dispatch_all(self.__barFeed)
+        return self.getConfig().instruments * self.getConfig().bars
+
+
+class CrossSectional(Benchmark):
+    def setUp(self):
+        self.__barFeed = synthetic.build_feed(self.buildUniverse(), self.getConfig().frequency)
+        engine = crosssectional.Engine(self.__barFeed, self.__barFeed.getRegisteredInstruments(), 20)
+        self.__rank = crosssectional.Rank(crosssectional.RateOfChange(engine, 10))
+        crosssectional.ZScore(crosssectional.SMA(engine, 20))
+
+    def run(self):
+        dispatch_all(self.__barFeed)
+        return self.getConfig().instruments * self.getConfig().bars
+
+
+class BrokerRestingOrders(Benchmark):
+    def setUp(self):
+        config = self.getConfig()
+        self.__barFeed = synthetic.build_feed(self.buildUniverse(), config.frequency)
+        brk = backtesting.Broker(1000000, self.__barFeed)
+        brk.setAllowNegativeCash(True)
+        # Resting orders spread between 50% and 100% of the initial price, for every instrument.
+        for instrument in self.__barFeed.getRegisteredInstruments():
+            for i in range(config.orders):
+                limitPrice = 50 + 50.0 * i / config.orders
+                order = brk.createLimitOrder(broker.Order.Action.BUY, instrument, limitPrice, 1)
+                order.setGoodTillCanceled(True)
+                brk.submitOrder(order)
+        self.__broker = brk
+
+    def run(self):
+        dispatch_all(self.__barFeed)
+        return self.getConfig().instruments * self.getConfig().bars
+
+
+class TradingStrategy(strategy.BacktestingStrategy):
+    # Enters and exits positions periodically so that analyzers have something to do.
+    def __init__(self, barFeed, period):
+        super(TradingStrategy, self).__init__(barFeed)
+        self.__period = period
+        self.__bars = 0
+        self.__positions = {}
+
+    def onBars(self, bars):
+        self.__bars += 1
+        if self.__bars % self.__period == 0:
+            for instrument in bars.getInstruments():
+                position = self.__positions.pop(instrument, None)
+                if position is None:
+                    self.__positions[instrument] = self.enterLong(instrument, 10, True)
+                elif not position.exitActive():
+                    position.exitMarket()
+
+
+class Analyzers(Benchmark):
+    def setUp(self):
+        barFeed = synthetic.build_feed(self.buildUniverse(), self.getConfig().frequency)
+        self.__strategy = TradingStrategy(barFeed, 5)
+        self.__strategy.attachAnalyzer(returns.Returns())
+        self.__strategy.attachAnalyzer(sharpe.SharpeRatio())
+        self.__strategy.attachAnalyzer(drawdown.DrawDown())
+        self.__strategy.attachAnalyzer(trades.Trades())
+
+    def run(self):
+        self.__strategy.run()
+        return self.getConfig().instruments * self.getConfig().bars
+
+
+class SMACrossover(Benchmark):
+    def setUp(self):
+        import sma_crossover
+
+        # The strategy trades a single instrument.
+        config = self.getConfig()
+        bars = synthetic.generate_bars(config.bars, config.frequency, config.seed)
+        barFeed = synthetic.build_feed({synthetic.get_instrument(0): bars}, config.frequency)
+        self.__strategy = sma_crossover.SMACrossOver(barFeed, synthetic.get_instrument(0), 20)
+
+    def run(self):
+        self.__strategy.run()
+        return self.getConfig().bars
+
+
+def get_benchmarks():
+    """Returns a list of (name, function to build the benchmark given the config)."""
+    ret = [
+        ("csv_load", CSVLoad),
+        ("feed_iteration", FeedIteration),
+    ]
+    for name, buildIndicator in INDICATORS:
+        ret.append((
+            "indicator.%s" % name,
+            lambda config, buildIndicator=buildIndicator: Indicator(config, buildIndicator)
+        ))
+    ret.extend([
+        ("indicator.crosssectional", CrossSectional),
+        ("broker_resting_orders", BrokerRestingOrders),
+        ("analyzers", Analyzers),
+        ("sma_crossover", SMACrossover),
+    ])
+    return ret
+
+
+def get_peak_rss_kb():
+    if resource is None:
+        return None
+    ret = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on Mac OS X and in kilobytes on Linux.
+    if sys.platform == "darwin":
+        ret = ret / 1024
+    return ret
+
+
+def run_benchmark(name, config):
+    benchmark = dict(get_benchmarks())[name](config)
+    benchmark.setUp()
+    try:
+        beginning = timeit.default_timer()
+        bars = benchmark.run()
+        elapsed = timeit.default_timer() - beginning
+    finally:
+        benchmark.tearDown()
+
+    return {
+        "name": name,
+        "bars": bars,
+        "seconds": elapsed,
+        "bars_per_sec": bars / elapsed if elapsed > 0 else None,
+        "peak_rss_kb": get_peak_rss_kb(),
+    }
+
+
+def run_benchmark_in_process(name, config):
+    # Each benchmark runs in a separate process so that peak memory usage is not shared.
+    pool = multiprocessing.Pool(1)
+    try:
+        return pool.apply(run_benchmark, (name, config))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description="Run PyAlgoTrade benchmarks using synthetic data")
+    parser.add_argument("--instruments", type=int, default=1, help="The number of instruments")
+    parser.add_argument("--bars", type=int, default=10000, help="The number of bars per instrument")
+    parser.add_argument("--frequency", choices=sorted(FREQUENCIES.keys()), default="day", help="The bar frequency")
+    parser.add_argument("--orders", type=int, default=1000, help="The number of resting orders per instrument")
+    parser.add_argument("--seed", type=int, default=0, help="The seed used to generate bars")
+    parser.add_argument("--filter", default=None, help="Only run benchmarks whose name contains this string")
+    parser.add_argument("--output", default=None, help="The file to write the JSON results to. Defaults to stdout")
+    ret = parser.parse_args(args)
+    ret.frequency = FREQUENCIES[ret.frequency]
+    return ret
+
+
+def main():
+    config = parse_args()
+    results = []
+    for name, _ in get_benchmarks():
+        if config.filter is None or config.filter in name:
+            results.append(run_benchmark_in_process(name, config))
+            sys.stderr.write("%s: %.1f bars/sec\n" % (name, results[-1]["bars_per_sec"]))
+
+    output = {
+        "pyalgotrade": pyalgotrade.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "instruments": config.instruments,
+            "bars": config.bars,
+            "frequency": config.frequency,
+            "orders": config.orders,
+            "seed": config.seed,
+        },
+        "results": results,
+    }
+    if config.output is None:
+        json.dump(output, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(config.output, "w") as f:
+            json.dump(output, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
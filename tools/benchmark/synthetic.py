@@ -0,0 +1,121 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+
+Deterministic synthetic OHLCV data for benchmarks.
+"""
+
+import datetime
+import math
+import random
+
+from pyalgotrade import bar
+from pyalgotrade.barfeed import membf
+
+
+def get_time_delta(frequency):
+    if frequency == bar.Frequency.SECOND:
+        ret = datetime.timedelta(seconds=1)
+    elif frequency == bar.Frequency.MINUTE:
+        ret = datetime.timedelta(minutes=1)
+    elif frequency == bar.Frequency.HOUR:
+        ret = datetime.timedelta(hours=1)
+    elif frequency == bar.Frequency.DAY:
+        ret = datetime.timedelta(days=1)
+    else:
+        raise Exception("Unsupported frequency %s" % frequency)
+    return ret
+
+
+def get_instrument(index):
+    return "SYN%04d" % index
+
+
+def generate_bars(
+    count, frequency, seed=0, beginning=datetime.datetime(2000, 1, 3), initialPrice=100.0, volatility=0.01
+):
+    """Generates bars following a geometric random walk. The same seed always generates the same bars.
+
+    :param count: The number of bars to generate.
+    :param frequency: The frequency of the bars. Check :class:`pyalgotrade.bar.Frequency`.
+    :param seed: The seed for the random number generator.
+    :rtype: A list of :class:`pyalgotrade.bar.BasicBar`.
+    """
+
+    rnd = random.Random(seed)
+    delta = get_time_delta(frequency)
+    dateTime = beginning
+    close = initialPrice
+    ret = []
+    for i in range(count):
+        open_ = close
+        close = round(open_ * math.exp(rnd.gauss(0, volatility)), 4)
+        high = round(max(open_, close) * (1 + abs(rnd.gauss(0, volatility / 2))), 4)
+        low = round(min(open_, close) * (1 - abs(rnd.gauss(0, volatility / 2))), 4)
+        volume = rnd.randint(1000, 100000)
+        ret.append(bar.BasicBar(dateTime, open_, high, low, close, volume, close, frequency))
+
+        dateTime += delta
+        # Skip weekends for daily bars.
+        if frequency == bar.Frequency.DAY:
+            while dateTime.weekday() >= 5:
+                dateTime += delta
+    return ret
+
+
+def generate_universe(instruments, count, frequency, seed=0):
+    """Generates bars for multiple instruments, all of them with the same datetimes.
+
+    :rtype: A dictionary of instrument to list of :class:`pyalgotrade.bar.BasicBar`.
+    """
+
+    ret = {}
+    for i in range(instruments):
+        ret[get_instrument(i)] = generate_bars(count, frequency, seed=seed + i)
+    return ret
+
+
+def write_csv(path, bars):
+    """Writes bars using the format supported by :class:`pyalgotrade.barfeed.csvfeed.GenericBarFeed`."""
+
+    with open(path, "w") as f:
+        f.write("Date Time,Open,High,Low,Close,Volume,Adj Close\n")
+        for bar_ in bars:
+            f.write("%s,%s,%s,%s,%s,%s,%s\n" % (
+                bar_.getDateTime().strftime("%Y-%m-%d %H:%M:%S"),
+                bar_.getOpen(),
+                bar_.getHigh(),
+                bar_.getLow(),
+                bar_.getClose(),
+                bar_.getVolume(),
+                bar_.getAdjClose()
+            ))
+
+
+class BarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return True
+
+
+def build_feed(universe, frequency, maxLen=None):
+    """Builds an in-memory bar feed with the bars from :func:`generate_universe`."""
+
+    ret = BarFeed(frequency, maxLen)
+    for instrument in sorted(universe.keys()):
+        ret.addBarsFromSequence(instrument, universe[instrument])
+    return ret